@@ -1,56 +1,454 @@
 
 import json
+from collections import Counter
+
 import click
-from concurrent.futures import ThreadPoolExecutor
-from tabulate import tabulate
 
+# Only what building the command needs is imported here: boto3, tabulate and
+# the orchestrator load when a scan actually runs (see benchmarks/startup.py)
 from Core.banner import print_banner
-from Core import orchestrator
+from Core.fingerprints import DEFAULT_STATE_DIR
+
+class BannerCommand(click.Command):
+    def parse_args(self, ctx, args):
+        # print banner & description before any prompts
+        print_banner()
+        return super().parse_args(ctx, args)
+
+class DefaultGroup(click.Group):
+    """Runs the 'scan' command when no other command is named (awscan --region ...)."""
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = ['scan'] + list(args)
+        return super().parse_args(ctx, args)
 
-# print banner & description before any prompts
-print_banner()
+@click.group(cls=DefaultGroup)
+def main():
+    """awscan — AWS configuration audit tool. Runs `scan` unless another command is given."""
 
-@click.command()
+@main.command(cls=BannerCommand)
 @click.option('--access-key', prompt='Enter your access key', help='Your AWS access key.')
 @click.option('--secret-key', prompt='Enter your secret key', hide_input=True, help='Your AWS secret key.')
 @click.option('--session-token', prompt='Enter your session token', hide_input=True, help='Your AWS session token.')
 @click.option('--region', prompt='Enter your region', help='AWS region to use.')
 @click.option(
     '--output',
-    type=click.Choice(['table', 'json'], case_sensitive=False),
+    type=click.Choice(['table', 'json', 'jsonl'], case_sensitive=False),
     default='table',
-    help='Output format for the results (table or json).'
+    help='Output format for the results (table or json; jsonl streams one JSON event per finished check).'
 )
-def main(access_key, secret_key, session_token, region, output):
+@click.option('--incremental', is_flag=True, default=False,
+              help='Skip resources whose fingerprint is unchanged since the last scan and carry their findings forward.')
+@click.option('--state-dir', default=DEFAULT_STATE_DIR, show_default=True,
+              help='Directory holding the resource fingerprints (--incremental) and scan journals (--resume).')
+@click.option('--events', 'events_path', type=click.Path(exists=True), default=None,
+              help='CloudTrail event file (.json/.json.gz) or directory: re-run only the affected checks '
+                   'and merge the results into the latest stored scan.')
+@click.option('--watch', is_flag=True, default=False,
+              help='With --events DIR, keep watching the directory for new event files.')
+@click.option('--scans-dir', default='scans', show_default=True,
+              help='Folder of stored scans (scan_*.json.gz or scan_*.json) updated by --events.')
+@click.option('--stats', 'show_stats', is_flag=True, default=False,
+              help='Report API calls, retries, throttles, bytes and latency percentiles per check and operation.')
+@click.option('--trace', 'trace_path', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Write a Chrome trace-event timeline of the scan (phases, units, API calls) to this file.')
+@click.option('--engine', type=click.Choice(['threads', 'asyncio'], case_sensitive=False), default='threads',
+              show_default=True,
+              help='Execution engine: a thread pool, or asyncio, which runs the S3 bucket checks on an event loop '
+                   '(needs aiobotocore; their calls are left out of --stats and --trace) and the others on the thread pool.')
+@click.option('--org', 'org_accounts', is_flag=True, default=False,
+              help='Scan every active account of the organization (listed with Organizations) through AssumeRole.')
+@click.option('--accounts-file', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Scan the accounts listed in this file (one "<account id>[,<name>]" per line) through AssumeRole.')
+@click.option('--role-name', default='OrganizationAccountAccessRole', show_default=True,
+              help='Role assumed in each account by --org / --accounts-file.')
+@click.option('--external-id', default=None, help='External ID passed to AssumeRole, if the role requires one.')
+@click.option('--processes', type=int, default=None,
+              help='Accounts scanned in parallel (worker processes); defaults to the number of CPUs.')
+@click.option('--account-threads', type=int, default=4, show_default=True,
+              help='Worker threads per account scan.')
+@click.option('--org-report', default='org_report.json', show_default=True,
+              help='Consolidated report written by --org / --accounts-file.')
+@click.option('--model-cache', default=None,
+              help='Directory keeping pre-parsed botocore service models, reused by later scans to start faster.')
+@click.option('--scan-timeout', type=float, default=None,
+              help='Seconds the whole scan may take; unfinished checks are reported as TIMEOUT.')
+@click.option('--service-timeout', type=float, default=None,
+              help='Seconds (from the scan start) within which each service must finish.')
+@click.option('--check-timeout', type=float, default=None,
+              help='Seconds each check may run (per region for regional checks).')
+@click.option('--call-timeout', type=float, default=None,
+              help='Connect/read timeout of each API call attempt when deadlines are set (default 30).')
+@click.option('--no-negative-cache', 'no_negative_cache', is_flag=True, default=False,
+              help='Keep calling operations that were already denied (AccessDenied, OptInRequired, '
+                   'UnsupportedOperation) and report each failure separately.')
+@click.option('--alert-severity', type=click.Choice(['critical', 'high', 'medium', 'low', 'none'], case_sensitive=False),
+              default='high', show_default=True,
+              help='Print FAIL findings of checks at or above this severity as soon as their check finishes '
+                   '(to stderr with --output json).')
+@click.option('--no-preflight', 'no_preflight', is_flag=True, default=False,
+              help='Do not check the IAM permissions of the checks before the scan '
+                   '(checks missing one are otherwise skipped).')
+@click.option('--resume', 'resume_id', default=None,
+              help='Resume an interrupted scan by its ID: only the units missing from its journal are run.')
+@click.option('--profile', 'profile_path', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Profile CPU time and memory of every check (runs checks one at a time) '
+                   'and write the JSON report to this file.')
+def scan(access_key, secret_key, session_token, region, output, incremental, state_dir,
+         events_path, watch, scans_dir, show_stats, trace_path, engine, org_accounts, accounts_file,
+         role_name, external_id, processes, account_threads, org_report, model_cache, scan_timeout, service_timeout, check_timeout, call_timeout, no_negative_cache,
+         alert_severity, no_preflight, resume_id, profile_path):
+    """Scan an account (or many, with --org / --accounts-file) and print the findings."""
+    from tabulate import tabulate
+    from Core import orchestrator
+    from Core.context import ScanContext
+    from Core.deadlines import Deadlines
+    from Core.fingerprints import open_store
+    from Core.journal import Journal
+    from Core.negative_cache import NegativeCache
+    from Core.planner import Planner
+    from Core.preflight import Preflight
+    from Core.profiling import Profiler
+    from Core.remediation import render_finding
+    from Core.stats import ApiStats, STATS_COLUMNS
+    from Core.streaming import stream_audits
+    from Core.trace import Tracer
+    from Core.warmup import Warmup, stop
+
+    if engine == 'asyncio':
+        from Core import aio
+        try:
+            aio.require()
+        except RuntimeError as e:
+            raise click.UsageError(str(e))
+        if profile_path:
+            raise click.UsageError("--profile runs checks one at a time and needs --engine threads")
+
     # 1) Validate & discover
     validate, response, session = orchestrator.validate_creds(
         access_key, secret_key, session_token, region
     )
     click.echo(response)
-    click.echo("Discovering enabled services...")
-    enabled_services = orchestrator.discover_enabled_services(session)
-    click.echo(f"Found {len(enabled_services)} services: {', '.join(enabled_services)}\n")
 
-    # 2) Run audits
-    click.echo("Running CIS benchmarks…")
-    all_results = orchestrator.thread_audits(enabled_services, session)
+    if events_path:
+        apply_events(session, events_path, watch, scans_dir)
+        return
+
+    if org_accounts or accounts_file:
+        scan_accounts(
+            session, region, accounts_file, org_report,
+            role_name=role_name, external_id=external_id, processes=processes, threads=account_threads,
+            incremental=incremental, state_dir=state_dir, model_cache=model_cache
+        )
+        return
+
+    # Every finished unit is checkpointed, so an interrupted scan can be resumed
+    account = session.client('sts').get_caller_identity()['Account']
+    # The region findings are attributed to (the default one for global services)
+    scan_region = session.region_name
+    if resume_id:
+        try:
+            journal = Journal.open(state_dir, resume_id)
+        except FileNotFoundError as e:
+            raise click.UsageError(str(e))
+        if journal.header and journal.header.get('account') != account:
+            raise click.UsageError(f"Scan {resume_id} was run on account {journal.header.get('account')}, not {account}")
+        if journal.header and journal.header.get('region') != scan_region:
+            raise click.UsageError(
+                f"Scan {resume_id} was run in region {journal.header.get('region')}, not {scan_region}: "
+                f"pass --region {journal.header.get('region')} to resume it"
+            )
+        click.echo(f"Resuming scan {resume_id}: {len(journal.completed)} units already done")
+    else:
+        journal = Journal.create(state_dir, account, scan_region)
+        click.echo(f"Scan ID: {journal.scan_id} (if interrupted, continue it with --resume {journal.scan_id})")
+
+    deadlines = None
+    if scan_timeout or service_timeout or check_timeout:
+        deadlines = Deadlines(scan_timeout, service_timeout, check_timeout, call_timeout).install(session)
+    scan = ScanContext(
+        journal=journal,
+        deadlines=deadlines,
+        planner=Planner(session),
+        on_findings=alert_listener(alert_severity.lower(), to_stderr=output.lower() != 'table'),
+        negative_cache=None if no_negative_cache else NegativeCache().install(session),
+        fingerprints=open_store(session, state_dir) if incremental else None,
+        stats=ApiStats().install(session) if show_stats else None,
+        tracer=Tracer().install(session) if trace_path else None,
+        profiler=Profiler().start() if profile_path else None,
+        warmup=Warmup(session, model_cache).start()
+    )
+    try:
+        if journal.services is None:
+            click.echo("Discovering enabled services...")
+            enabled_services = orchestrator.discover_enabled_services(session, scan)
+            journal.record_services(enabled_services)
+        else:
+            enabled_services = journal.services
+        click.echo(f"Found {len(enabled_services)} services: {', '.join(enabled_services)}\n")
+
+        if not no_preflight:
+            scan.preflight = Preflight(session, scan).run(enabled_services)
+            report_coverage(scan.preflight.coverage())
+
+        # 2) Run audits, reporting each check as it finishes
+        click.echo("Running CIS benchmarks…")
+        audits = aio.async_audits if engine == 'asyncio' else orchestrator.thread_audits
+        all_results = []
+        for event in stream_audits(enabled_services, session, scan, audits):
+            if event['type'] == 'error':
+                raise click.ClickException(f"Scan failed: {event['error']}")
+            if event['type'] == 'done':
+                all_results = event['results']
+            elif output.lower() == 'jsonl':
+                if event['type'] == 'unit':
+                    event = dict(event, findings=[render_finding(f) for f in event['findings']])
+                click.echo(json.dumps(event))
+            elif event['type'] == 'unit':
+                click.echo(progress_line(event), err=output.lower() == 'json')
+    finally:
+        # Also when the scan fails: stop the warm-up thread
+        stop(scan)
     consolidated = orchestrator.organize_results(all_results)
+    journal.finish()
+    if scan.fingerprints is not None:
+        scan.fingerprints.save()
+    if scan.tracer is not None:
+        scan.tracer.export(trace_path)
+        click.echo(f"Trace written to {trace_path}")
+    if scan.profiler is not None:
+        scan.profiler.export(profile_path)
+        scan.profiler.stop()
+        click.echo(f"Profile written to {profile_path}")
 
     # 3) Render output
-    if output.lower() == 'json':
+    extras = {}
+    if scan.stats is not None:
+        extras['api_stats'] = scan.stats.rows()
+    if scan.preflight is not None:
+        extras['preflight'] = scan.preflight.coverage()
+    if scan.negative_cache is not None and scan.negative_cache.rows():
+        extras['denied_operations'] = scan.negative_cache.rows()
+    if output.lower() == 'jsonl':
+        # The findings were streamed already
+        statuses = Counter(f['status'] for findings in consolidated.values() for f in findings)
+        click.echo(json.dumps(dict(extras, type='summary', scan_id=journal.scan_id, statuses=statuses)))
+    elif output.lower() == 'json':
         # pretty-print JSON
-        click.echo(json.dumps(consolidated, indent=2))
+        rendered = {
+            service: [render_finding(f) for f in findings]
+            for service, findings in consolidated.items()
+        }
+        rendered.update(extras)
+        click.echo(json.dumps(rendered, indent=2))
     else:
         # console table per service
         for service, findings in consolidated.items():
             click.echo(click.style(f"\n=== {service.upper()} ===", fg="yellow", bold=True))
             # define your table columns:
-            headers = ['check_id', 'status', 'resource', 'evidence', 'remediation']
+            headers = ['check_id', 'status', 'severity', 'resource', 'evidence', 'remediation']
+            if incremental:
+                headers.append('evaluation')
             rows = [
-                [f.get(h, '') or '' for h in headers]
+                [render_finding(f).get(h, '') or '' for h in headers]
                 for f in findings
             ]
             click.echo(tabulate(rows, headers=headers, tablefmt='grid'))
+        if scan.stats is not None:
+            click.echo(click.style("\n=== API CALLS ===", fg="yellow", bold=True))
+            rows = [[r[c] for c in STATS_COLUMNS] for r in scan.stats.rows()]
+            click.echo(tabulate(rows, headers=STATS_COLUMNS, tablefmt='simple'))
+        if scan.negative_cache is not None and scan.negative_cache.rows():
+            click.echo(click.style("\n=== DENIED OPERATIONS ===", fg="yellow", bold=True))
+            click.echo(f"{scan.negative_cache.short_circuited()} calls answered from the cache instead of being sent")
+            click.echo(tabulate(scan.negative_cache.rows(), headers='keys', tablefmt='simple'))
+
+def progress_line(event):
+    counts = Counter(f['status'] for f in event['findings'])
+    summary = ', '.join(f"{n} {status}" for status, n in sorted(counts.items())) or 'no findings'
+    width = len(str(event['total']))
+    return (f"[{event['done']:>{width}}/{event['total']}] {event['service']} {event['check_id']} "
+            f"{event['region'] or 'global'}: {summary}")
+
+def alert_listener(min_severity, to_stderr=False):
+    # Streams the FAIL findings that matter most while the rest of the scan runs
+    import threading
+    from Core.planner import SEVERITIES
+
+    if min_severity == 'none':
+        return None
+    severities = SEVERITIES[:SEVERITIES.index(min_severity) + 1]
+    lock = threading.Lock()
+
+    def on_findings(unit, findings):
+        for finding in findings:
+            if finding.get('status') == 'FAIL' and finding.get('severity') in severities:
+                line = (f"[{finding['severity'].upper()}] {finding['check_id']} {finding.get('resource', '')}: "
+                        f"{finding.get('evidence', '')}")
+                with lock:
+                    click.echo(click.style(line, fg='red', bold=finding['severity'] == 'critical'), err=to_stderr)
+    return on_findings
+
+def report_coverage(coverage):
+    click.echo(f"Preflight ({coverage['method']}): {coverage['runnable']}/{coverage['checks']} checks runnable "
+               f"({coverage['coverage_pct']}%)")
+    for check_id, actions in coverage['pruned'].items():
+        click.echo(click.style(f"  skipping {check_id}: {', '.join(actions)} denied", fg='red'))
+    if coverage['unverified_actions']:
+        click.echo(f"  not verified: {', '.join(coverage['unverified_actions'])}")
+    click.echo("")
+
+def scan_accounts(session, region, accounts_file, report_path, **options):
+    # Org mode: one process-pool task per account, consolidated into one report
+    from Core import org
+
+    if accounts_file:
+        accounts = org.read_accounts_file(accounts_file)
+    else:
+        try:
+            accounts = org.list_organization_accounts(session)
+        except org.ClientError as e:
+            raise click.ClickException(f"Cannot list the organization's accounts: {e}")
+    click.echo(f"Scanning {len(accounts)} accounts...")
+
+    def on_account(entry):
+        if entry['status'] == 'OK':
+            counts = ', '.join(f"{n} {status}" for status, n in sorted(entry['summary'].items()))
+            click.echo(f"  {entry['account_id']} {entry['name']}: {counts or 'no findings'}")
+        else:
+            click.echo(click.style(f"  {entry['account_id']} {entry['name']}: {entry['error']}", fg='red'))
+
+    report = org.scan_organization(accounts, session, region, on_account=on_account, **options)
+    org.write_report(report, report_path)
+    click.echo(f"{report['accounts_scanned']} accounts scanned, {report['accounts_failed']} failed; "
+               f"report written to {report_path}")
+
+def apply_events(session, events_path, watch, scans_dir):
+    # Targeted re-evaluation of the latest stored scan from CloudTrail events
+    from Core import events
+    from Core.context import ScanContext
+
+    scan_path = events.latest_scan(scans_dir)
+    if scan_path is None:
+        raise click.ClickException(f"No stored scan (scan_*.json.gz or scan_*.json) found in {scans_dir}")
+    click.echo(f"Applying CloudTrail events to {scan_path}")
+    for batch in events.iter_event_batches(events_path, watch=watch):
+        targets = events.apply_event_files(batch, session, scan_path, ScanContext())
+        click.echo(f"{len(batch)} event file(s): {len(targets)} check(s) re-evaluated")
+        for (service, check_id), target in sorted(targets.items()):
+            scope = ', '.join(
+                v['Name'] if isinstance(v, dict) else str(v)
+                for values in target.values() for v in values
+            ) or 'all resources'
+            click.echo(f"  {check_id} ({service}): {scope}")
+
+@main.command(cls=BannerCommand)
+@click.option('--access-key', prompt='Enter your access key', help='Your AWS access key.')
+@click.option('--secret-key', prompt='Enter your secret key', hide_input=True, help='Your AWS secret key.')
+@click.option('--session-token', prompt='Enter your session token', hide_input=True, help='Your AWS session token.')
+@click.option('--region', prompt='Enter your region', help='AWS region to use.')
+@click.option('--output', type=click.Choice(['table', 'json'], case_sensitive=False), default='table',
+              help='Output format of the plan (table or json).')
+@click.option('--workers', type=int, default=10, show_default=True,
+              help='Worker threads the estimated scan time assumes.')
+@click.option('--call-ms', type=float, default=100, show_default=True,
+              help='Estimated latency of one API call, in milliseconds.')
+@click.option('--no-inventory', is_flag=True, default=False,
+              help='Do not count resources; assume 10 of each type per region.')
+@click.option('--no-preflight', 'no_preflight', is_flag=True, default=False,
+              help='Plan every check, including those the credentials lack permissions for.')
+def plan(access_key, secret_key, session_token, region, output, workers, call_ms, no_inventory, no_preflight):
+    """Estimate the API calls and time of a scan without running its checks."""
+    from tabulate import tabulate
+    from Core import orchestrator
+    from Core.context import ScanContext
+    from Core.planner import Planner
+    from Core.preflight import Preflight, prune
+
+    validate, response, session = orchestrator.validate_creds(access_key, secret_key, session_token, region)
+    click.echo(response)
+    scan = ScanContext()
+    enabled_services = orchestrator.discover_enabled_services(session, scan)
+    if not no_preflight:
+        scan.preflight = Preflight(session, scan).run(enabled_services)
+    units = prune(scan, orchestrator.plan_units(enabled_services, session))
+    planner = Planner(session, scan, call_ms=call_ms)
+    if not no_inventory:
+        planner.inventory(units)
+    rows = planner.rows(units)
+    summary = planner.summary(units, workers)
+    if scan.preflight is not None:
+        summary['pruned'] = scan.preflight.coverage()['pruned']
+
+    if output.lower() == 'json':
+        click.echo(json.dumps({'summary': summary, 'checks': rows}, indent=2))
+        return
+    click.echo(tabulate([list(r.values()) for r in rows], headers=list(rows[0]) if rows else [], tablefmt='simple'))
+    click.echo(f"\n{summary['units']} units, ~{summary['calls']} API calls, "
+               f"estimated {summary['est_s']}s on {workers} workers ({call_ms:g} ms per call)")
+    for check_id, actions in summary.get('pruned', {}).items():
+        click.echo(f"  not planned: {check_id} ({', '.join(actions)} denied)")
+
+@main.command()
+@click.option('--queue', 'queue_path', required=True, help='SQLite work queue file, shared by the coordinator and the workers.')
+@click.option('--region', default=None, help='AWS region of the scan (default: from the environment).')
+@click.option('--org', 'org_accounts', is_flag=True, default=False, help='Scan every active account of the organization.')
+@click.option('--accounts-file', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Scan the accounts listed in this file (one "<account id>[,<name>]" per line).')
+@click.option('--role-name', default='OrganizationAccountAccessRole', show_default=True,
+              help='Role the workers assume in each account.')
+@click.option('--external-id', default=None, help='External ID passed to AssumeRole, if the role requires one.')
+@click.option('--run-id', default=None, help='Wait for and merge an existing run instead of enqueuing a new one.')
+@click.option('--report', 'report_path', default='distributed_report.json', show_default=True,
+              help='Merged report written once every unit is done.')
+@click.option('--interval', type=int, default=5, show_default=True, help='Seconds between progress checks.')
+def coordinator(queue_path, region, org_accounts, accounts_file, role_name, external_id, run_id, report_path, interval):
+    """Split a scan into (account, service, check, region) units on the queue, then merge the workers' results.
+
+    Uses the AWS credentials of the environment (variables, profile or instance role).
+    """
+    import boto3
+    from Core import org, workqueue
+
+    queue = workqueue.WorkQueue(queue_path)
+    if run_id is None:
+        session = boto3.session.Session(region_name=region)
+        accounts = None
+        if accounts_file:
+            accounts = org.read_accounts_file(accounts_file)
+        elif org_accounts:
+            accounts = org.list_organization_accounts(session)
+        run_id = workqueue.enqueue_scan(queue, session, accounts, session.region_name, role_name, external_id)
+        click.echo(f"Run {run_id}: {sum(queue.progress(run_id).values())} units queued in {queue_path}")
+
+    def on_progress(progress):
+        click.echo(', '.join(f"{n} {state}" for state, n in sorted(progress.items())))
+
+    workqueue.wait_for_run(queue, run_id, interval, on_progress)
+    report = workqueue.merge_run(queue, run_id)
+    org.write_report(report, report_path)
+    click.echo(f"Report of run {run_id} written to {report_path}")
+
+@main.command()
+@click.option('--queue', 'queue_path', required=True, help='SQLite work queue file, shared by the coordinator and the workers.')
+@click.option('--threads', type=int, default=10, show_default=True, help='Units run in parallel by this worker.')
+@click.option('--wait', 'keep_polling', is_flag=True, default=False,
+              help='Keep polling for new units instead of exiting once the queue is empty.')
+@click.option('--model-cache', default=None, help='Directory keeping pre-parsed botocore service models.')
+def worker(queue_path, threads, keep_polling, model_cache):
+    """Claim units from the queue and run them; findings are stored back in the queue.
+
+    Uses the AWS credentials of the environment, assuming the run's role in each account.
+    """
+    from Core import workqueue
+
+    queue = workqueue.WorkQueue(queue_path)
+    unit_worker = workqueue.Worker(queue, threads=threads, model_cache=model_cache)
+    click.echo(f"Worker {unit_worker.name} polling {queue_path}")
+    unit_worker.run(
+        exit_when_empty=not keep_polling,
+        on_unit=lambda row: click.echo(f"  {row['account_id']} {row['check_id']} {row['region'] or 'global'}")
+    )
 
 if __name__ == '__main__':
     main()
@@ -2,13 +2,25 @@ import boto3
 import base64
 import json
 from botocore.exceptions import ClientError
+from Core.fingerprints import fingerprint, carried_forward, remember
+from Core.remediation import remediation
 
 
-def get_ec2_instances(session):
-    """List all EC2 instances in the account."""
-    ec2 = session.client('ec2')
+def get_ec2_instances(session, instance_ids=None, region=None):
+    """
+    List all EC2 instances in the account (or only the given instance IDs,
+    leaving out the ones that no longer exist or are terminated).
+    """
+    ec2 = session.client('ec2', region_name=region)
     try:
-        response = ec2.describe_instances()
+        if instance_ids is None:
+            response = ec2.describe_instances()
+        else:
+            # Filters rather than InstanceIds: unknown IDs are left out instead of failing the call
+            response = ec2.describe_instances(Filters=[
+                {'Name': 'instance-id', 'Values': list(instance_ids)},
+                {'Name': 'instance-state-name', 'Values': ['pending', 'running', 'stopping', 'stopped']}
+            ])
         instances = []
         for reservation in response.get('Reservations', []):
             for instance in reservation.get('Instances', []):
@@ -20,12 +32,23 @@ def get_ec2_instances(session):
         return []
 
 
-def check_cis_2_13(session):
+def user_data_fingerprint(instance):
+    """
+    User data can only be modified while an instance is stopped, and starting it
+    again sets a new LaunchTime. For running instances LaunchTime therefore
+    identifies the user data; stopped instances are always re-evaluated.
+    """
+    if instance.get('State', {}).get('Name') != 'running':
+        return None
+    return fingerprint(instance['InstanceId'], instance.get('LaunchTime'))
+
+
+def check_cis_2_13(session, instance_ids=None):
     """
     CIS 2.13: Ensure Secrets and Sensitive Data are not stored directly in EC2 User Data
     
     This check examines the user data of each EC2 instance to look for potential secrets
-    or sensitive information.
+    or sensitive information. instance_ids ({region: [IDs]}) narrows it to those instances.
     """
     findings = []
     ec2 = session.client('ec2')
@@ -38,8 +61,15 @@ def check_cis_2_13(session):
     ]
     
     try:
-        # Get all instances
-        instances = get_ec2_instances(session)
+        # Get all instances, each with the client of its region
+        instances = []
+        for region, ids in (instance_ids or {None: None}).items():
+            client = ec2 if region is None else session.client('ec2', region_name=region)
+            instances.extend((client, instance) for instance in get_ec2_instances(session, ids, region))
+        
+        # Targeted instances that are gone have nothing left to report
+        if not instances and instance_ids is not None:
+            return findings
         
         # If there are no instances, return a note
         if not instances:
@@ -54,12 +84,18 @@ def check_cis_2_13(session):
             return findings
         
         # Check each instance for user data
-        for instance in instances:
+        for client, instance in instances:
             instance_id = instance['InstanceId']
+            fp = user_data_fingerprint(instance)
+            previous = carried_forward('CIS-2.13', instance_id, fp)
+            if previous is not None:
+                findings.extend(previous)
+                continue
+            start = len(findings)
             
             try:
                 # Get user data for this instance
-                response = ec2.describe_instance_attribute(
+                response = client.describe_instance_attribute(
                     InstanceId=instance_id,
                     Attribute='userData'
                 )
@@ -76,6 +112,7 @@ def check_cis_2_13(session):
                         'evidence': 'No user data found',
                         'remediation': None
                     })
+                    remember('CIS-2.13', instance_id, fp, findings[start:])
                     continue
                 
                 # Decode base64 user data
@@ -98,11 +135,7 @@ def check_cis_2_13(session):
                             'service': 'ec2',
                             'resource': instance_id,
                             'evidence': f"User data contains potential sensitive information: {', '.join(matching_keywords)}",
-                            'remediation': (
-                                "1. Launch a new EC2 instance without sensitive data in user data\n"
-                                "2. Use AWS Secrets Manager or Parameter Store for secrets\n"
-                                "3. If scripts need secrets, let them retrieve from secure sources at runtime"
-                            )
+                            'remediation': remediation('CIS-2.13')
                         })
                     else:
                         findings.append({
@@ -113,6 +146,7 @@ def check_cis_2_13(session):
                             'evidence': 'No sensitive data detected in user data',
                             'remediation': None
                         })
+                    remember('CIS-2.13', instance_id, fp, findings[start:])
                 except Exception as e:
                     findings.append({
                         'check_id': 'CIS-2.13',
@@ -120,7 +154,7 @@ def check_cis_2_13(session):
                         'service': 'ec2',
                         'resource': instance_id,
                         'evidence': f"Unable to decode user data: {e}",
-                        'remediation': "Verify the user data encoding format"
+                        'remediation': remediation('CIS-2.13.decode')
                     })
                     
             except ClientError as e:
@@ -130,7 +164,7 @@ def check_cis_2_13(session):
                     'service': 'ec2',
                     'resource': instance_id,
                     'evidence': f"Error accessing user data: {e}",
-                    'remediation': "Ensure IAM permissions include ec2:DescribeInstanceAttribute"
+                    'remediation': remediation('CIS-2.13.attribute-error')
                 })
     
     except ClientError as e:
@@ -140,7 +174,7 @@ def check_cis_2_13(session):
             'service': 'ec2',
             'resource': 'EC2Service',
             'evidence': f"Access denied or service error: {e}",
-            'remediation': "Verify IAM permissions include ec2:DescribeInstances and ec2:DescribeInstanceAttribute"
+            'remediation': remediation('CIS-2.13.error')
         })
         
     return findings
@@ -225,11 +259,7 @@ def check_cis_2_7(session):
                     'service': 'ec2',
                     'resource': f"{vpc_id}:{sg_data['security_group_id']}",
                     'evidence': f"{len(sg_data['instances'])} instances using default security group: {', '.join(sg_data['instances'][:5])}{'...' if len(sg_data['instances']) > 5 else ''}",
-                    'remediation': (
-                        "1. Create a custom security group with required rules\n"
-                        "2. Attach the custom security group to the instances\n"
-                        "3. Remove the default security group from the instances"
-                    )
+                    'remediation': remediation('CIS-2.7')
                 })
                 
     except ClientError as e:
@@ -239,12 +269,41 @@ def check_cis_2_7(session):
             'service': 'ec2',
             'resource': 'EC2Service',
             'evidence': f"Access denied or service error: {e}",
-            'remediation': "Verify IAM permissions include ec2:DescribeVpcs, ec2:DescribeSecurityGroups, and ec2:DescribeInstances"
+            'remediation': remediation('CIS-2.7.error')
         })
     
     return findings
 
 
+# Registry read by the orchestrator (see s3_audit.CHECKS for the keys)
+CHECKS = {
+    'CIS-2.13': {
+        'function': check_cis_2_13,
+        'scope': 'global',
+        'target': 'instance_ids',
+        'events': ['RunInstances', 'ModifyInstanceAttribute'],
+        'clients': ['ec2'],
+        'actions': ['ec2:DescribeInstances', 'ec2:DescribeInstanceAttribute'],
+        'resource': 'instances',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'high'
+    },
+    'CIS-2.7': {
+        'function': check_cis_2_7,
+        'scope': 'global',
+        'target': None,
+        'events': ['RunInstances', 'ModifyInstanceAttribute', 'ModifyNetworkInterfaceAttribute', 'CreateVpc'],
+        'clients': ['ec2'],
+        'actions': ['ec2:DescribeVpcs', 'ec2:DescribeSecurityGroups', 'ec2:DescribeInstances'],
+        'resource': 'vpcs',
+        'calls': 1,
+        'calls_per_resource': 2,
+        'severity': 'medium'
+    }
+}
+
+
 def generate_report(findings):
     """Generate a report of the EC2 CIS benchmark results."""
     print("EC2 CIS Benchmark Results:")
@@ -1,5 +1,6 @@
 # efs_audit.py
 import boto3
+from Core.remediation import remediation
 
 def get_all_regions(session):
     ec2 = session.client('ec2')
@@ -15,10 +16,11 @@ def get_efs_file_systems(session, region):
         print(f"[ERROR] Could not retrieve EFS file systems in {region}: {e}")
         return []
 
-def check_cis_2_3_1(session):
+def check_cis_2_3_1(session, regions=None):
     # CIS 2.3.1: Ensure that encryption is enabled for EFS file systems
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         efs_filesystems = get_efs_file_systems(session, region)
@@ -41,15 +43,27 @@ def check_cis_2_3_1(session):
                     'status': 'FAIL',
                     'resource': f"{fs_id} ({region})",
                     'evidence': 'Encryption at rest is NOT enabled',
-                    'remediation': (
-                        "Create a new EFS file system with encryption enabled and migrate data as needed:\n"
-                        f"1. aws efs create-file-system --region {region} --performance-mode generalPurpose --encrypted\n"
-                        f"2. Use AWS DataSync or other tools to move data from {fs_id} to the new encrypted file system."
-                    )
+                    'remediation': remediation('CIS-2.3.1', region=region, fs_id=fs_id)
                 })
 
     return findings
 
+# Registry read by the orchestrator (see s3_audit.CHECKS for the keys)
+CHECKS = {
+    'CIS-2.3.1': {
+        'function': check_cis_2_3_1,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['CreateFileSystem', 'DeleteFileSystem'],
+        'clients': ['ec2', 'efs'],
+        'actions': ['elasticfilesystem:DescribeFileSystems'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    }
+}
+
 def generate_report(findings):
     print("EFS CIS Benchmark Results:")
     for finding in findings:
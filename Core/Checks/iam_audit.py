@@ -1,6 +1,60 @@
 import boto3
 from botocore.exceptions import ClientError
+from Core import context
+from Core.fingerprints import fingerprint, carried_forward, remember, enabled as incremental
+from Core.remediation import remediation
+import csv
 import datetime
+import io
+import time
+
+
+def get_credential_report(session):
+    """Return the IAM credential report as (generated_at, {username: row}); generated_at in epoch seconds."""
+    iam = session.client('iam')
+    try:
+        # Generation is asynchronous; a report younger than 4 hours is reused by AWS
+        for _ in range(10):
+            if iam.generate_credential_report()['State'] == 'COMPLETE':
+                break
+            time.sleep(1)
+        response = iam.get_credential_report()
+    except ClientError as e:
+        print(f"Error getting credential report: {e}")
+        return None, {}
+    content = response['Content'].decode('utf-8')
+    return response['GeneratedTime'].timestamp(), {row['user']: row for row in csv.DictReader(io.StringIO(content))}
+
+
+def get_iam_users(session, users=None):
+    """All IAM users, or only the named ones (used for targeted re-evaluation)."""
+    iam = session.client('iam')
+    if users is None:
+        paginator = iam.get_paginator('list_users')
+        return [user for page in paginator.paginate() for user in page['Users']]
+    found = []
+    for username in users:
+        try:
+            found.append(iam.get_user(UserName=username)['User'])
+        except iam.exceptions.NoSuchEntityException:
+            continue
+    return found
+
+
+def user_fingerprint(session, username, *extra):
+    """
+    (fingerprint, as_of) of the user's credential-report row; (None, None)
+    outside incremental scans. The report can be up to 4 hours old, so
+    carried_forward is given its generation time: changes made since an
+    evaluation only show in a report generated after it.
+    """
+    if not incremental():
+        return None, None
+    generated_at, report = context.current().cached('iam:credential-report', lambda: get_credential_report(session))
+    row = report.get(username)
+    if row is None:
+        return None, None
+    return fingerprint(row, *extra), generated_at
 
 def check_cis_1_1(session):
     # CIS 1.1: Avoid use of the root account
@@ -16,7 +70,7 @@ def check_cis_1_1(session):
                 'status':     'FAIL',
                 'resource':   'RootAccount',
                 'evidence':   'Root account has been used',
-                'remediation':'Avoid using the root account. Create IAM users instead.'
+                'remediation':remediation('CIS-1.1')
             })
         else:
             findings.append({
@@ -34,7 +88,7 @@ def check_cis_1_1(session):
             'status':     'ERROR',
             'resource':   'RootAccount',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure proper IAM permissions to access get_account_summary.'
+            'remediation':remediation('CIS-1.1.error')
         })
 
     return findings
@@ -65,10 +119,7 @@ def check_cis_1_2(session):
                 'status':     'FAIL',
                 'resource':   'RootAccount',
                 'evidence':   'MFA not enabled for root account',
-                'remediation': (
-                    "Enable MFA for the root account in the AWS console "
-                    "under IAM > Dashboard > Activate MFA on your root account."
-                )
+                'remediation': remediation('CIS-1.2')
             })
 
     except ClientError as e:
@@ -78,7 +129,7 @@ def check_cis_1_2(session):
             'status':     'ERROR',
             'resource':   'RootAccount',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure permission to access IAM get_account_summary.'
+            'remediation':remediation('CIS-1.2.error')
         })
 
     return findings
@@ -109,11 +160,7 @@ def check_cis_1_8(session):
                 'status':     'FAIL',
                 'resource':   'PasswordPolicy',
                 'evidence':   f'Minimum password length is {min_length}',
-                'remediation': (
-                    "Set the minimum password length to at least 14 characters.\n"
-                    "Console: IAM > Account Settings > Set minimum password length.\n"
-                    "CLI: aws iam update-account-password-policy --minimum-password-length 14"
-                )
+                'remediation': remediation('CIS-1.8')
             })
 
     except iam.exceptions.NoSuchEntityException:
@@ -123,10 +170,7 @@ def check_cis_1_8(session):
             'status':     'FAIL',
             'resource':   'PasswordPolicy',
             'evidence':   'No password policy found',
-            'remediation': (
-                "Create a password policy with a minimum password length of 14.\n"
-                "CLI: aws iam update-account-password-policy --minimum-password-length 14"
-            )
+            'remediation': remediation('CIS-1.8.missing')
         })
     except ClientError as e:
         findings.append({
@@ -135,7 +179,7 @@ def check_cis_1_8(session):
             'status':     'ERROR',
             'resource':   'PasswordPolicy',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure permission to access IAM get_account_password_policy.'
+            'remediation':remediation('CIS-1.8.error')
         })
 
     return findings
@@ -166,10 +210,7 @@ def check_cis_1_9(session):
                 'status':     'FAIL',
                 'resource':   'PasswordPolicy',
                 'evidence':   f'Password reuse prevention is set to {reuse_prevention}',
-                'remediation': (
-                    "Set password reuse prevention to at least 24.\n"
-                    "CLI: aws iam update-account-password-policy --password-reuse-prevention 24"
-                )
+                'remediation': remediation('CIS-1.9')
             })
 
     except iam.exceptions.NoSuchEntityException:
@@ -179,10 +220,7 @@ def check_cis_1_9(session):
             'status':     'FAIL',
             'resource':   'PasswordPolicy',
             'evidence':   'No password policy found',
-            'remediation': (
-                "Create a password policy with password reuse prevention set to at least 24.\n"
-                "CLI: aws iam update-account-password-policy --password-reuse-prevention 24"
-            )
+            'remediation': remediation('CIS-1.9.missing')
         })
     except ClientError as e:
         findings.append({
@@ -191,53 +229,55 @@ def check_cis_1_9(session):
             'status':     'ERROR',
             'resource':   'PasswordPolicy',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure permission to access IAM get_account_password_policy.'
+            'remediation':remediation('CIS-1.9.error')
         })
 
     return findings
 
 
-def check_cis_1_10(session):
+def check_cis_1_10(session, users=None):
     # CIS 1.10: Ensure MFA is enabled for all IAM users that have a console password
     findings = []
     iam = session.client('iam')
 
     try:
-        paginator = iam.get_paginator('list_users')
-        for page in paginator.paginate():
-            for user in page['Users']:
-                username = user['UserName']
-
-                # Check console access
-                try:
-                    iam.get_login_profile(UserName=username)
-                    has_console_password = True
-                except ClientError as e:
-                    has_console_password = False if e.response['Error']['Code']=='NoSuchEntity' else False
-
-                if has_console_password:
-                    mfa_devices = iam.list_mfa_devices(UserName=username)['MFADevices']
-                    if not mfa_devices:
-                        findings.append({
-                            'service':    'iam',
-                            'check_id':   'CIS-1.10',
-                            'status':     'FAIL',
-                            'resource':   username,
-                            'evidence':   f'User {username} has a console password but no MFA device enabled',
-                            'remediation': (
-                                'Enable MFA for users with console passwords. '
-                                'Go to IAM > Users > Security credentials tab > Manage MFA Device.'
-                            )
-                        })
-                    else:
-                        findings.append({
-                            'service':    'iam',
-                            'check_id':   'CIS-1.10',
-                            'status':     'PASS',
-                            'resource':   username,
-                            'evidence':   f'User {username} has MFA enabled',
-                            'remediation': None
-                        })
+        for user in get_iam_users(session, users):
+            username = user['UserName']
+            fp, as_of = user_fingerprint(session, username)
+            previous = carried_forward('CIS-1.10', username, fp, as_of)
+            if previous is not None:
+                findings.extend(previous)
+                continue
+            start = len(findings)
+
+            # Check console access
+            try:
+                iam.get_login_profile(UserName=username)
+                has_console_password = True
+            except ClientError as e:
+                has_console_password = False if e.response['Error']['Code']=='NoSuchEntity' else False
+
+            if has_console_password:
+                mfa_devices = iam.list_mfa_devices(UserName=username)['MFADevices']
+                if not mfa_devices:
+                    findings.append({
+                        'service':    'iam',
+                        'check_id':   'CIS-1.10',
+                        'status':     'FAIL',
+                        'resource':   username,
+                        'evidence':   f'User {username} has a console password but no MFA device enabled',
+                        'remediation': remediation('CIS-1.10')
+                    })
+                else:
+                    findings.append({
+                        'service':    'iam',
+                        'check_id':   'CIS-1.10',
+                        'status':     'PASS',
+                        'resource':   username,
+                        'evidence':   f'User {username} has MFA enabled',
+                        'remediation': None
+                    })
+            remember('CIS-1.10', username, fp, findings[start:])
     except ClientError as e:
         findings.append({
             'service':    'iam',
@@ -245,22 +285,28 @@ def check_cis_1_10(session):
             'status':     'ERROR',
             'resource':   'IAM Users',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure proper IAM permissions to list users, login profiles, and MFA devices.'
+            'remediation':remediation('CIS-1.10.error')
         })
 
     return findings
 
 
-def check_cis_1_12(session):
+def check_cis_1_12(session, users=None):
     # CIS 1.12: Ensure credentials unused for 45 days or more are disabled
     findings = []
     iam = session.client('iam')
     now = datetime.datetime.utcnow()
 
     try:
-        users = iam.list_users()['Users']
-        for user in users:
+        for user in get_iam_users(session, users):
             username = user['UserName']
+            # Day counts change daily, so the date is part of the fingerprint
+            fp, as_of = user_fingerprint(session, username, now.date())
+            previous = carried_forward('CIS-1.12', username, fp, as_of)
+            if previous is not None:
+                findings.extend(previous)
+                continue
+            start = len(findings)
             user_findings = []
 
             # Console password last used
@@ -274,7 +320,7 @@ def check_cis_1_12(session):
                         'status':     'FAIL',
                         'resource':   username,
                         'evidence':   f'Console password not used for {days} days',
-                        'remediation':'Disable the console password for users inactive >45 days.'
+                        'remediation':remediation('CIS-1.12.password')
                     })
 
             # Access keys
@@ -292,7 +338,7 @@ def check_cis_1_12(session):
                             'status':     'FAIL',
                             'resource':   f"{username} (AccessKey {key_id})",
                             'evidence':   f'Access key not used for {days} days',
-                            'remediation':'Deactivate or delete access keys inactive >45 days.'
+                            'remediation':remediation('CIS-1.12.key-inactive')
                         })
                 else:
                     if age_days > 45:
@@ -302,7 +348,7 @@ def check_cis_1_12(session):
                             'status':     'FAIL',
                             'resource':   f"{username} (AccessKey {key_id})",
                             'evidence':   f'Access key created {age_days} days ago and never used',
-                            'remediation':'Deactivate or delete unused access keys older than 45 days.'
+                            'remediation':remediation('CIS-1.12.key-unused')
                         })
 
             if user_findings:
@@ -316,6 +362,7 @@ def check_cis_1_12(session):
                     'evidence':   'No unused credentials found older than 45 days',
                     'remediation': None
                 })
+            remember('CIS-1.12', username, fp, findings[start:])
 
     except ClientError as e:
         findings.append({
@@ -324,21 +371,26 @@ def check_cis_1_12(session):
             'status':     'ERROR',
             'resource':   'IAM Users',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure proper IAM permissions to list users and access keys.'
+            'remediation':remediation('CIS-1.12.error')
         })
 
     return findings
 
 
-def check_cis_1_13(session):
+def check_cis_1_13(session, users=None):
     # CIS 1.13: Ensure there is only one active access key per IAM user
     findings = []
     iam = session.client('iam')
 
     try:
-        users = iam.list_users()['Users']
-        for user in users:
+        for user in get_iam_users(session, users):
             username = user['UserName']
+            fp, as_of = user_fingerprint(session, username)
+            previous = carried_forward('CIS-1.13', username, fp, as_of)
+            if previous is not None:
+                findings.extend(previous)
+                continue
+            start = len(findings)
             active_keys = [k for k in iam.list_access_keys(UserName=username)['AccessKeyMetadata'] if k['Status']=='Active']
 
             if len(active_keys) > 1:
@@ -348,7 +400,7 @@ def check_cis_1_13(session):
                     'status':     'FAIL',
                     'resource':   username,
                     'evidence':   f'User has {len(active_keys)} active access keys.',
-                    'remediation':'Ensure only one active access key per user.'
+                    'remediation':remediation('CIS-1.13.multiple')
                 })
             elif len(active_keys) == 0:
                 findings.append({
@@ -357,7 +409,7 @@ def check_cis_1_13(session):
                     'status':     'FAIL',
                     'resource':   username,
                     'evidence':   'User has no active access keys.',
-                    'remediation':'Ensure each user has at least one active access key.'
+                    'remediation':remediation('CIS-1.13.none')
                 })
             else:
                 findings.append({
@@ -368,6 +420,7 @@ def check_cis_1_13(session):
                     'evidence':   'User has only one active access key.',
                     'remediation': None
                 })
+            remember('CIS-1.13', username, fp, findings[start:])
 
     except ClientError as e:
         findings.append({
@@ -376,22 +429,27 @@ def check_cis_1_13(session):
             'status':     'ERROR',
             'resource':   'IAM Users',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure proper IAM permissions to list users and access keys.'
+            'remediation':remediation('CIS-1.13.error')
         })
 
     return findings
 
 
-def check_cis_1_14(session):
+def check_cis_1_14(session, users=None):
     # CIS 1.14: Ensure access keys are rotated every 90 days or less
     findings = []
     iam = session.client('iam')
     now = datetime.datetime.utcnow()
 
     try:
-        users = iam.list_users()['Users']
-        for user in users:
+        for user in get_iam_users(session, users):
             username = user['UserName']
+            fp, as_of = user_fingerprint(session, username, now.date())
+            previous = carried_forward('CIS-1.14', username, fp, as_of)
+            if previous is not None:
+                findings.extend(previous)
+                continue
+            start = len(findings)
             rotated = True
 
             for key in iam.list_access_keys(UserName=username)['AccessKeyMetadata']:
@@ -403,7 +461,7 @@ def check_cis_1_14(session):
                         'status':     'FAIL',
                         'resource':   f"{username} (AccessKey {key['AccessKeyId']})",
                         'evidence':   f'Access key {key["AccessKeyId"]} is {age} days old.',
-                        'remediation':'Rotate keys older than 90 days by creating new and deactivating old.'
+                        'remediation':remediation('CIS-1.14')
                     })
                     rotated = False
 
@@ -416,6 +474,7 @@ def check_cis_1_14(session):
                     'evidence':   'All access keys are within the 90-day rotation period.',
                     'remediation': None
                 })
+            remember('CIS-1.14', username, fp, findings[start:])
 
     except ClientError as e:
         findings.append({
@@ -424,12 +483,115 @@ def check_cis_1_14(session):
             'status':     'ERROR',
             'resource':   'IAM Users',
             'evidence':   f"Access denied or other error: {e}",
-            'remediation':'Ensure proper IAM permissions to list users and access keys.'
+            'remediation':remediation('CIS-1.14.error')
         })
 
     return findings
 
 
+USER_KEY_EVENTS = ['CreateUser', 'CreateAccessKey', 'UpdateAccessKey', 'DeleteAccessKey']
+
+# Registry read by the orchestrator (see s3_audit.CHECKS for the keys)
+CHECKS = {
+    'CIS-1.1': {
+        'function': check_cis_1_1,
+        'scope': 'global',
+        'target': None,
+        'events': [],
+        'clients': ['iam'],
+        'actions': ['iam:GetAccountSummary'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'high'
+    },
+    'CIS-1.2': {
+        'function': check_cis_1_2,
+        'scope': 'global',
+        'target': None,
+        'events': ['EnableMFADevice', 'DeactivateMFADevice'],
+        'clients': ['iam'],
+        'actions': ['iam:GetAccountSummary'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'critical'
+    },
+    'CIS-1.8': {
+        'function': check_cis_1_8,
+        'scope': 'global',
+        'target': None,
+        'events': ['UpdateAccountPasswordPolicy', 'DeleteAccountPasswordPolicy'],
+        'clients': ['iam'],
+        'actions': ['iam:GetAccountPasswordPolicy'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    },
+    'CIS-1.9': {
+        'function': check_cis_1_9,
+        'scope': 'global',
+        'target': None,
+        'events': ['UpdateAccountPasswordPolicy', 'DeleteAccountPasswordPolicy'],
+        'clients': ['iam'],
+        'actions': ['iam:GetAccountPasswordPolicy'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    },
+    'CIS-1.10': {
+        'function': check_cis_1_10,
+        'scope': 'global',
+        'target': 'users',
+        'events': ['CreateLoginProfile', 'DeleteLoginProfile', 'EnableMFADevice', 'DeactivateMFADevice'],
+        'clients': ['iam'],
+        'actions': ['iam:ListUsers', 'iam:GetLoginProfile', 'iam:ListMFADevices'],
+        'resource': 'users',
+        'calls': 1,
+        'calls_per_resource': 2,
+        'severity': 'high'
+    },
+    'CIS-1.12': {
+        'function': check_cis_1_12,
+        'scope': 'global',
+        'target': 'users',
+        'events': USER_KEY_EVENTS + ['CreateLoginProfile', 'DeleteLoginProfile'],
+        'clients': ['iam'],
+        'actions': ['iam:ListUsers', 'iam:ListAccessKeys', 'iam:GetAccessKeyLastUsed'],
+        'resource': 'users',
+        'calls': 1,
+        'calls_per_resource': 2,
+        'severity': 'high'
+    },
+    'CIS-1.13': {
+        'function': check_cis_1_13,
+        'scope': 'global',
+        'target': 'users',
+        'events': USER_KEY_EVENTS,
+        'clients': ['iam'],
+        'actions': ['iam:ListUsers', 'iam:ListAccessKeys'],
+        'resource': 'users',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'medium'
+    },
+    'CIS-1.14': {
+        'function': check_cis_1_14,
+        'scope': 'global',
+        'target': 'users',
+        'events': USER_KEY_EVENTS,
+        'clients': ['iam'],
+        'actions': ['iam:ListUsers', 'iam:ListAccessKeys'],
+        'resource': 'users',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'medium'
+    }
+}
+
+
 def generate_report(findings):
     print("IAM CIS Benchmark Results:")
     for f in findings:
@@ -1,15 +1,16 @@
 import boto3
+from Core.remediation import remediation
 
 def get_all_regions(session):
     ec2 = session.client('ec2')
     regions_info = ec2.describe_regions(AllRegions=True)
     return [region['RegionName'] for region in regions_info['Regions'] if region['OptInStatus'] in ['opt-in-not-required', 'opted-in']]
 
-def check_cis_3_1(session):
+def check_cis_3_1(session, regions=None):
     # CIS 3.1: Ensure CloudTrail is enabled in all regions
     findings = []
-    regions = get_all_regions(session)
-    checked_trails = set()
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         client = session.client('cloudtrail', region_name=region)
@@ -23,18 +24,15 @@ def check_cis_3_1(session):
                     'status': 'FAIL',
                     'resource': f"{region}",
                     'evidence': 'No CloudTrail trails configured in this region',
-                    'remediation': (
-                        "Create a multi-region trail:\n"
-                        f"aws cloudtrail create-trail --name <trail-name> --bucket-name <s3-bucket> --is-multi-region-trail"
-                    )
+                    'remediation': remediation('CIS-3.1.no-trail')
                 })
                 continue
 
             for trail in trails:
                 name = trail.get('Name')
-                if name in checked_trails:
-                    continue  # Skip already checked multi-region trail
-                checked_trails.add(name)
+                # Multi-region trails are listed in every region; evaluate them once, in their home region
+                if trail.get('HomeRegion', region) != region:
+                    continue
 
                 is_multi_region = trail.get('IsMultiRegionTrail', False)
 
@@ -63,17 +61,11 @@ def check_cis_3_1(session):
                 else:
                     remediation_steps = []
                     if not is_multi_region:
-                        remediation_steps.append(
-                            f"aws cloudtrail update-trail --name {name} --is-multi-region-trail"
-                        )
+                        remediation_steps.append(remediation('CIS-3.1.multi-region', trail=name))
                     if not is_logging:
-                        remediation_steps.append(
-                            f"aws cloudtrail start-logging --name {name}"
-                        )
+                        remediation_steps.append(remediation('CIS-3.1.logging', trail=name))
                     if not management_only:
-                        remediation_steps.append(
-                            f"Update trail {name} to log only Management events using AdvancedEventSelectors"
-                        )
+                        remediation_steps.append(remediation('CIS-3.1.management', trail=name))
                     findings.append({
                         'check_id': 'CIS-3.1',
                         'status': 'FAIL',
@@ -83,7 +75,7 @@ def check_cis_3_1(session):
                             f"IsLogging: {is_logging}, "
                             f"ManagementOnly: {management_only}"
                         ),
-                        'remediation': "\n".join(remediation_steps)
+                        'remediation': remediation_steps
                     })
 
         except Exception as e:
@@ -92,16 +84,16 @@ def check_cis_3_1(session):
                 'status': 'ERROR',
                 'resource': region,
                 'evidence': str(e),
-                'remediation': 'Ensure CloudTrail is accessible and permissions are correctly set'
+                'remediation': remediation('CIS-3.1.error')
             })
 
     return findings
 
-def check_cis_3_2(session):
+def check_cis_3_2(session, regions=None):
     # CIS 3.2: Ensure CloudTrail log file validation is enabled
     findings = []
-    regions = get_all_regions(session)
-    checked_trails = set()
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         client = session.client('cloudtrail', region_name=region)
@@ -114,9 +106,8 @@ def check_cis_3_2(session):
 
             for trail in trails:
                 name = trail.get('Name')
-                if name in checked_trails:
-                    continue  # Already checked this trail
-                checked_trails.add(name)
+                if trail.get('HomeRegion', region) != region:
+                    continue  # Evaluated in the trail's home region
 
                 log_validation_enabled = trail.get('LogFileValidationEnabled', False)
 
@@ -134,10 +125,7 @@ def check_cis_3_2(session):
                         'status': 'FAIL',
                         'resource': f"{name} ({region})",
                         'evidence': 'Log file validation is NOT enabled',
-                        'remediation': (
-                            f"Enable log file validation:\n"
-                            f"aws cloudtrail update-trail --name {name} --enable-log-file-validation"
-                        )
+                        'remediation': remediation('CIS-3.2', trail=name)
                     })
 
         except Exception as e:
@@ -146,15 +134,16 @@ def check_cis_3_2(session):
                 'status': 'ERROR',
                 'resource': region,
                 'evidence': str(e),
-                'remediation': 'Check CloudTrail access and permissions'
+                'remediation': remediation('CIS-3.2.error')
             })
 
     return findings
 
-def check_cis_3_3(session):
+def check_cis_3_3(session, regions=None):
     # CIS 3.3: Ensure AWS Config is enabled in all regions
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         client = session.client('config', region_name=region)
@@ -170,17 +159,7 @@ def check_cis_3_3(session):
                     'status': 'FAIL',
                     'resource': f"AWS Config ({region})",
                     'evidence': 'AWS Config is not fully configured (missing recorder, status, or delivery channel)',
-                    'remediation': (
-                        "1. Ensure you have created a suitable IAM role, S3 bucket, and SNS topic.\n"
-                        "2. Run the following:\n"
-                        "aws configservice put-configuration-recorder --configuration-recorder "
-                        "--name <config-recorder-name> --roleARN arn:aws:iam::<account-id>:role/<iam-role> "
-                        "--recording-group allSupported=true,includeGlobalResourceTypes=true\n"
-                        "3. Create a delivery channel JSON file and run:\n"
-                        "aws configservice put-delivery-channel --delivery-channel file://<delivery-channel-file>.json\n"
-                        "4. Start the recorder:\n"
-                        "aws configservice start-configuration-recorder --configuration-recorder-name <config-recorder-name>"
-                    )
+                    'remediation': remediation('CIS-3.3.not-configured')
                 })
                 continue
 
@@ -201,10 +180,7 @@ def check_cis_3_3(session):
                     'status': 'FAIL',
                     'resource': f"AWS Config ({region})",
                     'evidence': 'Configuration recorder exists but is not recording',
-                    'remediation': (
-                        "Start the recorder using:\n"
-                        "aws configservice start-configuration-recorder --configuration-recorder-name <config-recorder-name>"
-                    )
+                    'remediation': remediation('CIS-3.3.not-recording')
                 })
         except Exception as e:
             findings.append({
@@ -212,15 +188,16 @@ def check_cis_3_3(session):
                 'status': 'FAIL',
                 'resource': f"AWS Config ({region})",
                 'evidence': f'Error checking AWS Config: {e}',
-                'remediation': 'Verify AWS Config is available and properly set up in this region.'
+                'remediation': remediation('CIS-3.3.error')
             })
 
     return findings
 
-def check_cis_3_4(session):
+def check_cis_3_4(session, regions=None):
     # CIS 3.4: Ensure that server access logging is enabled on the CloudTrail S3 bucket
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         try:
@@ -236,11 +213,7 @@ def check_cis_3_4(session):
                         'status': 'FAIL',
                         'resource': f"CloudTrail (Region: {region})",
                         'evidence': 'No S3 bucket associated with this trail',
-                        'remediation': (
-                            "Ensure CloudTrail is configured with an S3 bucket.\n"
-                            "You can find the bucket using:\n"
-                            "aws cloudtrail describe-trails --region <region-name> --query trailList[*].S3BucketName"
-                        )
+                        'remediation': remediation('CIS-3.4.no-bucket')
                     })
                     continue
 
@@ -260,26 +233,7 @@ def check_cis_3_4(session):
                         'status': 'FAIL',
                         'resource': f"S3 Bucket: {bucket_name} (Region: {region})",
                         'evidence': 'Server access logging is not enabled',
-                        'remediation': (
-                            "1. Create a JSON file with the following content:\n"
-                            '{\n'
-                            '  "LoggingEnabled": {\n'
-                            '    "TargetBucket": "<target-bucket>",\n'
-                            '    "TargetPrefix": "<log-prefix>",\n'
-                            '    "TargetGrants": [\n'
-                            '      {\n'
-                            '        "Grantee": {\n'
-                            '          "Type": "AmazonCustomerByEmail",\n'
-                            '          "EmailAddress": "<email>"\n'
-                            '        },\n'
-                            '        "Permission": "FULL_CONTROL"\n'
-                            '      }\n'
-                            '    ]\n'
-                            '  }\n'
-                            '}\n'
-                            "2. Run:\n"
-                            "aws s3api put-bucket-logging --bucket <bucket-name> --bucket-logging-status file://<filename>.json"
-                        )
+                        'remediation': remediation('CIS-3.4')
                     })
         except Exception as e:
             findings.append({
@@ -287,15 +241,16 @@ def check_cis_3_4(session):
                 'status': 'FAIL',
                 'resource': f"CloudTrail (Region: {region})",
                 'evidence': f"Error checking server access logging: {str(e)}",
-                'remediation': 'Verify CloudTrail and S3 permissions and configuration in this region.'
+                'remediation': remediation('CIS-3.4.error')
             })
 
     return findings
 
-def check_cis_3_5(session):
+def check_cis_3_5(session, regions=None):
     # CIS 3.5: Ensure CloudTrail logs are encrypted at rest using KMS CMKs
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         try:
@@ -320,13 +275,7 @@ def check_cis_3_5(session):
                         'status': 'FAIL',
                         'resource': f"CloudTrail: {trail_name} (Region: {region})",
                         'evidence': 'Trail is not encrypted with a KMS Customer Master Key (CMK)',
-                        'remediation': (
-                            "1. Choose or create a KMS CMK.\n"
-                            "2. Run the following command to enable KMS encryption on the trail:\n"
-                            "aws cloudtrail update-trail --name <trail-name> --kms-id <kms-key-id>\n"
-                            "3. Optionally, attach a key policy to the KMS key if required:\n"
-                            "aws kms put-key-policy --key-id <kms-key-id> --policy <policy-document>"
-                        )
+                        'remediation': remediation('CIS-3.5')
                     })
         except Exception as e:
             findings.append({
@@ -334,17 +283,16 @@ def check_cis_3_5(session):
                 'status': 'FAIL',
                 'resource': f"CloudTrail (Region: {region})",
                 'evidence': f"Error checking KMS encryption: {str(e)}",
-                'remediation': (
-                    "Ensure CloudTrail is available and that you have the necessary IAM permissions to describe trails."
-                )
+                'remediation': remediation('CIS-3.5.error')
             })
 
     return findings
 
-def check_cis_3_6(session):
+def check_cis_3_6(session, regions=None):
     # CIS 3.6: Ensure rotation for customer-created symmetric CMKs is enabled
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         try:
@@ -375,10 +323,7 @@ def check_cis_3_6(session):
                             'status': 'FAIL',
                             'resource': f"KMS Key ID: {key_id} (Region: {region})",
                             'evidence': 'Key rotation is not enabled',
-                            'remediation': (
-                                "Enable key rotation for this customer-managed symmetric KMS key using:\n"
-                                "aws kms enable-key-rotation --key-id <kms-key-id>"
-                            )
+                            'remediation': remediation('CIS-3.6')
                         })
         except Exception as e:
             findings.append({
@@ -386,15 +331,16 @@ def check_cis_3_6(session):
                 'status': 'FAIL',
                 'resource': f"KMS (Region: {region})",
                 'evidence': f"Error checking key rotation: {str(e)}",
-                'remediation': 'Verify KMS permissions and configuration in this region.'
+                'remediation': remediation('CIS-3.6.error')
             })
 
     return findings
 
-def check_cis_3_7(session):
+def check_cis_3_7(session, regions=None):
     # CIS 3.7: Ensure VPC flow logging is enabled in all VPCs
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         try:
@@ -423,15 +369,7 @@ def check_cis_3_7(session):
                         'status': 'FAIL',
                         'resource': f"VPC ID: {vpc_id} (Region: {region})",
                         'evidence': 'No VPC flow log with traffic type REJECT',
-                        'remediation': (
-                            "Enable VPC flow logging for REJECT traffic:\n"
-                            "1. Create IAM role and policy (see CIS 3.7 remediation steps).\n"
-                            "2. Run:\n"
-                            "aws ec2 create-flow-logs --resource-type VPC "
-                            "--resource-ids <vpc-id> --traffic-type REJECT "
-                            "--log-group-name <log-group-name> "
-                            "--deliver-logs-permission-arn <iam-role-arn>"
-                        )
+                        'remediation': remediation('CIS-3.7')
                     })
         except Exception as e:
             findings.append({
@@ -439,15 +377,16 @@ def check_cis_3_7(session):
                 'status': 'FAIL',
                 'resource': f"VPCs (Region: {region})",
                 'evidence': f"Error checking VPC flow logs: {str(e)}",
-                'remediation': 'Verify EC2 permissions and VPC configuration in this region.'
+                'remediation': remediation('CIS-3.7.error')
             })
 
     return findings
 
-def check_cis_3_8(session):
+def check_cis_3_8(session, regions=None):
     # CIS 3.8: Ensure object-level logging for write events is enabled for S3 buckets
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         try:
@@ -467,7 +406,7 @@ def check_cis_3_8(session):
                     'status': 'FAIL',
                     'resource': f'All buckets in {region}',
                     'evidence': 'No CloudTrail trail found in region.',
-                    'remediation': 'Create a CloudTrail trail in the region and enable object-level logging.'
+                    'remediation': remediation('CIS-3.8.no-trail')
                 })
                 continue
 
@@ -504,13 +443,7 @@ def check_cis_3_8(session):
                         'status': 'FAIL',
                         'resource': f"S3 Bucket: {bucket_name} (Region: {region})",
                         'evidence': 'Object-level write events are not logged',
-                        'remediation': (
-                            "Enable object-level write logging in CloudTrail:\n"
-                            "aws cloudtrail put-event-selectors --region <region> --trail-name <trail-name> "
-                            "--event-selectors '[{\"ReadWriteType\": \"WriteOnly\", "
-                            "\"IncludeManagementEvents\": true, \"DataResources\": [{\"Type\": \"AWS::S3::Object\", "
-                            "\"Values\": [\"arn:aws:s3:::<bucket-name>/\"]}]}]'"
-                        )
+                        'remediation': remediation('CIS-3.8')
                     })
 
         except Exception as e:
@@ -519,15 +452,16 @@ def check_cis_3_8(session):
                 'status': 'FAIL',
                 'resource': f"S3 Buckets in {region}",
                 'evidence': f"Error checking CloudTrail settings: {str(e)}",
-                'remediation': 'Verify CloudTrail permissions and region availability.'
+                'remediation': remediation('CIS-3.8.error')
             })
 
     return findings
 
-def check_cis_3_9(session):
+def check_cis_3_9(session, regions=None):
     # CIS 3.9: Ensure object-level logging for read events is enabled for S3 buckets
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         try:
@@ -547,7 +481,7 @@ def check_cis_3_9(session):
                     'status': 'FAIL',
                     'resource': f'All buckets in {region}',
                     'evidence': 'No CloudTrail trail found in region.',
-                    'remediation': 'Create a CloudTrail trail in the region and enable object-level logging for read events.'
+                    'remediation': remediation('CIS-3.9.no-trail')
                 })
                 continue
 
@@ -584,13 +518,7 @@ def check_cis_3_9(session):
                         'status': 'FAIL',
                         'resource': f"S3 Bucket: {bucket_name} (Region: {region})",
                         'evidence': 'Object-level read events are not logged',
-                        'remediation': (
-                            "Enable object-level read logging in CloudTrail:\n"
-                            "aws cloudtrail put-event-selectors --region <region> --trail-name <trail-name> "
-                            "--event-selectors '[{\"ReadWriteType\": \"ReadOnly\", "
-                            "\"IncludeManagementEvents\": true, \"DataResources\": [{\"Type\": \"AWS::S3::Object\", "
-                            "\"Values\": [\"arn:aws:s3:::<bucket-name>/\"]}]}]'"
-                        )
+                        'remediation': remediation('CIS-3.9')
                     })
 
         except Exception as e:
@@ -599,11 +527,127 @@ def check_cis_3_9(session):
                 'status': 'FAIL',
                 'resource': f"S3 Buckets in {region}",
                 'evidence': f"Error checking CloudTrail settings: {str(e)}",
-                'remediation': 'Verify CloudTrail permissions and region availability.'
+                'remediation': remediation('CIS-3.9.error')
             })
 
     return findings
 
+TRAIL_EVENTS = ['CreateTrail', 'UpdateTrail', 'DeleteTrail']
+
+# Registry read by the orchestrator (see s3_audit.CHECKS for the keys)
+CHECKS = {
+    'CIS-3.1': {
+        'function': check_cis_3_1,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': TRAIL_EVENTS + ['StartLogging', 'StopLogging', 'PutEventSelectors'],
+        'clients': ['cloudtrail', 'ec2'],
+        'actions': ['cloudtrail:DescribeTrails', 'cloudtrail:GetTrailStatus', 'cloudtrail:GetEventSelectors'],
+        'resource': 'trails',
+        'calls': 1,
+        'calls_per_resource': 2,
+        'severity': 'high'
+    },
+    'CIS-3.2': {
+        'function': check_cis_3_2,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': TRAIL_EVENTS,
+        'clients': ['cloudtrail', 'ec2'],
+        'actions': ['cloudtrail:DescribeTrails'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    },
+    'CIS-3.3': {
+        'function': check_cis_3_3,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['PutConfigurationRecorder', 'DeleteConfigurationRecorder', 'StartConfigurationRecorder',
+                   'StopConfigurationRecorder', 'PutDeliveryChannel', 'DeleteDeliveryChannel'],
+        'clients': ['config', 'ec2'],
+        'actions': ['config:DescribeConfigurationRecorders', 'config:DescribeConfigurationRecorderStatus',
+                    'config:DescribeDeliveryChannels'],
+        'resource': None,
+        'calls': 3,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    },
+    'CIS-3.4': {
+        'function': check_cis_3_4,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': TRAIL_EVENTS + ['PutBucketLogging'],
+        'clients': ['cloudtrail', 'ec2', 's3'],
+        'actions': ['cloudtrail:DescribeTrails', 's3:GetBucketLogging'],
+        'resource': 'trails',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'low'
+    },
+    'CIS-3.5': {
+        'function': check_cis_3_5,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': TRAIL_EVENTS,
+        'clients': ['cloudtrail', 'ec2'],
+        'actions': ['cloudtrail:DescribeTrails'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    },
+    'CIS-3.6': {
+        'function': check_cis_3_6,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['CreateKey', 'EnableKeyRotation', 'DisableKeyRotation'],
+        'clients': ['ec2', 'kms'],
+        'actions': ['kms:ListKeys', 'kms:DescribeKey', 'kms:GetKeyRotationStatus'],
+        'resource': 'keys',
+        'calls': 1,
+        'calls_per_resource': 2,
+        'severity': 'medium'
+    },
+    'CIS-3.7': {
+        'function': check_cis_3_7,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['CreateVpc', 'CreateFlowLogs', 'DeleteFlowLogs'],
+        'clients': ['ec2', 'logs'],
+        'actions': ['ec2:DescribeVpcs', 'ec2:DescribeFlowLogs'],
+        'resource': 'vpcs',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'medium'
+    },
+    'CIS-3.8': {
+        'function': check_cis_3_8,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': TRAIL_EVENTS + ['PutEventSelectors', 'CreateBucket'],
+        'clients': ['cloudtrail', 'ec2', 's3'],
+        'actions': ['s3:ListAllMyBuckets', 'cloudtrail:DescribeTrails', 'cloudtrail:GetEventSelectors'],
+        'resource': 'trails',
+        'calls': 2,
+        'calls_per_resource': 1,
+        'severity': 'low'
+    },
+    'CIS-3.9': {
+        'function': check_cis_3_9,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': TRAIL_EVENTS + ['PutEventSelectors', 'CreateBucket'],
+        'clients': ['cloudtrail', 'ec2', 's3'],
+        'actions': ['s3:ListAllMyBuckets', 'cloudtrail:DescribeTrails', 'cloudtrail:GetEventSelectors'],
+        'resource': 'trails',
+        'calls': 2,
+        'calls_per_resource': 1,
+        'severity': 'low'
+    }
+}
+
 def generate_report(findings):
     print("CloudTrail CIS Benchmark Results:")
     for finding in findings:
@@ -622,3 +666,4 @@ def run_audit(session):
     all_findings.extend(check_cis_3_8(session))
     all_findings.extend(check_cis_3_9(session))
     generate_report(all_findings)
+    return all_findings
@@ -1,5 +1,6 @@
 import boto3
 from botocore.exceptions import ClientError
+from Core.remediation import remediation
 
 def check_cis_4_1(session):
     # CIS 4.1: Ensure unauthorized API calls are monitored
@@ -41,14 +42,7 @@ def check_cis_4_1(session):
                 'status':    'FAIL',
                 'resource':  'CloudWatch Logs',
                 'evidence':  'No metric filter found for unauthorized API calls',
-                'remediation': (
-                    "Create a metric filter in CloudWatch Logs:\n"
-                    "aws logs put-metric-filter --log-group-name <log-group-name> "
-                    "--filter-name 'UnauthorizedAPICalls' "
-                    "--metric-transformations "
-                    "metricName='UnauthorizedAPICalls',metricNamespace='CISBenchmark',metricValue='1' "
-                    "--filter-pattern '{ ($.errorCode = \"*UnauthorizedOperation\") || ($.errorCode = \"AccessDenied*\") }'"
-                )
+                'remediation': remediation('CIS-4.1')
             })
 
     except ClientError as e:
@@ -58,11 +52,27 @@ def check_cis_4_1(session):
             'status':    'ERROR',
             'resource':  'CloudWatch Logs',
             'evidence':  f"Error accessing CloudWatch Logs: {e}",
-            'remediation': "Add logs:DescribeMetricFilters permission"
+            'remediation': remediation('CIS-4.1.error')
         })
 
     return findings
 
+# Registry read by the orchestrator (see s3_audit.CHECKS for the keys)
+CHECKS = {
+    'CIS-4.1': {
+        'function': check_cis_4_1,
+        'scope': 'global',
+        'target': None,
+        'events': ['PutMetricFilter', 'DeleteMetricFilter'],
+        'clients': ['logs'],
+        'actions': ['logs:DescribeMetricFilters'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    }
+}
+
 def generate_report(findings):
     print("Monitoring CIS Benchmark Results:")
     for finding in findings:
@@ -1,5 +1,6 @@
 import boto3
 from botocore.exceptions import ClientError
+from Core.remediation import remediation
 
 def get_all_regions(session):
     ec2 = session.client('ec2')
@@ -19,9 +20,10 @@ def get_rds_instances(session, region):
         print(f"Error listing RDS instances in {region}: {e}")
         return []
 
-def check_cis_2_2_1(session):
+def check_cis_2_2_1(session, regions=None):
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         db_instances = get_rds_instances(session, region)
@@ -43,23 +45,16 @@ def check_cis_2_2_1(session):
                     'status': 'FAIL',
                     'resource': f"{db_id} ({region})",
                     'evidence': 'Storage encryption is NOT enabled',
-                    'remediation': (
-                        "Create a snapshot of the unencrypted RDS instance and restore it with encryption:\n"
-                        "1. aws rds create-db-snapshot --region {region} --db-snapshot-identifier {db_id}-snapshot --db-instance-identifier {db_id}\n"
-                        "2. aws kms list-aliases --region {region}  # Find KMS key\n"
-                        "3. aws rds copy-db-snapshot --region {region} --source-db-snapshot-identifier {db_id}-snapshot "
-                        "--target-db-snapshot-identifier {db_id}-snapshot-encrypted --kms-key-id <kms-key-id>\n"
-                        "4. aws rds restore-db-instance-from-db-snapshot --region {region} "
-                        "--db-instance-identifier {db_id}-encrypted --db-snapshot-identifier {db_id}-snapshot-encrypted\n"
-                    ).format(db_id=db_id, region=region),
+                    'remediation': remediation('CIS-2.2.1', region=region, db_id=db_id),
                     'service': 'rds'
                 })
 
     return findings
 
-def check_cis_2_2_2(session):
+def check_cis_2_2_2(session, regions=None):
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         db_instances = get_rds_instances(session, region)
@@ -82,12 +77,7 @@ def check_cis_2_2_2(session):
                         'status': 'FAIL',
                         'resource': f"{instance_id} ({region})",
                         'evidence': 'Auto Minor Version Upgrade is disabled',
-                        'remediation': (
-                            "Enable Auto Minor Version Upgrade using the AWS Console or CLI:\n"
-                            "CLI example:\n"
-                            "aws rds modify-db-instance --region {region} --db-instance-identifier {instance} "
-                            "--auto-minor-version-upgrade --apply-immediately"
-                        ).format(instance=instance_id, region=region),
+                        'remediation': remediation('CIS-2.2.2', region=region, db_id=instance_id),
                         'service': 'rds'
                     })
             except ClientError as e:
@@ -96,15 +86,16 @@ def check_cis_2_2_2(session):
                     'status': 'ERROR',
                     'resource': f"{instance_id} ({region})",
                     'evidence': f"Access denied or error: {e}",
-                    'remediation': "Ensure the IAM role has rds:DescribeDBInstances permission",
+                    'remediation': remediation('CIS-2.2.2.error'),
                     'service': 'rds'
                 })
 
     return findings
 
-def check_cis_2_2_3(session):
+def check_cis_2_2_3(session, regions=None):
     findings = []
-    regions = get_all_regions(session)
+    if regions is None:
+        regions = get_all_regions(session)
 
     for region in regions:
         db_instances = get_rds_instances(session, region)
@@ -118,14 +109,7 @@ def check_cis_2_2_3(session):
                     'status': 'FAIL',
                     'resource': f"{db_id} ({region})",
                     'evidence': 'RDS instance is publicly accessible',
-                    'remediation': (
-                        "Disable public access for the RDS instance:\n"
-                        f"1. aws rds modify-db-instance --region {region} "
-                        f"--db-instance-identifier {db_id} --no-publicly-accessible --apply-immediately\n\n"
-                        "If the RDS instance is in a public subnet, consider modifying its subnet configuration and route table:\n"
-                        "- Ensure no route in the subnet's route table allows 0.0.0.0/0 via an Internet Gateway (igw-xxxxxxxx).\n"
-                        "- Move the instance to private subnets if needed."
-                    ),
+                    'remediation': remediation('CIS-2.2.3', region=region, db_id=db_id),
                     'service': 'rds'
                 })
             else:
@@ -140,6 +124,46 @@ def check_cis_2_2_3(session):
 
     return findings
 
+# Registry read by the orchestrator (see s3_audit.CHECKS for the keys)
+CHECKS = {
+    'CIS-2.2.1': {
+        'function': check_cis_2_2_1,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['CreateDBInstance', 'RestoreDBInstanceFromDBSnapshot', 'DeleteDBInstance'],
+        'clients': ['ec2', 'rds'],
+        'actions': ['rds:DescribeDBInstances'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'medium'
+    },
+    'CIS-2.2.2': {
+        'function': check_cis_2_2_2,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['CreateDBInstance', 'ModifyDBInstance', 'DeleteDBInstance'],
+        'clients': ['ec2', 'rds'],
+        'actions': ['rds:DescribeDBInstances'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'low'
+    },
+    'CIS-2.2.3': {
+        'function': check_cis_2_2_3,
+        'scope': 'regional',
+        'target': 'regions',
+        'events': ['CreateDBInstance', 'ModifyDBInstance', 'DeleteDBInstance'],
+        'clients': ['ec2', 'rds'],
+        'actions': ['rds:DescribeDBInstances'],
+        'resource': None,
+        'calls': 1,
+        'calls_per_resource': 0,
+        'severity': 'critical'
+    }
+}
+
 def generate_report(findings):
     print("RDS CIS Benchmark Results:")
     for finding in findings:
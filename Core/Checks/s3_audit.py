@@ -1,7 +1,9 @@
+import asyncio
 import boto3
 import json
 from botocore.exceptions import ClientError
 from collections import defaultdict
+from Core.remediation import remediation
 
 SERVICE_NAME = 's3'
 
@@ -16,176 +18,208 @@ def get_s3_buckets(session):
         return []
 
 
-def check_cis_2_1_1(session, buckets):
-    # CIS 2.1.1: Ensure S3 buckets have encryption enabled
+async def get_s3_buckets_async(clients):
+    # Same as get_s3_buckets, on an async client (Core.aio engine)
+    s3 = await clients.get(SERVICE_NAME)
+    try:
+        response = await s3.list_buckets()
+        return response.get('Buckets', [])
+    except ClientError as e:
+        print(f"Error listing buckets: {e}")
+        return []
+
+
+# Each check fetches one configuration per bucket and turns the response (or
+# the ClientError) into a finding. The evaluation is shared by the threaded
+# and the asyncio variants so that both engines report identical findings.
+
+def bucket_findings(buckets, call, evaluate):
     findings = []
-    s3 = session.client(SERVICE_NAME)
-    
     for bucket in buckets:
         bucket_name = bucket['Name']
         try:
-            s3.get_bucket_encryption(Bucket=bucket_name)
-            findings.append({
+            findings.append(evaluate(bucket_name, call(Bucket=bucket_name)))
+        except ClientError as e:
+            findings.append(evaluate(bucket_name, error=e))
+    return findings
+
+
+async def bucket_findings_async(buckets, call, evaluate):
+    async def one(bucket_name):
+        try:
+            return evaluate(bucket_name, await call(Bucket=bucket_name))
+        except ClientError as e:
+            return evaluate(bucket_name, error=e)
+
+    return list(await asyncio.gather(*(one(bucket['Name']) for bucket in buckets)))
+
+
+def evaluate_cis_2_1_1(bucket_name, response=None, error=None):
+    if error is None:
+        return {
+            'service': SERVICE_NAME,
+            'check_id': 'CIS-2.1.1',
+            'status': 'PASS',
+            'resource': bucket_name,
+            'evidence': 'Encryption enabled',
+            'remediation': None
+        }
+    code = error.response['Error']['Code']
+    if code == 'ServerSideEncryptionConfigurationNotFoundError':
+        return {
+            'service': SERVICE_NAME,
+            'check_id': 'CIS-2.1.1',
+            'status': 'FAIL',
+            'resource': bucket_name,
+            'evidence': 'No bucket encryption configured',
+            'remediation': remediation('CIS-2.1.1', bucket=bucket_name)
+        }
+    return {
+        'service': SERVICE_NAME,
+        'check_id': 'CIS-2.1.1',
+        'status': 'ERROR',
+        'resource': bucket_name,
+        'evidence': f"Access denied: {error}",
+        'remediation': remediation('CIS-2.1.1.error')
+    }
+
+
+def check_cis_2_1_1(session, buckets=None):
+    # CIS 2.1.1: Ensure S3 buckets have encryption enabled
+    if buckets is None:
+        buckets = get_s3_buckets(session)
+    s3 = session.client(SERVICE_NAME)
+    return bucket_findings(buckets, s3.get_bucket_encryption, evaluate_cis_2_1_1)
+
+
+async def check_cis_2_1_1_async(clients, buckets=None):
+    if buckets is None:
+        buckets = await get_s3_buckets_async(clients)
+    s3 = await clients.get(SERVICE_NAME)
+    return await bucket_findings_async(buckets, s3.get_bucket_encryption, evaluate_cis_2_1_1)
+
+
+def evaluate_cis_2_1_3(bucket_name, response=None, error=None):
+    if error is None:
+        config = response.get('PublicAccessBlockConfiguration', {})
+        if all([
+            config.get('BlockPublicAcls'),
+            config.get('IgnorePublicAcls'),
+            config.get('BlockPublicPolicy'),
+            config.get('RestrictPublicBuckets')
+        ]):
+            return {
                 'service': SERVICE_NAME,
-                'check_id': 'CIS-2.1.1',
+                'check_id': 'CIS-2.1.3',
                 'status': 'PASS',
                 'resource': bucket_name,
-                'evidence': 'Encryption enabled',
+                'evidence': 'Public access fully blocked',
                 'remediation': None
-            })
-        except ClientError as e:
-            code = e.response['Error']['Code']
-            if code == 'ServerSideEncryptionConfigurationNotFoundError':
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.1',
-                    'status': 'FAIL',
-                    'resource': bucket_name,
-                    'evidence': 'No bucket encryption configured',
-                    'remediation': (
-                        "Enable default encryption:\n"
-                        f"aws s3api put-bucket-encryption --bucket {bucket_name} "
-                        "--server-side-encryption-configuration '{\"Rules\":["
-                        "{\"ApplyServerSideEncryptionByDefault\":{\"SSEAlgorithm\":\"AES256\"}}]}'"
-                    )
-                })
-            else:
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.1',
-                    'status': 'ERROR',
-                    'resource': bucket_name,
-                    'evidence': f"Access denied: {e}",
-                    'remediation': 'Add s3:GetEncryptionConfiguration permission'
-                })
-    return findings
+            }
+        return {
+            'service': SERVICE_NAME,
+            'check_id': 'CIS-2.1.3',
+            'status': 'FAIL',
+            'resource': bucket_name,
+            'evidence': 'Incomplete public access restrictions',
+            'remediation': remediation('CIS-2.1.3', bucket=bucket_name)
+        }
+    code = error.response['Error']['Code']
+    if code == 'NoSuchPublicAccessBlockConfiguration':
+        return {
+            'service': SERVICE_NAME,
+            'check_id': 'CIS-2.1.3',
+            'status': 'FAIL',
+            'resource': bucket_name,
+            'evidence': 'No public access block configuration',
+            'remediation': remediation('CIS-2.1.3.missing')
+        }
+    return {
+        'service': SERVICE_NAME,
+        'check_id': 'CIS-2.1.3',
+        'status': 'ERROR',
+        'resource': bucket_name,
+        'evidence': f"Access denied: {error}",
+        'remediation': remediation('CIS-2.1.3.error')
+    }
 
 
-def check_cis_2_1_3(session, buckets):
+def check_cis_2_1_3(session, buckets=None):
     # CIS 2.1.3: Ensure S3 buckets block public access
-    findings = []
+    if buckets is None:
+        buckets = get_s3_buckets(session)
     s3 = session.client(SERVICE_NAME)
-    
-    for bucket in buckets:
-        bucket_name = bucket['Name']
-        try:
-            resp = s3.get_public_access_block(Bucket=bucket_name)
-            config = resp.get('PublicAccessBlockConfiguration', {})
-            if all([
-                config.get('BlockPublicAcls'),
-                config.get('IgnorePublicAcls'),
-                config.get('BlockPublicPolicy'),
-                config.get('RestrictPublicBuckets')
-            ]):
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.3',
-                    'status': 'PASS',
-                    'resource': bucket_name,
-                    'evidence': 'Public access fully blocked',
-                    'remediation': None
-                })
-            else:
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.3',
-                    'status': 'FAIL',
-                    'resource': bucket_name,
-                    'evidence': 'Incomplete public access restrictions',
-                    'remediation': (
-                        "Enable full public access blocking:\n"
-                        f"aws s3api put-public-access-block --bucket {bucket_name} "
-                        "--public-access-block-configuration "
-                        "BlockPublicAcls=true,IgnorePublicAcls=true,"
-                        "BlockPublicPolicy=true,RestrictPublicBuckets=true"
-                    )
-                })
-        except ClientError as e:
-            code = e.response['Error']['Code']
-            if code == 'NoSuchPublicAccessBlockConfiguration':
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.3',
-                    'status': 'FAIL',
-                    'resource': bucket_name,
-                    'evidence': 'No public access block configuration',
-                    'remediation': 'Create public access block configuration as shown above'
-                })
-            else:
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.3',
-                    'status': 'ERROR',
-                    'resource': bucket_name,
-                    'evidence': f"Access denied: {e}",
-                    'remediation': 'Add s3:GetPublicAccessBlock permission'
-                })
-    return findings
+    return bucket_findings(buckets, s3.get_public_access_block, evaluate_cis_2_1_3)
+
+
+async def check_cis_2_1_3_async(clients, buckets=None):
+    if buckets is None:
+        buckets = await get_s3_buckets_async(clients)
+    s3 = await clients.get(SERVICE_NAME)
+    return await bucket_findings_async(buckets, s3.get_public_access_block, evaluate_cis_2_1_3)
+
+
+def evaluate_cis_2_1_2(bucket_name, response=None, error=None):
+    if error is None:
+        policy = json.loads(response.get('Policy', '{}'))
+        statements = policy.get('Statement', [])
+        deny_found = False
+        for stmt in statements:
+            if stmt.get('Effect') == 'Deny':
+                cond = stmt.get('Condition', {})
+                bool_cond = cond.get('Bool', {})
+                if bool_cond.get('aws:SecureTransport') == 'false':
+                    deny_found = True
+        if deny_found:
+            return {
+                'service': SERVICE_NAME,
+                'check_id': 'CIS-2.1.2',
+                'status': 'PASS',
+                'resource': bucket_name,
+                'evidence': 'Bucket policy denies non-HTTPS access',
+                'remediation': None
+            }
+        return {
+            'service': SERVICE_NAME,
+            'check_id': 'CIS-2.1.2',
+            'status': 'FAIL',
+            'resource': bucket_name,
+            'evidence': 'No Deny statement for non-HTTPS access found',
+            'remediation': remediation('CIS-2.1.2', bucket=bucket_name)
+        }
+    code = error.response['Error']['Code']
+    if code == 'NoSuchBucketPolicy':
+        return {
+            'service': SERVICE_NAME,
+            'check_id': 'CIS-2.1.2',
+            'status': 'FAIL',
+            'resource': bucket_name,
+            'evidence': 'No bucket policy configured',
+            'remediation': remediation('CIS-2.1.2.missing')
+        }
+    return {
+        'service': SERVICE_NAME,
+        'check_id': 'CIS-2.1.2',
+        'status': 'ERROR',
+        'resource': bucket_name,
+        'evidence': f"Access denied or error: {error}",
+        'remediation': remediation('CIS-2.1.2.error')
+    }
 
 
-def check_cis_2_1_2(session, buckets):
+def check_cis_2_1_2(session, buckets=None):
     # CIS 2.1.2: Ensure S3 Bucket Policy denies non-HTTPS requests
-    findings = []
+    if buckets is None:
+        buckets = get_s3_buckets(session)
     s3 = session.client(SERVICE_NAME)
-    
-    for bucket in buckets:
-        bucket_name = bucket['Name']
-        try:
-            resp = s3.get_bucket_policy(Bucket=bucket_name)
-            policy = json.loads(resp.get('Policy', '{}'))
-            statements = policy.get('Statement', [])
-            deny_found = False
-            for stmt in statements:
-                if stmt.get('Effect') == 'Deny':
-                    cond = stmt.get('Condition', {})
-                    bool_cond = cond.get('Bool', {})
-                    if bool_cond.get('aws:SecureTransport') == 'false':
-                        deny_found = True
-            if deny_found:
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.2',
-                    'status': 'PASS',
-                    'resource': bucket_name,
-                    'evidence': 'Bucket policy denies non-HTTPS access',
-                    'remediation': None
-                })
-            else:
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.2',
-                    'status': 'FAIL',
-                    'resource': bucket_name,
-                    'evidence': 'No Deny statement for non-HTTPS access found',
-                    'remediation': (
-                        f"Apply bucket policy to deny HTTP access:\n"  
-                        "{\"Effect\": \"Deny\",}\n"  
-                        "{\"Principal\": \"*\",}\n"  
-                        f"{{\"Resource\": \"arn:aws:s3:::{bucket_name}/*\"}},\n"  
-                        "{\"Condition\": {\"Bool\": {\"aws:SecureTransport\": \"false\"}}}")
-                    })
-                        
-        except ClientError as e:
-            code = e.response['Error']['Code']
-            if code == 'NoSuchBucketPolicy':
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.2',
-                    'status': 'FAIL',
-                    'resource': bucket_name,
-                    'evidence': 'No bucket policy configured',
-                    'remediation': 'Create a policy that denies access when aws:SecureTransport is false'
-                })
-            else:
-                findings.append({
-                    'service': SERVICE_NAME,
-                    'check_id': 'CIS-2.1.2',
-                    'status': 'ERROR',
-                    'resource': bucket_name,
-                    'evidence': f"Access denied or error: {e}",
-                    'remediation': 'Add s3:GetBucketPolicy permission'
-                })
-    return findings
+    return bucket_findings(buckets, s3.get_bucket_policy, evaluate_cis_2_1_2)
+
+
+async def check_cis_2_1_2_async(clients, buckets=None):
+    if buckets is None:
+        buckets = await get_s3_buckets_async(clients)
+    s3 = await clients.get(SERVICE_NAME)
+    return await bucket_findings_async(buckets, s3.get_bucket_policy, evaluate_cis_2_1_2)
 
 
 def generate_report(findings):
@@ -195,6 +229,60 @@ def generate_report(findings):
         print("-" * 40)
 
 
+# Registry read by the orchestrator.
+#   scope:  'global' or 'regional' (regional checks accept regions=[...])
+#   target: keyword argument that narrows the check to specific resources
+#   events: CloudTrail events that can change the check's result
+#   clients: AWS services the check creates clients for (models preloaded by Core.warmup)
+#   actions: IAM actions the check needs, evaluated before the scan by Core.preflight
+#   resource: type of resource the check calls the API for, one by one (Core.planner counts them)
+#   calls / calls_per_resource: API calls a unit makes, plus per resource of that type
+#   severity: 'critical', 'high', 'medium' or 'low'; higher severities are scheduled first
+#   async_function: optional coroutine variant taking a Core.aio client pool instead
+#                   of the session, used by --engine asyncio
+CHECKS = {
+    'CIS-2.1.1': {
+        'function': check_cis_2_1_1,
+        'async_function': check_cis_2_1_1_async,
+        'scope': 'global',
+        'target': 'buckets',
+        'events': ['CreateBucket', 'PutBucketEncryption', 'DeleteBucketEncryption'],
+        'clients': ['s3'],
+        'actions': ['s3:ListAllMyBuckets', 's3:GetEncryptionConfiguration'],
+        'resource': 'buckets',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'medium'
+    },
+    'CIS-2.1.2': {
+        'function': check_cis_2_1_2,
+        'async_function': check_cis_2_1_2_async,
+        'scope': 'global',
+        'target': 'buckets',
+        'events': ['CreateBucket', 'PutBucketPolicy', 'DeleteBucketPolicy'],
+        'clients': ['s3'],
+        'actions': ['s3:ListAllMyBuckets', 's3:GetBucketPolicy'],
+        'resource': 'buckets',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'medium'
+    },
+    'CIS-2.1.3': {
+        'function': check_cis_2_1_3,
+        'async_function': check_cis_2_1_3_async,
+        'scope': 'global',
+        'target': 'buckets',
+        'events': ['CreateBucket', 'PutBucketPublicAccessBlock', 'DeleteBucketPublicAccessBlock'],
+        'clients': ['s3'],
+        'actions': ['s3:ListAllMyBuckets', 's3:GetBucketPublicAccessBlock'],
+        'resource': 'buckets',
+        'calls': 1,
+        'calls_per_resource': 1,
+        'severity': 'critical'
+    }
+}
+
+
 def run_audit(session):
     buckets = get_s3_buckets(session)
     if not buckets:
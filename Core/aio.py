@@ -0,0 +1,182 @@
+# Core/aio.py
+import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+
+from botocore.credentials import RefreshableCredentials
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.credentials import AioCredentials
+    from aiobotocore.session import get_session
+except ImportError:  # optional dependency: pip install 'cis_audit_tool[asyncio]'
+    AioConfig = AioCredentials = get_session = None
+
+from Core.orchestrator import (
+    AUDIT_MODULES, MAX_WORKERS, check_failed, journaled_units, load_checks,
+    plan_units, required_clients, run_unit, tag_findings
+)
+from Core.cancellation import cancelled
+from Core.context import publish, publish_plan
+from Core.deadlines import timeout_finding
+from Core.journal import checkpoint
+from Core.negative_cache import collapse
+from Core.planner import order
+from Core.preflight import prune, skipped
+from Core.trace import span
+from Core.warmup import data_loader, preload
+
+# Requests the async checks may have in flight at once (HTTP connections per client)
+MAX_IN_FLIGHT = 200
+
+
+def require():
+    if get_session is None:
+        raise RuntimeError(
+            "The asyncio engine requires aiobotocore: pip install 'cis_audit_tool[asyncio]'"
+        )
+
+
+class SessionCredentials:
+    """
+    aiobotocore credentials signing with the scan session's refreshable
+    botocore credentials (assumed roles, SSO, instance profiles), which refresh
+    on their own schedule rather than being frozen at scan start.
+    """
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self.method = credentials.method
+
+    # Account-based endpoints read the account ID when a request needs it
+    def get_deferred_property(self, property_name):
+        return self._credentials.get_deferred_property(property_name)
+
+    def get_account_id(self):
+        return getattr(self._credentials, 'account_id', None)
+
+    async def get_frozen_credentials(self):
+        if self._credentials.refresh_needed():
+            # Refreshing makes blocking calls (STS, SSO): keep them off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._credentials.get_frozen_credentials)
+        return self._credentials.get_frozen_credentials()
+
+
+def async_credentials(credentials):
+    """aiobotocore credentials following the scan session's botocore ones."""
+    if isinstance(credentials, RefreshableCredentials):
+        return SessionCredentials(credentials)
+    frozen = credentials.get_frozen_credentials()
+    return AioCredentials(frozen.access_key, frozen.secret_key, frozen.token)
+
+
+class AsyncClients:
+    """
+    aiobotocore clients built from the scan session's credentials, created on
+    first use and shared by every async check. They reuse the session's model
+    loader, so models preloaded by Core.warmup are not parsed again.
+    """
+
+    def __init__(self, session, stack, max_in_flight=MAX_IN_FLIGHT):
+        self._session = get_session()
+        # As Core.org.assume_role_session does for botocore sessions
+        self._session._credentials = async_credentials(session.get_credentials())
+        self._session.register_component('data_loader', data_loader(session))
+        self._region = session.region_name
+        self._config = AioConfig(max_pool_connections=max_in_flight)
+        self._stack = stack
+        self._clients = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, service, region=None):
+        key = (service, region or self._region)
+        async with self._lock:
+            if key not in self._clients:
+                self._clients[key] = await self._stack.enter_async_context(
+                    self._session.create_client(service, region_name=key[1], config=self._config)
+                )
+            return self._clients[key]
+
+
+async def run_unit_async(unit, session, scan, clients, executor):
+    """
+    Run a unit with the check's async_function, or on the thread pool for the
+    checks that only have a blocking implementation.
+    """
+    if cancelled(scan):
+        return []
+    check = load_checks(unit.service)[unit.check_id]
+    function = check.get('async_function')
+    if function is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, run_unit, unit, session, scan, time.perf_counter())
+    target = {'regions': [unit.region]} if unit.region else {}
+    deadlines = getattr(scan, 'deadlines', None)
+    deadline, reason = deadlines.unit_deadline(time.monotonic()) if deadlines is not None else (None, None)
+    try:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        findings = tag_findings(await asyncio.wait_for(function(clients, **target), timeout), unit.service, scan)
+    except asyncio.TimeoutError:
+        # Cancelled: unlike threaded checks, partial findings of the unit are lost
+        findings = [timeout_finding(unit, reason, detail='check cancelled')]
+        publish(scan, unit, findings)
+        return findings
+    except Exception as e:
+        findings = check_failed(unit.service, unit.check_id, e)
+    checkpoint(scan, unit, findings)
+    publish(scan, unit, findings)
+    return findings
+
+
+async def _run_units(units, session, scan, max_in_flight):
+    done = journaled_units(scan)
+    deadlines = getattr(scan, 'deadlines', None)
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    publish_plan(scan, [u for u in units if u not in done])
+    try:
+        async with AsyncExitStack() as stack:
+            clients = AsyncClients(session, stack, max_in_flight)
+            tasks = {
+                unit: asyncio.ensure_future(run_unit_async(unit, session, scan, clients, executor))
+                for unit in order(scan, units) if unit not in done
+            }
+            if tasks:
+                await asyncio.wait(tasks.values(), timeout=deadlines.remaining() if deadlines is not None else None)
+            late = []
+            for unit, task in tasks.items():
+                if task.done():
+                    done[unit] = task.result()
+                else:
+                    task.cancel()
+                    late.append(task)
+                    done[unit] = [timeout_finding(unit, 'scan', detail='unit did not finish')]
+            # Let cancelled checks unwind before their clients are closed
+            await asyncio.gather(*late, return_exceptions=True)
+    finally:
+        executor.shutdown(wait=deadlines is None, cancel_futures=True)
+    return [done[unit] for unit in units]
+
+
+def async_audits(enabled_services, session, scan=None, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Same contract as orchestrator.thread_audits, on one asyncio event loop:
+    returns one list of findings per audited service, in enabled_services order.
+    Only the S3 bucket checks run on the loop; every other check runs on the
+    thread pool, as with thread_audits. API calls made by async checks are not
+    seen by --stats, --trace and the negative cache, which hook the boto3 session.
+    """
+    require()
+    preload(scan, required_clients(enabled_services))
+    with span(scan, 'plan', 'phase'):
+        units = prune(scan, plan_units(enabled_services, session))
+    with span(scan, 'audits', 'phase'):
+        unit_results = asyncio.run(_run_units(units, session, scan, max_in_flight))
+    results = defaultdict(list)
+    for finding in skipped(scan):
+        results[finding['service']].append(finding)
+    for unit, findings in zip(units, unit_results):
+        results[unit.service].extend(findings)
+    return [collapse(scan, results[s]) for s in enabled_services if s in AUDIT_MODULES]
@@ -1,16 +1,23 @@
 # Core/banner.py
-import pyfiglet
 import click
 
+# pyfiglet.figlet_format("awscan", font="slant"), rendered once and kept here:
+# importing pyfiglet and loading the font slowed down every CLI start
+ASCII_ART = r"""
+  ____ __      ________________ _____
+ / __ `/ | /| / / ___/ ___/ __ `/ __ \
+/ /_/ /| |/ |/ (__  ) /__/ /_/ / / / /
+\__,_/ |__/|__/____/\___/\__,_/_/ /_/
+"""
+
 def print_banner():
     # ASCII logo
-    ascii_art = pyfiglet.figlet_format("awscan", font="slant")
-    click.echo(click.style(ascii_art, fg="cyan", bold=True))
-    
+    click.echo(click.style(ASCII_ART, fg="cyan", bold=True))
+
     # Tool description
     click.echo(click.style(
         "awscan — AWS configuration audit tool",
         fg="bright_white",
         italic=True
     ))
-    click.echo()
\ No newline at end of file
+    click.echo()
@@ -0,0 +1,154 @@
+# Core/budget.py
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+
+# Sustained API requests per second allowed to all the scans of one account,
+# and to each service of the account; bursts up to one second's worth.
+# None: no cap. Off by default, as a lone scan has nothing to share its
+# account with; e.g. 100 and 20 leave room for other clients of the account
+ACCOUNT_RATE = None
+SERVICE_RATE = None
+
+# Per-service overrides of SERVICE_RATE, e.g. {'ec2': 50, 's3': 50}
+SERVICE_RATES = {}
+
+# Tokens a scan takes from the scheduler at once, then spends locally: a
+# shared scheduler is a round trip to another process
+BATCH = 5
+
+
+def enabled():
+    """Whether any cap is set; without one, scans run without a budget."""
+    return ACCOUNT_RATE is not None or SERVICE_RATE is not None or bool(SERVICE_RATES)
+
+
+class _Bucket:
+    def __init__(self, rate):
+        self.rate = rate  # None: uncapped
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def wait(self, now, count=1):
+        """Seconds until count tokens are available."""
+        if self.rate is None:
+            return 0
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= count else (count - self.tokens) / self.rate
+
+    def take(self, count=1):
+        if self.rate is not None:
+            self.tokens -= count
+
+
+class FairScheduler:
+    """
+    Request budget shared by concurrent scans: a token bucket per account and
+    per (account, service). Scans (flows) waiting on the same service are
+    served by start-time fair queuing: each request is tagged with its flow's
+    virtual time, which advances by 1/weight per request, so every scan gets
+    its weighted share of the capacity whatever its size.
+    """
+
+    def __init__(self, account_rate=ACCOUNT_RATE, service_rate=SERVICE_RATE, service_rates=None):
+        self.account_rate = account_rate
+        self.service_rate = service_rate
+        self.service_rates = SERVICE_RATES if service_rates is None else service_rates
+        self._condition = threading.Condition()
+        self._accounts = {}
+        self._services = {}
+        self._queues = defaultdict(list)      # (account, service) -> heap of waiting tickets
+        self._virtual = defaultdict(float)    # (account, service) -> tag of the last request served
+        self._finish = {}                     # (flow, account, service) -> tag of the flow's last request
+        self._sequence = itertools.count()
+        self._waited = defaultdict(float)     # flow -> seconds spent waiting
+
+    def _buckets(self, account, service):
+        if account not in self._accounts:
+            self._accounts[account] = _Bucket(self.account_rate)
+        key = (account, service)
+        if key not in self._services:
+            self._services[key] = _Bucket(self.service_rates.get(service, self.service_rate))
+        return self._accounts[account], self._services[key]
+
+    def acquire(self, flow, account, service, weight=1, count=1):
+        """
+        Block until the flow may send count requests of service to account
+        (fewer if a bucket holds less than count tokens at most); returns the
+        number of requests granted.
+        """
+        key = (account, service)
+        started = time.monotonic()
+        with self._condition:
+            account_bucket, service_bucket = self._buckets(account, service)
+            caps = [int(b.rate) for b in (account_bucket, service_bucket) if b.rate is not None]
+            count = max(min([count] + caps), 1)
+            tag = max(self._virtual[key], self._finish.get((flow, account, service), 0)) + count / weight
+            self._finish[(flow, account, service)] = tag
+            ticket = (tag, next(self._sequence))
+            heapq.heappush(self._queues[key], ticket)
+            while True:
+                if self._queues[key][0] == ticket:
+                    now = time.monotonic()
+                    delay = max(account_bucket.wait(now, count), service_bucket.wait(now, count))
+                    if delay == 0:
+                        account_bucket.take(count)
+                        service_bucket.take(count)
+                        heapq.heappop(self._queues[key])
+                        self._virtual[key] = tag
+                        self._waited[flow] += time.monotonic() - started
+                        self._condition.notify_all()
+                        return count
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+
+    def waited(self, flow):
+        with self._condition:
+            return round(self._waited.get(flow, 0.0), 3)
+
+    def forget(self, flow):
+        """Drop the state of a finished scan."""
+        with self._condition:
+            self._waited.pop(flow, None)
+            for key in [k for k in self._finish if k[0] == flow]:
+                del self._finish[key]
+
+
+class RequestBudget:
+    """
+    Makes a scan's API calls wait for their turn in a FairScheduler, which
+    may live in another process (a multiprocessing manager proxy). Tokens
+    are taken batch at a time per service and spent by the scan's threads.
+    """
+
+    def __init__(self, scheduler, flow, account, weight=1, batch=BATCH):
+        self.scheduler = scheduler
+        self.flow = flow
+        self.account = account
+        self.weight = weight
+        self.batch = batch
+        self._tokens = defaultdict(int)  # service -> tokens left from the last batch
+        self._lock = threading.Lock()
+
+    def install(self, session):
+        # Ahead of the stats and trace hooks, so latencies leave the wait out; after
+        # the negative cache and cancellation, whose calls send no request
+        session.events.register_first('before-call', self._before_call, unique_id='awscan-budget-before-call')
+        return self
+
+    def _before_call(self, model, **kwargs):
+        service = model.service_model.service_name
+        with self._lock:
+            if self._tokens[service]:
+                self._tokens[service] -= 1
+                return
+        granted = self.scheduler.acquire(self.flow, self.account, service, self.weight, self.batch)
+        with self._lock:
+            self._tokens[service] += granted - 1
+
+    def summary(self):
+        return {'account': self.account, 'waited_s': self.scheduler.waited(self.flow)}
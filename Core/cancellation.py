@@ -0,0 +1,51 @@
+# Core/cancellation.py
+import threading
+
+from botocore.exceptions import ClientError
+
+
+class ScanCancelled(ClientError):
+    """
+    Raised by the before-call hook instead of sending a request once the scan
+    was cancelled. Like DeadlineExceeded it is a ClientError, so running
+    checks fail their next call and return at once.
+    """
+
+    def __init__(self, operation_name):
+        super().__init__({'Error': {'Code': 'ScanCancelled', 'Message': 'Scan cancelled'}}, operation_name)
+
+
+class Cancellation:
+    """
+    Cancel flag of a scan, set from another thread (e.g. a web request), or
+    from another process when given a multiprocessing Event.
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else threading.Event()
+
+    def install(self, session):
+        # Among the first hooks, so a cancelled call is refused before the others record it
+        session.events.register_first('before-call', self._before_call, unique_id='awscan-cancellation-before-call')
+        return self
+
+    def cancel(self):
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def _before_call(self, model, **kwargs):
+        if self._event.is_set():
+            raise ScanCancelled(model.name)
+
+
+def cancelled(scan):
+    cancellation = getattr(scan, 'cancellation', None)
+    return cancellation is not None and cancellation.is_set()
+
+
+def raise_if_cancelled(scan, phase='scan'):
+    """Stop between scan phases (discovery, audits, report) once cancelled."""
+    if cancelled(scan):
+        raise ScanCancelled(phase)
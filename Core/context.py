@@ -0,0 +1,78 @@
+# Core/context.py
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+_local = threading.local()
+
+# Smallest piece of work the orchestrator schedules; region is None for global checks
+Unit = namedtuple('Unit', ['service', 'check_id', 'region'])
+
+
+class ScanContext:
+    """
+    State shared by all the checks of one scan.
+
+    The orchestrator activates it in every worker thread, so checks can reach it
+    through current() without changing their signatures.
+    """
+
+    def __init__(self, fingerprints=None, stats=None, tracer=None, profiler=None, warmup=None, journal=None,
+                 deadlines=None, negative_cache=None, preflight=None, planner=None,
+                 on_plan=None, on_findings=None, cancellation=None):
+        self.fingerprints = fingerprints
+        self.stats = stats
+        self.tracer = tracer
+        self.profiler = profiler
+        self.warmup = warmup
+        self.journal = journal
+        self.deadlines = deadlines
+        self.negative_cache = negative_cache
+        self.preflight = preflight
+        self.planner = planner
+        # on_plan(units) is called with the units about to run, on_findings(unit, findings)
+        # as each of them finishes, from the thread that ran it
+        self.on_plan = on_plan
+        self.on_findings = on_findings
+        self.cancellation = cancellation
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def cached(self, key, compute):
+        # Compute a scan-wide value once (e.g. the IAM credential report)
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]
+
+
+def publish_plan(scan, units):
+    """Tell the scan's listener which units are about to run, if it has one."""
+    listener = getattr(scan, 'on_plan', None)
+    if listener is not None:
+        listener(units)
+
+
+def publish(scan, unit, findings):
+    """Hand a finished unit's findings to the scan's listener, if any."""
+    listener = getattr(scan, 'on_findings', None)
+    if listener is not None:
+        listener(unit, findings)
+
+
+def current():
+    return getattr(_local, 'scan', None)
+
+
+def current_unit():
+    return getattr(_local, 'unit', None)
+
+
+@contextmanager
+def activate(scan, unit=None):
+    previous = current(), current_unit()
+    _local.scan, _local.unit = scan, unit
+    try:
+        yield scan
+    finally:
+        _local.scan, _local.unit = previous
@@ -0,0 +1,140 @@
+# Core/deadlines.py
+import threading
+import time
+from contextlib import contextmanager
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# Per-attempt connect/read timeout of API calls when deadlines are set
+# (botocore's own default is 60s each, retried several times)
+DEFAULT_CALL_TIMEOUT = 30
+
+_local = threading.local()
+
+
+class DeadlineExceeded(ClientError):
+    """
+    Raised by the before-call hook instead of sending a request once the
+    running check is out of time. It is a ClientError so that checks handle it
+    like any failed call: the resource is reported and the check moves on,
+    keeping the findings it already produced.
+    """
+
+    def __init__(self, operation_name, reason):
+        super().__init__({'Error': {'Code': 'DeadlineExceeded', 'Message': f"{reason} deadline exceeded"}},
+                         operation_name)
+        self.reason = reason
+
+
+class Deadlines:
+    """
+    Time budgets of a scan, in seconds (None: unlimited). The scan and service
+    budgets run from the start of the scan, the check budget from the start of
+    each (service, check, region) unit.
+    """
+
+    def __init__(self, scan=None, service=None, check=None, call_timeout=None):
+        self.scan = scan
+        self.service = service
+        self.check = check
+        self.call_timeout = call_timeout
+        self.started = time.monotonic()
+
+    def install(self, session):
+        # Bound every API call attempt, and refuse new calls past the deadline
+        timeout = self.call_timeout or min(t for t in (DEFAULT_CALL_TIMEOUT, self.check, self.scan) if t)
+        botocore_session = session._session
+        config = Config(connect_timeout=timeout, read_timeout=timeout)
+        default = botocore_session.get_default_client_config()
+        botocore_session.set_default_client_config(default.merge(config) if default else config)
+        session.events.register('before-call', self._before_call, unique_id='awscan-deadlines-before-call')
+        return self
+
+    def scan_deadline(self):
+        return self.started + self.scan if self.scan else None
+
+    def remaining(self):
+        """Seconds left in the scan, or None if it is unlimited."""
+        deadline = self.scan_deadline()
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    def unit_deadline(self, started):
+        """(deadline, reason) of a unit started at `started` (time.monotonic())."""
+        candidates = [
+            (self.scan_deadline(), 'scan'),
+            (self.started + self.service if self.service else None, 'service'),
+            (started + self.check if self.check else None, 'check')
+        ]
+        candidates = [c for c in candidates if c[0] is not None]
+        return min(candidates) if candidates else (None, None)
+
+    def _before_call(self, model, **kwargs):
+        state = getattr(_local, 'state', None)
+        if state is None:
+            # Outside of a unit (discovery, planning): only the scan deadline applies
+            deadline, reason = self.scan_deadline(), 'scan'
+        else:
+            deadline, reason = state['deadline'], state['reason']
+        if deadline is not None and time.monotonic() > deadline:
+            if state is not None:
+                state['expired'] = True
+            raise DeadlineExceeded(model.name, reason)
+
+
+@contextmanager
+def guard(scan, unit):
+    """
+    Run a unit under its deadline. Yields the unit's state:
+    {'deadline', 'reason', 'started', 'expired'}; expired is set once a call was refused.
+    """
+    deadlines = getattr(scan, 'deadlines', None)
+    started = time.monotonic()
+    deadline, reason = deadlines.unit_deadline(started) if deadlines is not None else (None, None)
+    state = {'deadline': deadline, 'reason': reason, 'started': started, 'expired': False}
+    previous = getattr(_local, 'state', None)
+    _local.state = state
+    try:
+        yield state
+    finally:
+        _local.state = previous
+
+
+def timeout_finding(unit, reason, elapsed=None, detail=None):
+    evidence = f"{reason.capitalize()} deadline exceeded"
+    if elapsed is not None:
+        evidence += f" after {elapsed:.1f}s"
+    if detail:
+        evidence += f": {detail}"
+    return {
+        'check_id': unit.check_id,
+        'status': 'TIMEOUT',
+        'service': unit.service,
+        'resource': unit.region or 'global',
+        'evidence': evidence,
+        'remediation': None
+    }
+
+
+def mark_timeouts(findings, unit, state):
+    """
+    After a unit ran out of time: findings of the calls refused by the
+    deadline become TIMEOUT, the others (completed before it) are kept.
+    """
+    if not state['expired']:
+        return findings
+    marker = '(DeadlineExceeded)'
+    for finding in findings:
+        if finding.get('status') == 'ERROR' and marker in str(finding.get('evidence', '')):
+            finding['status'] = 'TIMEOUT'
+            finding['evidence'] = f"{state['reason'].capitalize()} deadline exceeded: not evaluated"
+            finding['remediation'] = None
+    if not any(f.get('status') == 'TIMEOUT' for f in findings):
+        # The check swallowed the error: still say it did not complete
+        findings.append(timeout_finding(unit, state['reason'], time.monotonic() - state['started'],
+                                        'results above are partial'))
+    return findings
+
+
+def timed_out(findings):
+    return any(f.get('status') == 'TIMEOUT' for f in findings)
@@ -0,0 +1,229 @@
+# Core/events.py
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from Core.orchestrator import AUDIT_MODULES, load_checks, run_targeted
+from Core.storage import is_report, read_report, report_id, write_report
+
+EVENT_FILE_SUFFIXES = ('.json', '.json.gz')
+
+
+def read_event_file(path):
+    """Records of a CloudTrail log file ({"Records": [...]}), a list of events or a single event."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data.get('Records', [data])
+    return data
+
+
+def iter_event_batches(path, watch=False, interval=10):
+    """
+    Yield lists of event files found under path. With watch, keep polling
+    the directory and yield each batch of newly delivered files.
+    """
+    if os.path.isfile(path):
+        yield [path]
+        return
+    seen = set()
+    while True:
+        batch = []
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                file_path = os.path.join(root, name)
+                if name.endswith(EVENT_FILE_SUFFIXES) and file_path not in seen:
+                    seen.add(file_path)
+                    batch.append(file_path)
+        if batch:
+            yield batch
+        if not watch:
+            return
+        time.sleep(interval)
+
+
+# ----- Event -> resource extraction, by the CHECKS 'target' argument -----
+
+def _request(record):
+    return record.get('requestParameters') or {}
+
+def _regions(record):
+    return [record['awsRegion']] if record.get('awsRegion') else []
+
+def _buckets(record):
+    name = _request(record).get('bucketName')
+    return [name] if name else []
+
+def _users(record):
+    name = _request(record).get('userName')
+    identity = record.get('userIdentity') or {}
+    if not name and identity.get('type') == 'IAMUser':
+        # e.g. CreateAccessKey without UserName acts on the caller
+        name = identity.get('userName')
+    return [name] if name else []
+
+def _instance_ids(record):
+    # (region, instance ID): instances are looked up where the event happened
+    ids = [_request(record).get('instanceId')]
+    items = ((record.get('responseElements') or {}).get('instancesSet') or {}).get('items', [])
+    ids.extend(item.get('instanceId') for item in items)
+    return [(record.get('awsRegion'), i) for i in ids if i]
+
+TARGET_EXTRACTORS = {
+    'regions': _regions,
+    'buckets': _buckets,
+    'users': _users,
+    'instance_ids': _instance_ids
+}
+
+def _by_region(pairs):
+    # {region: [sorted values]}; None is the session's region
+    by_region = defaultdict(list)
+    for region, value in sorted(pairs, key=lambda pair: (pair[0] or '', pair[1])):
+        by_region[region].append(value)
+    return dict(by_region)
+
+# Shape expected by the check for its target argument (default: sorted list)
+TARGET_ARGUMENTS = {
+    'buckets': lambda names: [{'Name': name} for name in sorted(names)],
+    'instance_ids': _by_region
+}
+
+
+# ----- Stored findings covered by a target argument -----
+
+def _in_regions(resource, regions):
+    # Regional resources read "us-east-1", "name (us-east-1)", "X (Region: us-east-1)" or "X in us-east-1"
+    return any(resource == region or resource.endswith((f"({region})", f"(Region: {region})", f" in {region}"))
+               for region in regions)
+
+def _of_buckets(resource, buckets):
+    return resource in {bucket['Name'] for bucket in buckets}
+
+def _of_users(resource, users):
+    # Access key findings read "user (AccessKey AKIA...)"
+    return any(resource == user or resource.startswith(f"{user} (AccessKey ") for user in users)
+
+def _of_instances(resource, instance_ids):
+    return any(resource in ids for ids in instance_ids.values())
+
+TARGET_SCOPES = {
+    'regions': _in_regions,
+    'buckets': _of_buckets,
+    'users': _of_users,
+    'instance_ids': _of_instances
+}
+
+
+def in_scope(finding, target):
+    """
+    Whether a stored finding is re-evaluated by a re-run narrowed to target
+    (the kwargs of plan_targets). Findings without a resource are check-wide.
+    """
+    resource = finding.get('resource')
+    if not target or resource is None:
+        return True
+    (name, value), = target.items()
+    return TARGET_SCOPES[name](str(resource), value)
+
+
+def event_index(services):
+    """{eventName: [(service, check_id, target)]}, built from the modules' CHECKS registries."""
+    index = defaultdict(list)
+    for service in services:
+        if service not in AUDIT_MODULES:
+            continue
+        for check_id, check in load_checks(service).items():
+            for event_name in check.get('events', []):
+                index[event_name].append((service, check_id, check.get('target')))
+    return index
+
+
+def plan_targets(records, services):
+    """
+    Map CloudTrail records to the checks they affect.
+    Returns {(service, check_id): kwargs}; empty kwargs mean the whole check must re-run.
+    """
+    index = event_index(services)
+    found = {}
+    target_names = {}
+    for record in records:
+        if record.get('errorCode'):
+            continue  # Failed calls did not change anything
+        for service, check_id, target in index.get(record.get('eventName'), []):
+            key = (service, check_id)
+            if key in found and found[key] is None:
+                continue
+            values = TARGET_EXTRACTORS[target](record) if target else []
+            if not values:
+                found[key] = None
+            else:
+                found.setdefault(key, set()).update(values)
+                target_names[key] = target
+
+    targets = {}
+    for key, values in found.items():
+        if values is None:
+            targets[key] = {}
+        else:
+            target = target_names[key]
+            build = TARGET_ARGUMENTS.get(target, sorted)
+            targets[key] = {target: build(values)}
+    return targets
+
+
+def merge_into_scan(report, targets, results):
+    """
+    Replace the stored findings of each re-run check within its target
+    scope (all of them for a whole-check re-run) by the re-run's findings.
+    Resources gone since the scan, or now reported under another resource
+    name, therefore drop out of the report.
+    """
+    services = report.setdefault('services', [])
+    raw_results = report.setdefault('raw_results', [])
+    for service in {service for service, _ in targets} | set(results):
+        if service not in services:
+            if not results.get(service):
+                continue
+            services.append(service)
+            raw_results.append([])
+        i = services.index(service)
+        rerun = {check_id: target for (s, check_id), target in targets.items() if s == service}
+        kept = [f for f in raw_results[i] if f.get('check_id') not in rerun or not in_scope(f, rerun[f['check_id']])]
+        raw_results[i] = kept + list(results.get(service, []))
+    return report
+
+
+def latest_scan(folder):
+    if not os.path.isdir(folder):
+        return None
+    scans = sorted((f for f in os.listdir(folder) if f.startswith('scan_') and is_report(f)), key=report_id)
+    return os.path.join(folder, scans[-1]) if scans else None
+
+
+def apply_event_files(paths, session, scan_path, scan=None):
+    """
+    Re-run the checks affected by the events in paths and merge the
+    results into the stored scan at scan_path. Returns the targets re-run.
+    """
+    records = []
+    for path in paths:
+        try:
+            records.extend(read_event_file(path))
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable event file {path}: {e}")
+
+    report = read_report(scan_path)
+    targets = plan_targets(records, report.get('services') or list(AUDIT_MODULES))
+    if not targets:
+        return targets
+
+    merge_into_scan(report, targets, run_targeted(targets, session, scan))
+    report['updated'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
+
+    write_report(scan_path, report)
+    return targets
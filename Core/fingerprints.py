@@ -0,0 +1,103 @@
+# Core/fingerprints.py
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+
+from Core import context
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser('~'), '.awscan')
+
+# Carried-forward findings older than this are re-evaluated even if nothing changed
+DEFAULT_MAX_AGE = 24 * 3600
+
+
+def fingerprint(*parts):
+    """Stable hash of cheap, listing-level attributes of a resource."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Per-account file of {check_id: {resource: {fingerprint, evaluated_at, findings}}}.
+
+    Only entries looked up or recorded during the current scan are written back,
+    so resources that disappeared are dropped on save.
+    """
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._previous = {}
+        self._current = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._previous = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable fingerprint store {path}: {e}")
+
+    def lookup(self, check_id, resource, fp, as_of=None):
+        with self._lock:
+            entry = self._previous.get(check_id, {}).get(resource)
+            if not entry or entry['fingerprint'] != fp:
+                return None
+            if time.time() - entry['evaluated_at'] > self.max_age:
+                return None
+            if as_of is not None and as_of <= entry['evaluated_at']:
+                # The fingerprint's data predates the previous evaluation: later changes would not show
+                return None
+            self._current.setdefault(check_id, {})[resource] = entry
+            findings = copy.deepcopy(entry['findings'])
+        for finding in findings:
+            finding['evaluation'] = 'carried_forward'
+        return findings
+
+    def record(self, check_id, resource, fp, findings):
+        with self._lock:
+            self._current.setdefault(check_id, {})[resource] = {
+                'fingerprint': fp,
+                'evaluated_at': time.time(),
+                'findings': copy.deepcopy(findings)
+            }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._current, f)
+        os.replace(tmp_path, self.path)
+
+
+def open_store(session, state_dir=DEFAULT_STATE_DIR, max_age=DEFAULT_MAX_AGE):
+    account = session.client('sts').get_caller_identity()['Account']
+    return FingerprintStore(os.path.join(state_dir, f"fingerprints-{account}.json"), max_age)
+
+
+def carried_forward(check_id, resource, fp, as_of=None):
+    """
+    Previous findings for an unchanged resource, or None if it must be
+    re-evaluated. as_of: when the data fp was computed from was read, for
+    data AWS serves from a snapshot (epoch seconds; None: read live).
+    """
+    scan = context.current()
+    if fp is None or scan is None or scan.fingerprints is None:
+        return None
+    return scan.fingerprints.lookup(check_id, resource, fp, as_of)
+
+
+def remember(check_id, resource, fp, findings):
+    scan = context.current()
+    if fp is None or scan is None or scan.fingerprints is None:
+        return
+    scan.fingerprints.record(check_id, resource, fp, findings)
+
+
+def enabled():
+    scan = context.current()
+    return scan is not None and scan.fingerprints is not None
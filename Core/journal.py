@@ -0,0 +1,100 @@
+# Core/journal.py
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from Core.context import Unit
+
+JOURNAL_DIR = 'journal'
+
+
+def new_scan_id():
+    return datetime.utcnow().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+
+
+class Journal:
+    """
+    Append-only JSON-lines checkpoint of a scan: a header, the audited
+    services, then one record per finished (service, check, region) unit with
+    its findings. Every record is flushed to disk as it is written, so a scan
+    that dies keeps all the units it completed and --resume only runs the rest.
+    """
+
+    def __init__(self, path, scan_id):
+        self.path = path
+        self.scan_id = scan_id
+        self.header = None
+        self.services = None
+        self.completed = {}
+        self.finished = False
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # last line cut short by a crash
+                kind = record.get('type')
+                if kind == 'scan':
+                    self.header = record
+                elif kind == 'services':
+                    self.services = record['services']
+                elif kind == 'unit':
+                    self.completed[Unit(*record['unit'])] = record['findings']
+                elif kind == 'end':
+                    self.finished = True
+
+    @classmethod
+    def create(cls, state_dir, account, region):
+        scan_id = new_scan_id()
+        os.makedirs(os.path.join(state_dir, JOURNAL_DIR), exist_ok=True)
+        journal = cls(os.path.join(state_dir, JOURNAL_DIR, f"{scan_id}.jsonl"), scan_id)
+        journal.header = {
+            'type': 'scan',
+            'scan_id': scan_id,
+            'account': account,
+            'region': region,
+            'started': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
+        }
+        journal._append(journal.header)
+        return journal
+
+    @classmethod
+    def open(cls, state_dir, scan_id):
+        path = os.path.join(state_dir, JOURNAL_DIR, f"{scan_id}.jsonl")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No journal for scan {scan_id} in {os.path.dirname(path)}")
+        return cls(path, scan_id)
+
+    def _append(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_services(self, services):
+        self.services = list(services)
+        self._append({'type': 'services', 'services': self.services})
+
+    def record(self, unit, findings):
+        self.completed[unit] = findings
+        self._append({'type': 'unit', 'unit': list(unit), 'findings': findings})
+
+    def finish(self):
+        self.finished = True
+        self._append({'type': 'end', 'finished': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')})
+
+
+def checkpoint(scan, unit, findings):
+    """Journal a finished unit, if the scan is journaled."""
+    journal = getattr(scan, 'journal', None)
+    if journal is not None:
+        journal.record(unit, findings)
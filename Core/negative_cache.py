@@ -0,0 +1,149 @@
+# Core/negative_cache.py
+import copy
+import re
+import threading
+from collections import defaultdict
+
+from botocore.awsrequest import AWSResponse
+
+# Errors that will not change for the rest of the scan: the role lacks the
+# permission, or the service/operation is not available in that region
+DENIAL_CODES = {
+    'AccessDenied', 'AccessDeniedException', 'UnauthorizedOperation', 'AuthorizationError',
+    'OptInRequired', 'UnsupportedOperation'
+}
+
+# Access to these services' resources is also granted by resource policies
+# (bucket, key policies): one denied resource says little about the next, so
+# only a run of denials without any success in between is cached
+RESOURCE_POLICY_SERVICES = {'s3', 'kms', 'sqs', 'sns', 'secretsmanager', 'lambda', 'ecr', 'glacier'}
+RESOURCE_DENIALS = 3
+
+# Resources named in an aggregated finding before it only gives a count
+SAMPLE_RESOURCES = 5
+
+_ERROR_RE = re.compile(r"\((\w+)\) when calling the (\w+) operation")
+
+
+class NegativeCache:
+    """
+    Scan-scoped cache of calls that failed for good, keyed by (service,
+    operation, region). Once an operation is denied, further calls to it are
+    answered from the cache by a before-call hook: botocore raises the same
+    error as the first call, so checks report it as usual, without a round trip.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def install(self, session):
+        # Registered before the stats/trace hooks, which skip cached answers
+        events = session.events
+        events.register_first('before-call', self._before_call, unique_id='awscan-negative-cache-before-call')
+        events.register('after-call', self._after_call, unique_id='awscan-negative-cache-after-call')
+        return self
+
+    def _key(self, model, context):
+        return (model.service_model.service_name, model.name, context.get('client_region') or 'global')
+
+    def _cached(self, key, code):
+        service = key[0]
+        if code in ('OptInRequired', 'UnsupportedOperation') or service not in RESOURCE_POLICY_SERVICES:
+            return True
+        return self._entries[key]['denials'] >= RESOURCE_DENIALS
+
+    def _before_call(self, model, context, **kwargs):
+        key = self._key(model, context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry['cached']:
+                return None
+            entry['short_circuited'] += 1
+            status, parsed = entry['status'], copy.deepcopy(entry['parsed'])
+        context['awscan_negative_cache'] = True
+        # Answered without sending the request; botocore raises the error from it
+        return AWSResponse(None, status, {'content-length': '0'}, None), parsed
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        if context.get('awscan_negative_cache'):
+            return
+        code = parsed.get('Error', {}).get('Code')
+        key = self._key(model, context)
+        with self._lock:
+            if code in DENIAL_CODES:
+                entry = self._entries.setdefault(key, {'denials': 0, 'short_circuited': 0, 'cached': False})
+                entry['denials'] += 1
+                entry.update(code=code, status=http_response.status_code,
+                             parsed={k: v for k, v in parsed.items() if k != 'ResponseMetadata'})
+                entry['cached'] = self._cached(key, code)
+            elif key in self._entries and not self._entries[key]['cached']:
+                # Another resource was readable: the denials were resource-specific
+                self._entries[key]['denials'] = 0
+
+    def denied(self):
+        """{(service, operation): [regions]} of the operations answered from the cache."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry['cached']]
+        regions = defaultdict(list)
+        for service, operation, region in sorted(keys):
+            regions[(service, operation)].append(region)
+        return dict(regions)
+
+    def rows(self):
+        with self._lock:
+            items = sorted(self._entries.items())
+        return [
+            {'service': service, 'operation': operation, 'region': region, 'code': entry['code'],
+             'denials': entry['denials'], 'short_circuited': entry['short_circuited']}
+            for (service, operation, region), entry in items if entry['cached']
+        ]
+
+    def short_circuited(self):
+        with self._lock:
+            return sum(entry['short_circuited'] for entry in self._entries.values())
+
+
+def collapse(scan, findings):
+    """
+    Replace the ERROR findings of each check caused by a cached denial with
+    one aggregated finding naming the operation, the regions and a sample of
+    the resources that could not be evaluated.
+    """
+    cache = getattr(scan, 'negative_cache', None)
+    if cache is None:
+        return findings
+    # Findings carry the audit module's service ('logging'), denials the API's ('kms'):
+    # match them on the operation
+    regions = defaultdict(set)
+    for (_, operation), api_regions in cache.denied().items():
+        regions[operation].update(api_regions)
+
+    groups = {}
+    collapsed = []
+    for finding in findings:
+        match = _ERROR_RE.search(str(finding.get('evidence', ''))) if finding.get('status') == 'ERROR' else None
+        if not match or match.group(1) not in DENIAL_CODES or match.group(2) not in regions:
+            collapsed.append(finding)
+            continue
+        key = (finding.get('service'), finding['check_id'], match.group(1), match.group(2))
+        if key not in groups:
+            groups[key] = []
+            collapsed.append(key)  # placeholder, keeps the group at its first finding's position
+        groups[key].append(finding)
+
+    for i, item in enumerate(collapsed):
+        if isinstance(item, tuple):
+            collapsed[i] = _aggregate(groups[item], item[2], item[3], sorted(regions[item[3]]))
+    return collapsed
+
+
+def _aggregate(group, code, operation, regions):
+    if len(group) == 1:
+        return group[0]
+    resources = [str(f['resource']) for f in group if f.get('resource')]
+    evidence = f"{operation} denied ({code}) in {', '.join(regions)}: {len(group)} resources not evaluated"
+    if resources:
+        more = ', ...' if len(resources) > SAMPLE_RESOURCES else ''
+        evidence += f" ({', '.join(resources[:SAMPLE_RESOURCES])}{more})"
+    return dict(group[0], resource=f"{len(group)} resources", evidence=evidence)
@@ -1,10 +1,21 @@
 from .auth import *
 import time
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 from collections import defaultdict
 import importlib
 import json  # Optional: for pretty printing
 
+from Core import context
+from Core.trace import span
+from Core.profiling import profile
+from Core.warmup import preload
+from Core.journal import checkpoint
+from Core.cancellation import cancelled
+from Core.deadlines import guard, mark_timeouts, timed_out, timeout_finding
+from Core.negative_cache import collapse
+from Core.preflight import prune, skipped
+from Core.planner import order
+
 # Mandatory services are audited regardless of resource presence
 MANDATORY_SERVICES = ['iam','monitoring']  # IAM will always be audited
 
@@ -16,6 +27,9 @@ CONDITIONAL_SERVICES = {
     'rds': ('rds', 'describe_db_instances', 'DBInstances')
 }
 
+# Worker threads running (service, check, region) units
+MAX_WORKERS = 10
+
 # Map of service names to their respective audit modules
 AUDIT_MODULES = {
     's3': 's3_audit',
@@ -27,22 +41,27 @@ AUDIT_MODULES = {
     'rds': 'rds_audit'
 }
 
-def discover_enabled_services(session):
+def discover_enabled_services(session, scan=None):
     enabled = set(MANDATORY_SERVICES)
+    # Discovery clients, listing regions, then the checks that always run
+    preload(scan, [client for client, _, _ in CONDITIONAL_SERVICES.values()])
+    preload(scan, ['ec2'] + required_clients(MANDATORY_SERVICES))
 
     def check_service(service):
-        client = session.client(service)  # ou une autre région valide
-        method = getattr(client, CONDITIONAL_SERVICES[service][1])
-        try:
-            response = method()
-            if response.get(CONDITIONAL_SERVICES[service][2]):
-                return service
-        except ClientError as e:
-            if e.response['Error']['Code'] != 'AccessDenied':
-                print(f"Error checking {service}: {e}")
-        return None
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
+        with context.activate(scan, context.Unit(service, 'discovery', None)), \
+                span(scan, f"discovery:{service}", 'discovery', service=service):
+            client = session.client(service)  # ou une autre région valide
+            method = getattr(client, CONDITIONAL_SERVICES[service][1])
+            try:
+                response = method()
+                if response.get(CONDITIONAL_SERVICES[service][2]):
+                    return service
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'AccessDenied':
+                    print(f"Error checking {service}: {e}")
+            return None
+
+    with span(scan, 'discovery', 'phase'), ThreadPoolExecutor(max_workers=10) as executor:
         futures = {executor.submit(check_service, s): s for s in CONDITIONAL_SERVICES}
         for future in futures:
             if result := future.result():
@@ -50,18 +69,118 @@ def discover_enabled_services(session):
 
     return sorted(enabled)
 
-def run_audit(service, session):
+def load_checks(service):
+    # Check registry (CHECKS) declared by the service's audit module
+    module = importlib.import_module(f'Core.Checks.{AUDIT_MODULES[service]}')
+    return module.CHECKS
+
+def required_clients(services):
+    """AWS services the checks of the given audited services create clients for."""
+    clients = set()
+    for service in services:
+        if service in AUDIT_MODULES:
+            for check in load_checks(service).values():
+                clients.update(check.get('clients', []))
+    return sorted(clients)
+
+def get_enabled_regions(session):
+    ec2 = session.client('ec2')
+    regions_info = ec2.describe_regions(AllRegions=True)
+    return [region['RegionName'] for region in regions_info['Regions'] if region['OptInStatus'] in ['opt-in-not-required', 'opted-in']]
+
+def plan_units(enabled_services, session):
+    """
+    Split the scan into (service, check_id, region) units. Regional checks get
+    one unit per enabled region (listed once for the whole scan); global
+    checks get a single unit with region None.
+    """
+    units = []
+    regions = None
+    for service in enabled_services:
+        if service not in AUDIT_MODULES:
+            continue
+        for check_id, check in load_checks(service).items():
+            if check.get('scope') != 'regional':
+                units.append(context.Unit(service, check_id, None))
+                continue
+            if regions is None:
+                try:
+                    regions = get_enabled_regions(session)
+                except ClientError as e:
+                    # Let each regional check list regions itself and report the error
+                    print(f"Error listing regions: {e}")
+                    regions = [None]
+            units.extend(context.Unit(service, check_id, region) for region in regions)
+    return units
+
+def run_unit(unit, session, scan=None, queued_at=None):
+    if cancelled(scan):
+        # Units still queued when the scan is cancelled are dropped, not run
+        return []
+    target = {'regions': [unit.region]} if unit.region else {}
+    queued_ms = round((time.perf_counter() - queued_at) * 1000, 1) if queued_at else 0
+    with span(scan, f"{unit.check_id} {unit.region or 'global'}", 'unit',
+              service=unit.service, check_id=unit.check_id, region=unit.region, queued_ms=queued_ms):
+        findings = run_check(unit.service, unit.check_id, session, scan, **target)
+    if not timed_out(findings):
+        # Timed-out units are left out of the journal so that --resume runs them again
+        checkpoint(scan, unit, findings)
+    context.publish(scan, unit, findings)
+    return findings
+
+def run_check(service, check_id, session, scan=None, **target):
+    """
+    Run a single registered check, optionally narrowed to specific resources
+    through its target argument (regions=[...], buckets=[...], users=[...]).
+    """
+    regions = target.get('regions') or []
+    unit = context.Unit(service, check_id, regions[0] if len(regions) == 1 else None)
+    state = None
     try:
-        module_name = f'Core.Checks.{AUDIT_MODULES[service]}'
-        module = importlib.import_module(module_name)
-        return module.run_audit(session)
+        check = load_checks(service)[check_id]
+        with context.activate(scan, unit), profile(scan, unit), guard(scan, unit) as state:
+            if state['deadline'] is not None and time.monotonic() > state['deadline']:
+                return [timeout_finding(unit, state['reason'], detail='not started in time')]
+            findings = check['function'](session, **target)
+        return mark_timeouts(tag_findings(findings, service, scan), unit, state)
     except Exception as e:
-        return [{
-            'check_id': 'ORCHESTRATION-ERROR',
-            'status': 'ERROR',
-            'service': service,
-            'evidence': f"Failed to run audit: {str(e)}"
-        }]
+        if state is not None and state['expired']:
+            return [timeout_finding(unit, state['reason'], time.monotonic() - state['started'], str(e))]
+        return check_failed(service, check_id, e)
+
+def tag_findings(findings, service, scan=None):
+    checks = load_checks(service) if service in AUDIT_MODULES else {}
+    for finding in findings:
+        finding.setdefault('service', service)
+        if finding.get('check_id') in checks:
+            finding.setdefault('severity', checks[finding['check_id']].get('severity'))
+        if scan is not None and scan.fingerprints is not None:
+            finding.setdefault('evaluation', 'evaluated')
+    return findings
+
+def check_failed(service, check_id, error):
+    return [{
+        'check_id': check_id,
+        'status': 'ERROR',
+        'service': service,
+        'evidence': f"Failed to run check: {str(error)}"
+    }]
+
+def run_targeted(targets, session, scan=None):
+    """
+    Re-run only the given checks: targets maps (service, check_id) to the
+    keyword arguments narrowing the check ({} re-runs it entirely).
+    Returns {service: findings}.
+    """
+    results = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(run_check, service, check_id, session, scan, **target): service
+            for (service, check_id), target in targets.items()
+        }
+        for future, service in futures.items():
+            results[service].extend(future.result())
+    return results
 
 def organize_results(all_results):
     report = defaultdict(list)
@@ -71,9 +190,48 @@ def organize_results(all_results):
                 report[finding['service']].append(finding)
     return report
 
-def thread_audits(enabled_services,session):
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(run_audit, s, session) for s in enabled_services if s in AUDIT_MODULES]
-        all_results = [f.result() for f in futures]
-    return all_results
+def thread_audits(enabled_services,session, scan=None, max_workers=MAX_WORKERS):
+    """
+    Run every unit of the scan plan on a thread pool.
+    Returns one list of findings per audited service, in enabled_services order.
+    """
+    preload(scan, required_clients(enabled_services))
+    with span(scan, 'plan', 'phase'):
+        units = prune(scan, plan_units(enabled_services, session))
+    results = defaultdict(list)
+    for finding in skipped(scan):
+        results[finding['service']].append(finding)
+    done = journaled_units(scan)
+    deadlines = getattr(scan, 'deadlines', None)
+    # Profiling measures process-wide CPU and memory: one unit at a time
+    workers = 1 if getattr(scan, 'profiler', None) is not None else max_workers
+    executor = ThreadPoolExecutor(max_workers=workers)
+    context.publish_plan(scan, [u for u in units if u not in done])
+    try:
+        with span(scan, 'audits', 'phase'):
+            # Most severe, then longest units first; results are still collected in plan order
+            futures = {
+                unit: executor.submit(run_unit, unit, session, scan, time.perf_counter())
+                for unit in order(scan, units) if unit not in done
+            }
+            # Bounded by the scan deadline: units still running then are reported, not awaited
+            wait(futures.values(), timeout=deadlines.remaining() if deadlines is not None else None)
+            for unit in units:
+                if unit in done:
+                    results[unit.service].extend(done[unit])
+                elif futures[unit].done():
+                    results[unit.service].extend(futures[unit].result())
+                else:
+                    futures[unit].cancel()
+                    results[unit.service].append(timeout_finding(unit, 'scan', detail='unit did not finish'))
+    finally:
+        # Threads stuck past the deadline are abandoned; their next API call is refused
+        executor.shutdown(wait=deadlines is None, cancel_futures=True)
+    # One ERROR finding per denied operation instead of one per resource
+    return [collapse(scan, results[s]) for s in enabled_services if s in AUDIT_MODULES]
+
+def journaled_units(scan):
+    """Units already completed by the scan being resumed, with their findings."""
+    journal = getattr(scan, 'journal', None)
+    return dict(journal.completed) if journal is not None else {}
 
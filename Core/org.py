@@ -0,0 +1,184 @@
+# Core/org.py
+import json
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+
+import boto3
+import botocore.session
+from botocore.credentials import AssumeRoleCredentialFetcher, DeferredRefreshableCredentials, JSONFileCache
+from botocore.exceptions import ClientError
+
+from Core import orchestrator
+from Core.context import ScanContext
+from Core.fingerprints import DEFAULT_STATE_DIR, open_store
+from Core.negative_cache import NegativeCache
+from Core.planner import Planner
+from Core.preflight import Preflight
+from Core.remediation import render_finding
+from Core.warmup import Warmup, stop
+
+DEFAULT_ROLE_NAME = 'OrganizationAccountAccessRole'
+
+# Worker threads of each account scan; processes x threads bounds the total
+DEFAULT_ACCOUNT_THREADS = 4
+
+
+def list_organization_accounts(session):
+    """Active member accounts of the organization the session belongs to."""
+    client = session.client('organizations')
+    accounts = []
+    for page in client.get_paginator('list_accounts').paginate():
+        for account in page.get('Accounts', []):
+            if account.get('Status') == 'ACTIVE':
+                accounts.append({'id': account['Id'], 'name': account.get('Name', '')})
+    return accounts
+
+
+def read_accounts_file(path):
+    """One account per line: '<account id>[,<name>]'; blank lines and # comments are ignored."""
+    accounts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            account_id, _, name = line.partition(',')
+            accounts.append({'id': account_id.strip(), 'name': name.strip()})
+    return accounts
+
+
+def assume_role_session(base_session, account_id, role_name, region, external_id=None, state_dir=DEFAULT_STATE_DIR):
+    """
+    boto3 session on the role in account_id. The credentials refresh
+    themselves before they expire and are cached on disk, so another process
+    scanning the same account reuses them instead of calling AssumeRole again.
+    """
+    extra_args = {'RoleSessionName': 'awscan'}
+    if external_id:
+        extra_args['ExternalId'] = external_id
+    fetcher = AssumeRoleCredentialFetcher(
+        client_creator=base_session._session.create_client,
+        source_credentials=base_session.get_credentials(),
+        role_arn=f"arn:aws:iam::{account_id}:role/{role_name}",
+        extra_args=extra_args,
+        cache=JSONFileCache(os.path.join(state_dir, 'credentials'))
+    )
+    botocore_session = botocore.session.Session()
+    botocore_session._credentials = DeferredRefreshableCredentials(
+        refresh_using=fetcher.fetch_credentials, method='assume-role'
+    )
+    return boto3.session.Session(botocore_session=botocore_session, region_name=region)
+
+
+def scan_account(account, credentials, region, role_name, external_id=None, threads=DEFAULT_ACCOUNT_THREADS,
+                 incremental=False, state_dir=DEFAULT_STATE_DIR, model_cache=None):
+    """
+    Scan one account in a pool process. credentials are the caller's
+    (access_key, secret_key, token); returns the account's report entry.
+    """
+    entry = {'account_id': account['id'], 'name': account['name']}
+    try:
+        base_session = boto3.session.Session(
+            aws_access_key_id=credentials[0],
+            aws_secret_access_key=credentials[1],
+            aws_session_token=credentials[2],
+            region_name=region
+        )
+        session = assume_role_session(base_session, account['id'], role_name, region, external_id, state_dir)
+        scan = ScanContext(
+            fingerprints=open_store(session, state_dir) if incremental else None,
+            negative_cache=NegativeCache().install(session),
+            planner=Planner(session),
+            warmup=Warmup(session, model_cache).start()
+        )
+        try:
+            enabled_services = orchestrator.discover_enabled_services(session, scan)
+            scan.preflight = Preflight(session, scan).run(enabled_services)
+            results = orchestrator.thread_audits(enabled_services, session, scan, max_workers=threads)
+        finally:
+            # Pool processes scan many accounts: do not leave a thread behind per account
+            stop(scan)
+        if scan.fingerprints is not None:
+            scan.fingerprints.save()
+    except ClientError as e:
+        # e.g. the role does not exist or cannot be assumed in this account
+        return dict(entry, status='ERROR', error=str(e), services={})
+    except Exception as e:
+        return dict(entry, status='ERROR', error=f"Failed to scan account: {e}", services={})
+
+    return dict(entry, status='OK', error=None, services=render_results(account['id'], results),
+                preflight=scan.preflight.coverage())
+
+
+def render_results(account_id, results):
+    """{service: rendered findings tagged with account_id} from thread_audits-style results."""
+    return {
+        service: [dict(render_finding(f), account_id=account_id) for f in findings]
+        for service, findings in orchestrator.organize_results(results).items()
+    }
+
+
+def summarize(entry):
+    return dict(Counter(f['status'] for findings in entry['services'].values() for f in findings))
+
+
+def consolidate(entries, role_name, started=None):
+    """Multi-account report from per-account entries."""
+    entries = sorted(entries, key=lambda e: e['account_id'])
+    totals = Counter()
+    for entry in entries:
+        entry.setdefault('summary', summarize(entry))
+        totals.update(entry['summary'])
+    return {
+        'timestamp': (started or datetime.utcnow()).strftime('%Y-%m-%d %H:%M:%S UTC'),
+        'role_name': role_name,
+        'accounts_scanned': sum(1 for e in entries if e['status'] == 'OK'),
+        'accounts_failed': sum(1 for e in entries if e['status'] != 'OK'),
+        'summary': dict(totals),
+        'accounts': entries
+    }
+
+
+def scan_organization(accounts, session, region, role_name=DEFAULT_ROLE_NAME, external_id=None,
+                      processes=None, threads=DEFAULT_ACCOUNT_THREADS, on_account=None, **options):
+    """
+    Scan accounts in parallel on a pool of processes, each account running its
+    checks on `threads` threads. Accounts are handed out as processes free up,
+    each with the session's current credentials. on_account(entry) is called
+    as each account completes. Returns the consolidated report.
+    """
+    processes = processes or os.cpu_count() or 1
+    pending = iter(accounts)
+    started = datetime.utcnow()
+    entries = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        def submit(account):
+            # Frozen as each account is handed out: a long organization scan outlives
+            # the session's temporary credentials, which refresh in this process only
+            frozen = session.get_credentials().get_frozen_credentials()
+            credentials = (frozen.access_key, frozen.secret_key, frozen.token)
+            return executor.submit(scan_account, account, credentials, region, role_name, external_id, threads,
+                                   **options)
+
+        running = {submit(account) for account in islice(pending, processes)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = future.result()
+                entry['summary'] = summarize(entry)
+                entries.append(entry)
+                if on_account is not None:
+                    on_account(entry)
+                for account in islice(pending, 1):
+                    running.add(submit(account))
+    return consolidate(entries, role_name, started)
+
+
+def write_report(report, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
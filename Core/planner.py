@@ -0,0 +1,169 @@
+# Core/planner.py
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+from Core import context
+from Core.trace import span
+
+# Estimated latency of one API call, retries included
+DEFAULT_CALL_MS = 100
+
+# Resources per type and region assumed when they were not counted
+ASSUMED_RESOURCES = 10
+
+INVENTORY_WORKERS = 10
+
+# Check severities ('severity' in CHECKS), most urgent first
+SEVERITIES = ['critical', 'high', 'medium', 'low']
+
+
+def _paginated_count(client, operation, key):
+    return sum(len(page.get(key, [])) for page in client.get_paginator(operation).paginate())
+
+
+# Cheap counts of the resource types checks declare ('resource' in CHECKS):
+# resource type -> (client, scope, count(client))
+INVENTORY = {
+    'users': ('iam', 'global', lambda c: c.get_account_summary()['SummaryMap'].get('Users', 0)),
+    'buckets': ('s3', 'global', lambda c: len(c.list_buckets().get('Buckets', []))),
+    'instances': ('ec2', 'regional', lambda c: sum(
+        len(r['Instances']) for page in c.get_paginator('describe_instances').paginate()
+        for r in page.get('Reservations', [])
+    )),
+    'vpcs': ('ec2', 'regional', lambda c: _paginated_count(c, 'describe_vpcs', 'Vpcs')),
+    'trails': ('cloudtrail', 'regional', lambda c: len(c.describe_trails().get('trailList', []))),
+    'keys': ('kms', 'regional', lambda c: _paginated_count(c, 'list_keys', 'Keys'))
+}
+
+
+class Planner:
+    """
+    Estimates the API calls and time of each unit from the check metadata
+    (calls, calls_per_resource and resource in CHECKS) and resource counts,
+    and orders units by severity, then longest first so the slowest ones do
+    not start last. Without an inventory every resource type counts
+    ASSUMED_RESOURCES.
+    """
+
+    def __init__(self, session, scan=None, call_ms=DEFAULT_CALL_MS):
+        self.session = session
+        self.scan = scan
+        self.call_ms = call_ms
+        self.counts = {}  # (resource type, region or None) -> count
+
+    def _check(self, unit):
+        from Core.orchestrator import load_checks
+        return load_checks(unit.service)[unit.check_id]
+
+    def _count_key(self, resource, region):
+        # Global-scope checks on a regional resource see the session's region
+        if INVENTORY[resource][1] == 'global':
+            return resource, None
+        return resource, region or self.session.region_name
+
+    def inventory(self, units):
+        """Count, in parallel, the resources the units will visit (unreadable counts stay assumed)."""
+        keys = set()
+        for unit in units:
+            resource = self._check(unit).get('resource')
+            if resource in INVENTORY:
+                keys.add(self._count_key(resource, unit.region))
+
+        def count(key):
+            resource, region = key
+            service, _, counter = INVENTORY[resource]
+            with context.activate(self.scan, context.Unit(service, 'plan', region)):
+                try:
+                    return key, counter(self.session.client(service, region_name=region))
+                except Exception:
+                    return key, None
+
+        with span(self.scan, 'inventory', 'phase'), ThreadPoolExecutor(max_workers=INVENTORY_WORKERS) as executor:
+            for key, n in executor.map(count, sorted(keys, key=str)):
+                if n is not None:
+                    self.counts[key] = n
+        return self
+
+    def resources(self, unit):
+        resource = self._check(unit).get('resource')
+        if resource is None:
+            return 0
+        if resource not in INVENTORY:
+            return ASSUMED_RESOURCES
+        return self.counts.get(self._count_key(resource, unit.region), ASSUMED_RESOURCES)
+
+    def calls(self, unit):
+        check = self._check(unit)
+        return check.get('calls', 1) + check.get('calls_per_resource', 0) * self.resources(unit)
+
+    def seconds(self, unit):
+        return self.calls(unit) * self.call_ms / 1000
+
+    def order(self, units):
+        """Most severe checks first, longest units first within a severity (plan order breaks ties)."""
+        return sorted(units, key=lambda u: (severity_rank(self._check(u)), -self.calls(u)))
+
+    def wall_time(self, units, workers):
+        """Scan time of the units started in this order on `workers` threads."""
+        finish = [0.0] * max(workers, 1)
+        for unit in units:
+            start = heapq.heappop(finish)
+            heapq.heappush(finish, start + self.seconds(unit))
+        return max(finish)
+
+    def rows(self, units):
+        """One row per check, most expensive first."""
+        checks = {}
+        for unit in units:
+            check = self._check(unit)
+            row = checks.setdefault((unit.service, unit.check_id), {
+                'check_id': unit.check_id,
+                'service': unit.service,
+                'scope': check.get('scope'),
+                'severity': check.get('severity', ''),
+                'resource': check.get('resource') or '',
+                'units': 0,
+                'resources': 0,
+                'calls': 0,
+                'est_s': 0.0,
+                'longest_unit_s': 0.0
+            })
+            row['units'] += 1
+            row['resources'] += self.resources(unit)
+            row['calls'] += self.calls(unit)
+            row['est_s'] += self.seconds(unit)
+            row['longest_unit_s'] = max(row['longest_unit_s'], self.seconds(unit))
+        for row in checks.values():
+            row['est_s'], row['longest_unit_s'] = round(row['est_s'], 1), round(row['longest_unit_s'], 1)
+        return sorted(checks.values(), key=lambda r: r['est_s'], reverse=True)
+
+    def summary(self, units, workers):
+        ordered = self.order(units)
+        return {
+            'units': len(units),
+            'calls': sum(self.calls(u) for u in units),
+            'workers': workers,
+            'call_ms': self.call_ms,
+            'est_s': round(self.wall_time(ordered, workers), 1),
+            'inventory': [
+                {'resource': resource, 'region': region or 'global', 'count': n}
+                for (resource, region), n in sorted(self.counts.items(), key=str)
+            ]
+        }
+
+
+def severity_rank(check):
+    severity = check.get('severity')
+    return SEVERITIES.index(severity) if severity in SEVERITIES else len(SEVERITIES)
+
+
+def order(scan, units):
+    """
+    Dispatch order of the units: most severe checks first, then longest
+    first when the scan has a planner.
+    """
+    planner = getattr(scan, 'planner', None)
+    if planner is not None:
+        return planner.order(units)
+    from Core.orchestrator import load_checks
+    return sorted(units, key=lambda u: severity_rank(load_checks(u.service)[u.check_id]))
@@ -0,0 +1,179 @@
+# Core/preflight.py
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore import xform_name
+from botocore.exceptions import BotoCoreError, ClientError
+
+from Core import context
+from Core.negative_cache import DENIAL_CODES
+from Core.remediation import remediation
+from Core.trace import span
+
+# IAM action prefixes that differ from the boto3 service name
+ACTION_SERVICES = {'elasticfilesystem': 'efs'}
+
+# IAM actions whose API operation has another name
+ACTION_OPERATIONS = {'s3:ListAllMyBuckets': 'ListBuckets'}
+
+# SimulatePrincipalPolicy accepts a limited number of actions per call
+SIMULATION_BATCH = 50
+
+PROBE_WORKERS = 10
+
+# Probe errors meaning the action is not allowed (opt-in and unsupported
+# operations are regional, the probe runs in one region only)
+ACCESS_DENIED_CODES = DENIAL_CODES - {'OptInRequired', 'UnsupportedOperation'}
+
+# Unit the preflight's API calls are accounted to (--stats, --trace)
+PREFLIGHT_UNIT = context.Unit('iam', 'preflight', None)
+
+
+def principal_arn(session):
+    """
+    ARN to simulate the policies of: the IAM user, or the role behind an
+    assumed-role session (None for the root user, which cannot be simulated).
+    """
+    arn = session.client('sts').get_caller_identity()['Arn']
+    account, resource = arn.split(':')[4], arn.split(':', 5)[5]
+    if resource == 'root':
+        return None
+    if resource.startswith('assumed-role/'):
+        role_name = resource.split('/')[1]
+        try:
+            # The role ARN includes its path, which the session ARN leaves out
+            return session.client('iam').get_role(RoleName=role_name)['Role']['Arn']
+        except ClientError:
+            return f"arn:aws:iam::{account}:role/{role_name}"
+    return arn
+
+
+class Preflight:
+    """
+    Evaluates the IAM actions declared by the checks (CHECKS 'actions') before
+    the scan, with iam:SimulatePrincipalPolicy or, when simulation is not
+    allowed, a cheap call to each operation that takes no parameters. Checks
+    needing an action found denied are left out of the plan.
+    """
+
+    def __init__(self, session, scan=None):
+        self.session = session
+        self.scan = scan
+        self.method = None
+        self.decisions = {}  # action -> True (allowed), False (denied), None (unverified)
+        self.checks = {}     # (service, check_id) -> actions
+
+    def run(self, enabled_services):
+        from Core.orchestrator import AUDIT_MODULES, load_checks
+        for service in enabled_services:
+            if service in AUDIT_MODULES:
+                for check_id, check in load_checks(service).items():
+                    self.checks[(service, check_id)] = check.get('actions', [])
+        actions = sorted({a for actions in self.checks.values() for a in actions})
+        with span(self.scan, 'preflight', 'phase'), \
+                context.activate(self.scan, PREFLIGHT_UNIT):
+            try:
+                self.decisions = self.simulate(actions)
+                self.method = 'simulation'
+            except (ClientError, BotoCoreError):
+                # Simulation denied or unavailable: probe the actions instead
+                self.decisions = self.probe(actions)
+                self.method = 'probe'
+        return self
+
+    def simulate(self, actions):
+        arn = principal_arn(self.session)
+        if arn is None:
+            return dict.fromkeys(actions, True)
+        iam = self.session.client('iam')
+        decisions = {}
+        for i in range(0, len(actions), SIMULATION_BATCH):
+            paginator = iam.get_paginator('simulate_principal_policy')
+            for page in paginator.paginate(PolicySourceArn=arn, ActionNames=actions[i:i + SIMULATION_BATCH]):
+                for result in page['EvaluationResults']:
+                    if result.get('MissingContextValues'):
+                        # Depends on request context (source IP, MFA...) the simulation does not have
+                        decisions[result['EvalActionName']] = None
+                    else:
+                        decisions[result['EvalActionName']] = result['EvalDecision'] == 'allowed'
+        return decisions
+
+    def probe(self, actions):
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+            return dict(zip(actions, executor.map(self._probe_action, actions)))
+
+    def _probe_action(self, action):
+        # Runs on a pool thread, which does not inherit the activated unit
+        with context.activate(self.scan, PREFLIGHT_UNIT):
+            return self._probe(action)
+
+    def _probe(self, action):
+        prefix, operation = action.split(':', 1)
+        operation = ACTION_OPERATIONS.get(action, operation)
+        try:
+            client = self.session.client(ACTION_SERVICES.get(prefix, prefix))
+            input_shape = client.meta.service_model.operation_model(operation).input_shape
+        except Exception:
+            return None
+        members = input_shape.members if input_shape is not None else {}
+        if input_shape is not None and input_shape.required_members:
+            return None  # needs a resource to call: left to the check itself
+        params = {'DryRun': True} if 'DryRun' in members else {}
+        try:
+            getattr(client, xform_name(operation))(**params)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            # Any other error (NoSuchEntity, DryRunOperation...) comes after authorization
+            return code not in ACCESS_DENIED_CODES
+        except BotoCoreError:
+            return None
+        return True
+
+    def denied_actions(self, service, check_id):
+        return [a for a in self.checks.get((service, check_id), []) if self.decisions.get(a) is False]
+
+    def runnable(self, service, check_id):
+        return not self.denied_actions(service, check_id)
+
+    def coverage(self):
+        pruned = {
+            check_id: self.denied_actions(service, check_id)
+            for (service, check_id) in self.checks if not self.runnable(service, check_id)
+        }
+        total = len(self.checks)
+        return {
+            'method': self.method,
+            'checks': total,
+            'runnable': total - len(pruned),
+            'coverage_pct': round(100 * (total - len(pruned)) / total, 1) if total else 100.0,
+            'pruned': pruned,
+            'unverified_actions': sorted(a for a, allowed in self.decisions.items() if allowed is None)
+        }
+
+    def skipped_findings(self):
+        findings = []
+        for (service, check_id) in self.checks:
+            denied = self.denied_actions(service, check_id)
+            if denied:
+                findings.append({
+                    'check_id': check_id,
+                    'status': 'SKIPPED',
+                    'service': service,
+                    'resource': 'global',
+                    'evidence': f"Not run: {', '.join(denied)} denied ({self.method})",
+                    'remediation': remediation('preflight.denied', actions=', '.join(denied))
+                })
+        return findings
+
+
+def prune(scan, units):
+    """Units of the plan whose check has all the actions it needs (all of them without a preflight)."""
+    preflight = getattr(scan, 'preflight', None)
+    if preflight is None:
+        return units
+    return [u for u in units if preflight.runnable(u.service, u.check_id)]
+
+
+def skipped(scan):
+    """SKIPPED findings of the checks left out of the plan."""
+    preflight = getattr(scan, 'preflight', None)
+    return preflight.skipped_findings() if preflight is not None else []
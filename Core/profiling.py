@@ -0,0 +1,149 @@
+# Core/profiling.py
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Allocations made by the profilers themselves are not the check's
+_IGNORED_FRAMES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')
+]
+
+
+def _function_name(func):
+    filename, line, name = func
+    return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+
+class Profiler:
+    """
+    CPU and memory profile of every check: cProfile for CPU time and hot
+    functions, tracemalloc for peak memory and for the blocks a check allocated
+    and still holds when it returns (findings, parsed responses, caches).
+
+    tracemalloc and the process CPU clock are process-wide, so checks must run
+    one at a time for the numbers to be attributed correctly (the orchestrator
+    runs units serially when a profiler is set).
+    """
+
+    def __init__(self, top=10, frames=1):
+        self.top = top
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._checks = defaultdict(lambda: {
+            'units': 0, 'cpu_s': 0.0, 'wall_s': 0.0, 'peak_bytes': 0,
+            'retained_blocks': 0, 'retained_bytes': 0, 'sites': defaultdict(lambda: [0, 0]),
+            'stats': None
+        })
+        self._started = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._started = time.process_time(), time.perf_counter()
+        return self
+
+    @contextmanager
+    def profile(self, unit):
+        # Start from an empty trace: the snapshot taken afterwards then only holds
+        # what this check allocated and still references, and stays cheap to take
+        tracemalloc.clear_traces()
+        profile = cProfile.Profile()
+        cpu, wall = time.process_time(), time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            self._record(unit.service, unit.check_id, cpu, wall, peak, snapshot.statistics('traceback'), profile)
+
+    def _record(self, service, check_id, cpu, wall, peak, allocations, profile):
+        with self._lock:
+            entry = self._checks[(service, check_id)]
+            entry['units'] += 1
+            entry['cpu_s'] += cpu
+            entry['wall_s'] += wall
+            entry['peak_bytes'] = max(entry['peak_bytes'], peak)
+            for stat in allocations:
+                entry['retained_blocks'] += stat.count
+                entry['retained_bytes'] += stat.size
+                site = entry['sites'][' <- '.join(f"{f.filename}:{f.lineno}" for f in stat.traceback)]
+                site[0] += stat.size
+                site[1] += stat.count
+            if entry['stats'] is None:
+                entry['stats'] = pstats.Stats(profile)
+            else:
+                entry['stats'].add(profile)
+
+    def _top_functions(self, stats):
+        if stats is None:
+            return []
+        # Own time (tottime): where the check itself burns CPU, not the calls it waits on
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        return [
+            {
+                'function': _function_name(func),
+                'calls': calls,
+                'own_ms': round(tottime * 1000, 2),
+                'cumulative_ms': round(cumtime * 1000, 2)
+            }
+            for func, (_, calls, tottime, cumtime, _) in rows[:self.top]
+        ]
+
+    def report(self):
+        """Per-check profile, most CPU-hungry first, plus whole-scan totals."""
+        with self._lock:
+            checks = []
+            for (service, check_id), entry in self._checks.items():
+                sites = sorted(entry['sites'].items(), key=lambda item: item[1][0], reverse=True)
+                checks.append({
+                    'check_id': check_id,
+                    'service': service,
+                    'units': entry['units'],
+                    'cpu_ms': round(entry['cpu_s'] * 1000, 1),
+                    'wall_ms': round(entry['wall_s'] * 1000, 1),
+                    'peak_bytes': entry['peak_bytes'],
+                    'retained_blocks': entry['retained_blocks'],
+                    'retained_bytes': entry['retained_bytes'],
+                    'top_functions': self._top_functions(entry['stats']),
+                    'top_allocations': [
+                        {'site': site, 'bytes': size, 'blocks': count}
+                        for site, (size, count) in sites[:self.top]
+                    ]
+                })
+        checks.sort(key=lambda c: c['cpu_ms'], reverse=True)
+        scan = {'peak_bytes': max((c['peak_bytes'] for c in checks), default=0)}
+        if self._started is not None:
+            scan['cpu_ms'] = round((time.process_time() - self._started[0]) * 1000, 1)
+            scan['wall_ms'] = round((time.perf_counter() - self._started[1]) * 1000, 1)
+        return {'scan': scan, 'checks': checks}
+
+    def export(self, path):
+        report = self.report()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def profile(scan, unit):
+    """Profile a check on the scan's profiler, or a no-op when the scan is not profiled."""
+    profiler = getattr(scan, 'profiler', None)
+    if profiler is None:
+        return nullcontext()
+    return profiler.profile(unit)
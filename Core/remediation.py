@@ -0,0 +1,270 @@
+# Core/remediation.py
+from string import Template
+
+# Remediation catalog keyed by check_id (with a suffix for secondary cases).
+# Findings only store {'id': ..., 'args': {...}}; the text is rendered at output time.
+REMEDIATIONS = {
+    # ----- IAM -----
+    'CIS-1.1': 'Avoid using the root account. Create IAM users instead.',
+    'CIS-1.1.error': 'Ensure proper IAM permissions to access get_account_summary.',
+    'CIS-1.2': (
+        "Enable MFA for the root account in the AWS console "
+        "under IAM > Dashboard > Activate MFA on your root account."
+    ),
+    'CIS-1.2.error': 'Ensure permission to access IAM get_account_summary.',
+    'CIS-1.8': (
+        "Set the minimum password length to at least 14 characters.\n"
+        "Console: IAM > Account Settings > Set minimum password length.\n"
+        "CLI: aws iam update-account-password-policy --minimum-password-length 14"
+    ),
+    'CIS-1.8.missing': (
+        "Create a password policy with a minimum password length of 14.\n"
+        "CLI: aws iam update-account-password-policy --minimum-password-length 14"
+    ),
+    'CIS-1.8.error': 'Ensure permission to access IAM get_account_password_policy.',
+    'CIS-1.9': (
+        "Set password reuse prevention to at least 24.\n"
+        "CLI: aws iam update-account-password-policy --password-reuse-prevention 24"
+    ),
+    'CIS-1.9.missing': (
+        "Create a password policy with password reuse prevention set to at least 24.\n"
+        "CLI: aws iam update-account-password-policy --password-reuse-prevention 24"
+    ),
+    'CIS-1.9.error': 'Ensure permission to access IAM get_account_password_policy.',
+    'CIS-1.10': (
+        'Enable MFA for users with console passwords. '
+        'Go to IAM > Users > Security credentials tab > Manage MFA Device.'
+    ),
+    'CIS-1.10.error': 'Ensure proper IAM permissions to list users, login profiles, and MFA devices.',
+    'CIS-1.12.password': 'Disable the console password for users inactive >45 days.',
+    'CIS-1.12.key-inactive': 'Deactivate or delete access keys inactive >45 days.',
+    'CIS-1.12.key-unused': 'Deactivate or delete unused access keys older than 45 days.',
+    'CIS-1.12.error': 'Ensure proper IAM permissions to list users and access keys.',
+    'CIS-1.13.multiple': 'Ensure only one active access key per user.',
+    'CIS-1.13.none': 'Ensure each user has at least one active access key.',
+    'CIS-1.13.error': 'Ensure proper IAM permissions to list users and access keys.',
+    'CIS-1.14': 'Rotate keys older than 90 days by creating new and deactivating old.',
+    'CIS-1.14.error': 'Ensure proper IAM permissions to list users and access keys.',
+
+    # ----- S3 -----
+    'CIS-2.1.1': (
+        "Enable default encryption:\n"
+        "aws s3api put-bucket-encryption --bucket $bucket "
+        "--server-side-encryption-configuration '{\"Rules\":["
+        "{\"ApplyServerSideEncryptionByDefault\":{\"SSEAlgorithm\":\"AES256\"}}]}'"
+    ),
+    'CIS-2.1.1.error': 'Add s3:GetEncryptionConfiguration permission',
+    'CIS-2.1.2': (
+        "Apply bucket policy to deny HTTP access:\n"
+        "{\"Effect\": \"Deny\",}\n"
+        "{\"Principal\": \"*\",}\n"
+        "{\"Resource\": \"arn:aws:s3:::$bucket/*\"},\n"
+        "{\"Condition\": {\"Bool\": {\"aws:SecureTransport\": \"false\"}}}"
+    ),
+    'CIS-2.1.2.missing': 'Create a policy that denies access when aws:SecureTransport is false',
+    'CIS-2.1.2.error': 'Add s3:GetBucketPolicy permission',
+    'CIS-2.1.3': (
+        "Enable full public access blocking:\n"
+        "aws s3api put-public-access-block --bucket $bucket "
+        "--public-access-block-configuration "
+        "BlockPublicAcls=true,IgnorePublicAcls=true,"
+        "BlockPublicPolicy=true,RestrictPublicBuckets=true"
+    ),
+    'CIS-2.1.3.missing': 'Create public access block configuration as shown above',
+    'CIS-2.1.3.error': 'Add s3:GetPublicAccessBlock permission',
+
+    # ----- RDS -----
+    'CIS-2.2.1': (
+        "Create a snapshot of the unencrypted RDS instance and restore it with encryption:\n"
+        "1. aws rds create-db-snapshot --region $region --db-snapshot-identifier $db_id-snapshot --db-instance-identifier $db_id\n"
+        "2. aws kms list-aliases --region $region  # Find KMS key\n"
+        "3. aws rds copy-db-snapshot --region $region --source-db-snapshot-identifier $db_id-snapshot "
+        "--target-db-snapshot-identifier $db_id-snapshot-encrypted --kms-key-id <kms-key-id>\n"
+        "4. aws rds restore-db-instance-from-db-snapshot --region $region "
+        "--db-instance-identifier $db_id-encrypted --db-snapshot-identifier $db_id-snapshot-encrypted\n"
+    ),
+    'CIS-2.2.2': (
+        "Enable Auto Minor Version Upgrade using the AWS Console or CLI:\n"
+        "CLI example:\n"
+        "aws rds modify-db-instance --region $region --db-instance-identifier $db_id "
+        "--auto-minor-version-upgrade --apply-immediately"
+    ),
+    'CIS-2.2.2.error': 'Ensure the IAM role has rds:DescribeDBInstances permission',
+    'CIS-2.2.3': (
+        "Disable public access for the RDS instance:\n"
+        "1. aws rds modify-db-instance --region $region "
+        "--db-instance-identifier $db_id --no-publicly-accessible --apply-immediately\n\n"
+        "If the RDS instance is in a public subnet, consider modifying its subnet configuration and route table:\n"
+        "- Ensure no route in the subnet's route table allows 0.0.0.0/0 via an Internet Gateway (igw-xxxxxxxx).\n"
+        "- Move the instance to private subnets if needed."
+    ),
+
+    # ----- EFS -----
+    'CIS-2.3.1': (
+        "Create a new EFS file system with encryption enabled and migrate data as needed:\n"
+        "1. aws efs create-file-system --region $region --performance-mode generalPurpose --encrypted\n"
+        "2. Use AWS DataSync or other tools to move data from $fs_id to the new encrypted file system."
+    ),
+
+    # ----- EC2 -----
+    'CIS-2.7': (
+        "1. Create a custom security group with required rules\n"
+        "2. Attach the custom security group to the instances\n"
+        "3. Remove the default security group from the instances"
+    ),
+    'CIS-2.7.error': 'Verify IAM permissions include ec2:DescribeVpcs, ec2:DescribeSecurityGroups, and ec2:DescribeInstances',
+    'CIS-2.13': (
+        "1. Launch a new EC2 instance without sensitive data in user data\n"
+        "2. Use AWS Secrets Manager or Parameter Store for secrets\n"
+        "3. If scripts need secrets, let them retrieve from secure sources at runtime"
+    ),
+    'CIS-2.13.decode': 'Verify the user data encoding format',
+    'CIS-2.13.attribute-error': 'Ensure IAM permissions include ec2:DescribeInstanceAttribute',
+    'CIS-2.13.error': 'Verify IAM permissions include ec2:DescribeInstances and ec2:DescribeInstanceAttribute',
+
+    # ----- Logging -----
+    'CIS-3.1.no-trail': (
+        "Create a multi-region trail:\n"
+        "aws cloudtrail create-trail --name <trail-name> --bucket-name <s3-bucket> --is-multi-region-trail"
+    ),
+    'CIS-3.1.multi-region': 'aws cloudtrail update-trail --name $trail --is-multi-region-trail',
+    'CIS-3.1.logging': 'aws cloudtrail start-logging --name $trail',
+    'CIS-3.1.management': 'Update trail $trail to log only Management events using AdvancedEventSelectors',
+    'CIS-3.1.error': 'Ensure CloudTrail is accessible and permissions are correctly set',
+    'CIS-3.2': (
+        "Enable log file validation:\n"
+        "aws cloudtrail update-trail --name $trail --enable-log-file-validation"
+    ),
+    'CIS-3.2.error': 'Check CloudTrail access and permissions',
+    'CIS-3.3.not-configured': (
+        "1. Ensure you have created a suitable IAM role, S3 bucket, and SNS topic.\n"
+        "2. Run the following:\n"
+        "aws configservice put-configuration-recorder --configuration-recorder "
+        "--name <config-recorder-name> --roleARN arn:aws:iam::<account-id>:role/<iam-role> "
+        "--recording-group allSupported=true,includeGlobalResourceTypes=true\n"
+        "3. Create a delivery channel JSON file and run:\n"
+        "aws configservice put-delivery-channel --delivery-channel file://<delivery-channel-file>.json\n"
+        "4. Start the recorder:\n"
+        "aws configservice start-configuration-recorder --configuration-recorder-name <config-recorder-name>"
+    ),
+    'CIS-3.3.not-recording': (
+        "Start the recorder using:\n"
+        "aws configservice start-configuration-recorder --configuration-recorder-name <config-recorder-name>"
+    ),
+    'CIS-3.3.error': 'Verify AWS Config is available and properly set up in this region.',
+    'CIS-3.4.no-bucket': (
+        "Ensure CloudTrail is configured with an S3 bucket.\n"
+        "You can find the bucket using:\n"
+        "aws cloudtrail describe-trails --region <region-name> --query trailList[*].S3BucketName"
+    ),
+    'CIS-3.4': (
+        "1. Create a JSON file with the following content:\n"
+        '{\n'
+        '  "LoggingEnabled": {\n'
+        '    "TargetBucket": "<target-bucket>",\n'
+        '    "TargetPrefix": "<log-prefix>",\n'
+        '    "TargetGrants": [\n'
+        '      {\n'
+        '        "Grantee": {\n'
+        '          "Type": "AmazonCustomerByEmail",\n'
+        '          "EmailAddress": "<email>"\n'
+        '        },\n'
+        '        "Permission": "FULL_CONTROL"\n'
+        '      }\n'
+        '    ]\n'
+        '  }\n'
+        '}\n'
+        "2. Run:\n"
+        "aws s3api put-bucket-logging --bucket <bucket-name> --bucket-logging-status file://<filename>.json"
+    ),
+    'CIS-3.4.error': 'Verify CloudTrail and S3 permissions and configuration in this region.',
+    'CIS-3.5': (
+        "1. Choose or create a KMS CMK.\n"
+        "2. Run the following command to enable KMS encryption on the trail:\n"
+        "aws cloudtrail update-trail --name <trail-name> --kms-id <kms-key-id>\n"
+        "3. Optionally, attach a key policy to the KMS key if required:\n"
+        "aws kms put-key-policy --key-id <kms-key-id> --policy <policy-document>"
+    ),
+    'CIS-3.5.error': 'Ensure CloudTrail is available and that you have the necessary IAM permissions to describe trails.',
+    'CIS-3.6': (
+        "Enable key rotation for this customer-managed symmetric KMS key using:\n"
+        "aws kms enable-key-rotation --key-id <kms-key-id>"
+    ),
+    'CIS-3.6.error': 'Verify KMS permissions and configuration in this region.',
+    'CIS-3.7': (
+        "Enable VPC flow logging for REJECT traffic:\n"
+        "1. Create IAM role and policy (see CIS 3.7 remediation steps).\n"
+        "2. Run:\n"
+        "aws ec2 create-flow-logs --resource-type VPC "
+        "--resource-ids <vpc-id> --traffic-type REJECT "
+        "--log-group-name <log-group-name> "
+        "--deliver-logs-permission-arn <iam-role-arn>"
+    ),
+    'CIS-3.7.error': 'Verify EC2 permissions and VPC configuration in this region.',
+    'CIS-3.8.no-trail': 'Create a CloudTrail trail in the region and enable object-level logging.',
+    'CIS-3.8': (
+        "Enable object-level write logging in CloudTrail:\n"
+        "aws cloudtrail put-event-selectors --region <region> --trail-name <trail-name> "
+        "--event-selectors '[{\"ReadWriteType\": \"WriteOnly\", "
+        "\"IncludeManagementEvents\": true, \"DataResources\": [{\"Type\": \"AWS::S3::Object\", "
+        "\"Values\": [\"arn:aws:s3:::<bucket-name>/\"]}]}]'"
+    ),
+    'CIS-3.8.error': 'Verify CloudTrail permissions and region availability.',
+    'CIS-3.9.no-trail': 'Create a CloudTrail trail in the region and enable object-level logging for read events.',
+    'CIS-3.9': (
+        "Enable object-level read logging in CloudTrail:\n"
+        "aws cloudtrail put-event-selectors --region <region> --trail-name <trail-name> "
+        "--event-selectors '[{\"ReadWriteType\": \"ReadOnly\", "
+        "\"IncludeManagementEvents\": true, \"DataResources\": [{\"Type\": \"AWS::S3::Object\", "
+        "\"Values\": [\"arn:aws:s3:::<bucket-name>/\"]}]}]'"
+    ),
+    'CIS-3.9.error': 'Verify CloudTrail permissions and region availability.',
+
+    # ----- Monitoring -----
+    'CIS-4.1': (
+        "Create a metric filter in CloudWatch Logs:\n"
+        "aws logs put-metric-filter --log-group-name <log-group-name> "
+        "--filter-name 'UnauthorizedAPICalls' "
+        "--metric-transformations "
+        "metricName='UnauthorizedAPICalls',metricNamespace='CISBenchmark',metricValue='1' "
+        "--filter-pattern '{ ($$.errorCode = \"*UnauthorizedOperation\") || ($$.errorCode = \"AccessDenied*\") }'"
+    ),
+    'CIS-4.1.error': 'Add logs:DescribeMetricFilters permission',
+
+    # ----- Preflight -----
+    'preflight.denied': 'Grant the scanning identity $actions to run this check',
+}
+
+
+def remediation(template_id, **args):
+    """Reference to a catalog entry, stored on the finding instead of the rendered text."""
+    ref = {'id': template_id}
+    if args:
+        ref['args'] = args
+    return ref
+
+
+def render_remediation(value):
+    """
+    Render a remediation reference to text.
+
+    Accepts None, a single reference, a list of references (rendered one per line)
+    or a plain string (scans saved before the catalog existed).
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "\n".join(render_remediation(v) for v in value)
+    template = REMEDIATIONS.get(value.get('id'))
+    if template is None:
+        return value.get('id')
+    return Template(template).safe_substitute(value.get('args', {}))
+
+
+def render_finding(finding):
+    # Shallow copy so the stored finding keeps the compact reference
+    rendered = dict(finding)
+    rendered['remediation'] = render_remediation(finding.get('remediation'))
+    return rendered
@@ -0,0 +1,131 @@
+# Core/stats.py
+import math
+import threading
+import time
+from collections import defaultdict
+
+from Core import context
+
+THROTTLE_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottled',
+    'RequestThrottledException', 'TooManyRequestsException', 'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException', 'BandwidthLimitExceeded', 'SlowDown',
+    'PriorRequestNotComplete', 'EC2ThrottledException'
+}
+
+STATS_COLUMNS = [
+    'check_id', 'service', 'region', 'operation', 'calls', 'retries', 'throttles',
+    'errors', 'bytes', 'p50_ms', 'p95_ms', 'p99_ms', 'total_ms'
+]
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def _check_id():
+    unit = context.current_unit()
+    return unit.check_id if unit else 'orchestrator'
+
+
+class ApiStats:
+    """
+    Per (check_id, service, region, operation) accounting of AWS API calls,
+    collected through botocore event hooks on the scan's session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = defaultdict(lambda: {
+            'calls': 0, 'retries': 0, 'throttles': 0, 'errors': 0, 'bytes': 0, 'latencies': []
+        })
+
+    def install(self, session):
+        # Clients created from the session afterwards inherit these handlers
+        events = session.events
+        events.register('before-call', self._before_call, unique_id='awscan-stats-before-call')
+        events.register('needs-retry', self._needs_retry, unique_id='awscan-stats-needs-retry')
+        events.register('after-call', self._after_call, unique_id='awscan-stats-after-call')
+        events.register('after-call-error', self._after_call_error, unique_id='awscan-stats-after-call-error')
+        return self
+
+    def _key(self, model, request_context):
+        return (
+            request_context.get('awscan_check_id') or _check_id(),
+            model.service_model.service_name,
+            request_context.get('client_region') or 'global',
+            model.name
+        )
+
+    def _before_call(self, model, context, **kwargs):
+        context['awscan_check_id'] = _check_id()
+        context['awscan_started'] = time.perf_counter()
+        context['awscan_model'] = model
+
+    def _needs_retry(self, response=None, operation=None, request_dict=None, **kwargs):
+        # Fired after every attempt; only count throttled ones here
+        if not response or operation is None or request_dict is None:
+            return None
+        code = (response[1] or {}).get('Error', {}).get('Code')
+        if code in THROTTLE_CODES:
+            with self._lock:
+                self._entries[self._key(operation, request_dict.get('context', {}))]['throttles'] += 1
+        return None
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        if context.get('awscan_negative_cache'):
+            return  # answered by Core.negative_cache, no request was sent
+        elapsed = time.perf_counter() - context.get('awscan_started', time.perf_counter())
+        size = http_response.headers.get('content-length')
+        if size is None and not model.has_streaming_output:
+            size = len(http_response.content or b'')
+        retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        with self._lock:
+            entry = self._entries[self._key(model, context)]
+            entry['calls'] += 1
+            entry['retries'] += retries
+            entry['bytes'] += int(size or 0)
+            entry['latencies'].append(elapsed)
+            if 'Error' in parsed:
+                entry['errors'] += 1
+
+    def _after_call_error(self, context, **kwargs):
+        # Connection-level failures never reach after-call; this event carries no model
+        model = context.get('awscan_model')
+        if model is None:
+            return
+        elapsed = time.perf_counter() - context.get('awscan_started', time.perf_counter())
+        with self._lock:
+            entry = self._entries[self._key(model, context)]
+            entry['calls'] += 1
+            entry['errors'] += 1
+            entry['latencies'].append(elapsed)
+
+    def rows(self):
+        """Table rows, most expensive (total latency) first."""
+        with self._lock:
+            items = [(key, dict(entry, latencies=sorted(entry['latencies']))) for key, entry in self._entries.items()]
+        rows = []
+        for (check_id, service, region, operation), entry in items:
+            latencies = entry['latencies']
+            rows.append({
+                'check_id': check_id,
+                'service': service,
+                'region': region,
+                'operation': operation,
+                'calls': entry['calls'],
+                'retries': entry['retries'],
+                'throttles': entry['throttles'],
+                'errors': entry['errors'],
+                'bytes': entry['bytes'],
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                'total_ms': round(sum(latencies) * 1000, 1)
+            })
+        rows.sort(key=lambda r: r['total_ms'], reverse=True)
+        return rows
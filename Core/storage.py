@@ -0,0 +1,42 @@
+# Core/storage.py
+import gzip
+import json
+import os
+
+# Stored scan reports: gzip-compressed compact JSON, or the indented plain
+# JSON of scans saved before compression
+REPORT_SUFFIXES = ('.json.gz', '.json')
+REPORT_SUFFIX = '.json.gz'
+
+# Level 6 compresses reports within a few percent of 9, several times faster
+COMPRESSION_LEVEL = 6
+
+
+def is_report(filename):
+    return filename.lower().endswith(REPORT_SUFFIXES)
+
+
+def report_id(filename):
+    """Filename without its report suffix (scan_20250101000000)."""
+    for suffix in REPORT_SUFFIXES:
+        if filename.lower().endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def read_report(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_report(path, report):
+    """Write atomically, compressed or not according to the path's suffix."""
+    tmp_path = f"{path}.tmp"
+    if path.endswith('.gz'):
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=COMPRESSION_LEVEL) as f:
+            json.dump(report, f, separators=(',', ':'), default=str)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+    os.replace(tmp_path, path)
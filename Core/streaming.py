@@ -0,0 +1,62 @@
+# Core/streaming.py
+import queue
+import threading
+
+from Core import orchestrator
+
+
+def unit_event(unit, findings, done, total):
+    return {
+        'type': 'unit',
+        'service': unit.service,
+        'check_id': unit.check_id,
+        'region': unit.region,
+        'findings': findings,
+        'done': done,
+        'total': total
+    }
+
+
+def stream_audits(enabled_services, session, scan, audits=None, **options):
+    """
+    Run the audits on a background thread and yield their events as they
+    happen: {'type': 'plan', 'total'}, then one {'type': 'unit', ...,
+    'findings', 'done', 'total'} per finished unit, and finally
+    {'type': 'done', 'results'} (thread_audits-style results) or
+    {'type': 'error', 'error'}. audits defaults to orchestrator.thread_audits.
+    Listeners already set on the scan keep being called.
+    """
+    audits = audits or orchestrator.thread_audits
+    events = queue.Queue()
+    on_plan, on_findings = scan.on_plan, scan.on_findings
+    progress = {'done': 0, 'total': None}
+    lock = threading.Lock()
+
+    def plan_listener(units):
+        progress['total'] = len(units)
+        events.put({'type': 'plan', 'total': len(units)})
+        if on_plan is not None:
+            on_plan(units)
+
+    def findings_listener(unit, findings):
+        with lock:
+            progress['done'] += 1
+            events.put(unit_event(unit, findings, progress['done'], progress['total']))
+        if on_findings is not None:
+            on_findings(unit, findings)
+
+    def run():
+        try:
+            events.put({'type': 'done', 'results': audits(enabled_services, session, scan, **options)})
+        except Exception as e:
+            events.put({'type': 'error', 'error': str(e)})
+        finally:
+            scan.on_plan, scan.on_findings = on_plan, on_findings
+
+    scan.on_plan, scan.on_findings = plan_listener, findings_listener
+    threading.Thread(target=run, name='awscan-audits', daemon=True).start()
+    while True:
+        event = events.get()
+        yield event
+        if event['type'] in ('done', 'error'):
+            return
@@ -0,0 +1,120 @@
+# Core/trace.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Tracer:
+    """
+    Collects timed spans of a scan (phases, (service, check, region) units and
+    AWS API calls) and exports them in Chrome trace-event format, viewable in
+    chrome://tracing or Perfetto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._threads = {}
+        self._units = []
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _us(self, t):
+        return round((t - self._origin) * 1e6, 1)
+
+    def add(self, name, category, start, end, **args):
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self._events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': self._us(start),
+                'dur': round((end - start) * 1e6, 1),
+                'pid': self._pid,
+                'tid': thread.ident,
+                'args': args
+            })
+            if category == 'unit':
+                self._units.append((args['service'], args['check_id'], start, end))
+
+    @contextmanager
+    def span(self, name, category, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, time.perf_counter(), **args)
+
+    def install(self, session):
+        # One span per API call, nested inside the unit running on the same thread
+        events = session.events
+        events.register('before-call', self._before_call, unique_id='awscan-trace-before-call')
+        events.register('after-call', self._after_call, unique_id='awscan-trace-after-call')
+        events.register('after-call-error', self._after_call_error, unique_id='awscan-trace-after-call-error')
+        return self
+
+    def _before_call(self, model, context, **kwargs):
+        context['awscan_trace_started'] = time.perf_counter()
+        context['awscan_model'] = model
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        if context.get('awscan_negative_cache'):
+            return  # answered by Core.negative_cache, no request was sent
+        self.add(
+            f"{model.service_model.service_name}.{model.name}", 'api',
+            context.get('awscan_trace_started', time.perf_counter()), time.perf_counter(),
+            region=context.get('client_region'),
+            status=http_response.status_code,
+            retries=parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        )
+
+    def _after_call_error(self, context, exception=None, **kwargs):
+        model = context.get('awscan_model')
+        if model is None:
+            return
+        self.add(
+            f"{model.service_model.service_name}.{model.name}", 'api',
+            context.get('awscan_trace_started', time.perf_counter()), time.perf_counter(),
+            region=context.get('client_region'),
+            error=str(exception)
+        )
+
+    def _aggregate_spans(self, category, key):
+        # Checks and services run as many interleaved units: show them as async spans
+        bounds = {}
+        for service, check_id, start, end in self._units:
+            k = key(service, check_id)
+            first, last = bounds.get(k, (start, end))
+            bounds[k] = (min(first, start), max(last, end))
+        events = []
+        for i, (name, (start, end)) in enumerate(sorted(bounds.items())):
+            for ph, t in (('b', start), ('e', end)):
+                events.append({
+                    'name': name, 'cat': category, 'ph': ph, 'id': f"{category}-{i}",
+                    'ts': self._us(t), 'pid': self._pid, 'tid': 0
+                })
+        return events
+
+    def export(self, path):
+        with self._lock:
+            events = list(self._events)
+            events += self._aggregate_spans('service', lambda service, check_id: service)
+            events += self._aggregate_spans('check', lambda service, check_id: f"{service}:{check_id}")
+            events += [
+                {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': name}}
+                for tid, name in self._threads.items()
+            ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def span(scan, name, category, **args):
+    """Span on the scan's tracer, or a no-op when the scan is not traced."""
+    tracer = getattr(scan, 'tracer', None)
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, category, **args)
@@ -0,0 +1,170 @@
+# Core/warmup.py
+import hashlib
+import os
+import pickle
+import queue
+import threading
+
+import botocore
+from botocore.exceptions import DataNotFoundError, UnknownServiceError
+from botocore.loaders import JSONFileLoader
+
+# Model files parsed when a client is created (and when it paginates)
+MODEL_TYPES = ['service-2', 'endpoint-rule-set-1', 'paginators-1']
+
+MODEL_FILE_SUFFIXES = ('.json', '.json.gz')
+
+
+# Private per-user directory for model caches (the backend's; the CLI's --model-cache)
+DEFAULT_MODEL_CACHE = os.path.join(os.path.expanduser('~'), '.awscan', 'models')
+
+
+def _private(stat):
+    """
+    Whether a file (its os.stat result) belongs to the current user and
+    nobody else can write to it: unpickling runs code, so only the user's own
+    files are loaded.
+    """
+    if not hasattr(os, 'getuid'):
+        return False  # Windows: ownership cannot be checked this way, the cache is not used
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+class PickledModelLoader(JSONFileLoader):
+    """
+    botocore file loader keeping a pickle of every parsed model file in
+    cache_dir. Unpickling is several times faster than parsing the JSON, so
+    later processes skip most of the model loading cost.
+
+    Entries are keyed on the source file path and invalidated when its size or
+    modification time changes; the directory is per botocore version. It is
+    created private (0700), and neither it nor pickles that are not the user's
+    own and private are trusted: the JSON models are parsed instead.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.join(cache_dir, f"botocore-{botocore.__version__}")
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        self.trusted = _private(os.stat(self.cache_dir)) and _private(os.stat(cache_dir))
+        if not self.trusted:
+            print(f"Not using model cache {cache_dir}: it must be owned by this user and not writable by others")
+
+    def _source(self, file_path):
+        for suffix in MODEL_FILE_SUFFIXES:
+            if os.path.isfile(file_path + suffix):
+                return file_path + suffix
+        return None
+
+    def load_file(self, file_path):
+        source = self._source(file_path)
+        if source is None:
+            return None
+        if not self.trusted:
+            return super().load_file(file_path)
+        stat = os.stat(source)
+        version = (stat.st_size, stat.st_mtime_ns)
+        cache_path = os.path.join(
+            self.cache_dir, hashlib.sha256(source.encode('utf-8')).hexdigest() + '.pickle'
+        )
+        try:
+            with open(cache_path, 'rb') as f:
+                if not _private(os.fstat(f.fileno())):
+                    raise ValueError(f"{cache_path} is not private")
+                cached_version, data = pickle.load(f)
+            if cached_version == version:
+                return data
+        except (OSError, pickle.PickleError, EOFError, ValueError):
+            pass
+
+        data = super().load_file(file_path)
+        if data is not None:
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+                    pickle.dump((version, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"Could not cache model {source}: {e}")
+        return data
+
+
+def data_loader(session):
+    """The loader shared by every client the (boto3) session creates."""
+    return session._session.get_component('data_loader')
+
+
+class Warmup:
+    """
+    Background thread loading the service models the scan will need into the
+    session's shared loader, so that creating the first client of a service in
+    a check does not pay for parsing its model. stop() ends the thread when
+    the scan is over.
+    """
+
+    def __init__(self, session, model_cache=None):
+        self.loader = data_loader(session)
+        if model_cache:
+            self.loader.file_loader = PickledModelLoader(model_cache)
+        self._queue = queue.Queue()
+        self._requested = set()
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='awscan-warmup', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def preload(self, services):
+        """Queue the models of services (botocore service names) not requested yet."""
+        with self._lock:
+            if self._stopped:
+                return
+            for service in services:
+                if service not in self._requested:
+                    self._requested.add(service)
+                    self._queue.put(service)
+
+    def _run(self):
+        while True:
+            service = self._queue.get()
+            if service is None:
+                self._queue.task_done()
+                return
+            try:
+                for type_name in MODEL_TYPES:
+                    try:
+                        self.loader.load_service_model(service, type_name)
+                    except DataNotFoundError:
+                        pass  # e.g. services without paginators
+            except UnknownServiceError as e:
+                print(f"Cannot preload model for {service}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        self._queue.join()
+
+    def stop(self):
+        """Let the thread finish the models already queued, then end it."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._queue.put(None)
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def preload(scan, services):
+    """Queue models on the scan's warm-up thread, if it has one."""
+    warmup = getattr(scan, 'warmup', None)
+    if warmup is not None:
+        warmup.preload(services)
+
+
+def stop(scan):
+    """Stop the scan's warm-up thread, if it has one."""
+    warmup = getattr(scan, 'warmup', None)
+    if warmup is not None:
+        warmup.stop()
@@ -0,0 +1,297 @@
+# Core/workqueue.py
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import boto3
+
+from Core import orchestrator
+from Core.context import ScanContext, Unit
+from Core.negative_cache import NegativeCache
+from Core.org import assume_role_session, consolidate, render_results
+from Core.planner import Planner
+from Core.warmup import Warmup, stop
+
+# A claimed unit not finished within this many seconds is handed to another worker
+DEFAULT_LEASE = 15 * 60
+
+# Claims of a unit before it is reported as failed
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    region TEXT,
+    role_name TEXT,
+    external_id TEXT,
+    accounts TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    service TEXT NOT NULL,
+    check_id TEXT NOT NULL,
+    region TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    claimed_at REAL,
+    findings TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS units_claim ON units (state, claimed_at);
+CREATE INDEX IF NOT EXISTS units_run ON units (run_id, state);
+"""
+
+
+class WorkQueue:
+    """
+    SQLite broker of (account, service, check, region) units. Any number of
+    worker processes, on any node that can open the database file, claim units
+    with a lease, run them and store their findings.
+    """
+
+    def __init__(self, path, lease=DEFAULT_LEASE):
+        self.path = path
+        self.lease = lease
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # Autocommit; claims take the write lock explicitly with BEGIN IMMEDIATE
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def create_run(self, accounts, region, role_name=None, external_id=None):
+        run_id = uuid.uuid4().hex[:12]
+        self._connect().execute(
+            "INSERT INTO runs (run_id, created, region, role_name, external_id, accounts) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'), region, role_name, external_id,
+             json.dumps(accounts))
+        )
+        return run_id
+
+    def get_run(self, run_id):
+        row = self._connect().execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return dict(row, accounts=json.loads(row['accounts']))
+
+    def push(self, run_id, account_id, units):
+        self._connect().executemany(
+            "INSERT INTO units (run_id, account_id, service, check_id, region) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, account_id, u.service, u.check_id, u.region) for u in units]
+        )
+
+    def claim(self, worker, limit=1):
+        """Lease up to limit pending (or expired) units to worker."""
+        db = self._connect()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            claimed = []
+            last_id = 0
+            # Units past MAX_ATTEMPTS are failed rather than leased: select on until limit are leased
+            while len(claimed) < limit:
+                rows = db.execute(
+                    "SELECT * FROM units WHERE (state = 'pending' OR (state = 'claimed' AND claimed_at < ?)) "
+                    "AND id > ? ORDER BY id LIMIT ?",
+                    (now - self.lease, last_id, limit - len(claimed))
+                ).fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    last_id = row['id']
+                    if row['attempts'] >= MAX_ATTEMPTS:
+                        db.execute(
+                            "UPDATE units SET state = 'failed', error = ? WHERE id = ?",
+                            (f"Abandoned after {row['attempts']} attempts (last worker: {row['worker']})", row['id'])
+                        )
+                        continue
+                    db.execute(
+                        "UPDATE units SET state = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (worker, now, row['id'])
+                    )
+                    claimed.append(dict(row))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def complete(self, unit_id, worker, findings):
+        # Ignored if the lease expired and another worker took the unit over
+        self._connect().execute(
+            "UPDATE units SET state = 'done', findings = ? WHERE id = ? AND worker = ? AND state = 'claimed'",
+            (json.dumps(findings, default=str), unit_id, worker)
+        )
+
+    def unfinished(self, run_id, account_id):
+        """Units of the account in the run still pending or claimed."""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM units WHERE run_id = ? AND account_id = ? AND state IN ('pending', 'claimed')",
+            (run_id, account_id)
+        ).fetchone()[0]
+
+    def progress(self, run_id):
+        rows = self._connect().execute(
+            "SELECT state, COUNT(*) AS n FROM units WHERE run_id = ? GROUP BY state", (run_id,)
+        ).fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def results(self, run_id):
+        """{account_id: findings} of the run's finished units, in plan order."""
+        by_account = {}
+        for row in self._connect().execute(
+            "SELECT * FROM units WHERE run_id = ? ORDER BY id", (run_id,)
+        ):
+            findings = by_account.setdefault(row['account_id'], [])
+            if row['state'] == 'done':
+                findings.extend(json.loads(row['findings']))
+            elif row['state'] == 'failed':
+                findings.extend(orchestrator.check_failed(row['service'], row['check_id'], row['error']))
+        return by_account
+
+
+def enqueue_scan(queue, session, accounts, region, role_name=None, external_id=None):
+    """
+    Coordinator side: discover each account's services, split its scan into
+    units and push them. accounts None scans the session's own account.
+    Returns the run id.
+    """
+    if accounts is None:
+        identity = session.client('sts').get_caller_identity()
+        accounts = [{'id': identity['Account'], 'name': ''}]
+        role_name = None
+    run_id = queue.create_run(accounts, region, role_name, external_id)
+    for account in accounts:
+        account_session = session
+        if role_name:
+            account_session = assume_role_session(session, account['id'], role_name, region, external_id)
+        enabled_services = orchestrator.discover_enabled_services(account_session)
+        # Workers claim units in id order: push the longest ones first
+        units = orchestrator.plan_units(enabled_services, account_session)
+        queue.push(run_id, account['id'], Planner(account_session).order(units))
+    return run_id
+
+
+def wait_for_run(queue, run_id, interval=5, on_progress=None):
+    while True:
+        progress = queue.progress(run_id)
+        if on_progress is not None:
+            on_progress(progress)
+        if not progress.get('pending') and not progress.get('claimed'):
+            return progress
+        time.sleep(interval)
+
+
+def merge_run(queue, run_id):
+    """Consolidated report of a finished run (same layout as the org report)."""
+    run = queue.get_run(run_id)
+    results = queue.results(run_id)
+    entries = []
+    for account in run['accounts']:
+        findings = results.get(account['id'], [])
+        entries.append({
+            'account_id': account['id'],
+            'name': account['name'],
+            'status': 'OK',
+            'error': None,
+            'services': render_results(account['id'], [findings])
+        })
+    report = consolidate(entries, run['role_name'])
+    report.update(run_id=run_id, timestamp=run['created'])
+    return report
+
+
+class Worker:
+    """Claims units from the queue and runs them with the existing check functions."""
+
+    def __init__(self, queue, threads=orchestrator.MAX_WORKERS, model_cache=None):
+        self.queue = queue
+        self.threads = threads
+        self.model_cache = model_cache
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _scan_context(self, run_id, account_id):
+        # One session and scan context per (run, account), shared by the worker's threads
+        key = (run_id, account_id)
+        with self._lock:
+            if key not in self._sessions:
+                run = self.queue.get_run(run_id)
+                session = boto3.session.Session(region_name=run['region'])
+                if run['role_name']:
+                    session = assume_role_session(
+                        session, account_id, run['role_name'], run['region'], run['external_id']
+                    )
+                self._sessions[key] = (session, ScanContext(
+                    warmup=Warmup(session, self.model_cache).start(),
+                    negative_cache=NegativeCache().install(session)
+                ))
+            return self._sessions[key]
+
+    def _release(self, finished_only=True):
+        # Drop the scan context of accounts whose units of the run are all finished (or of every
+        # account), stopping its warm-up thread; a unit handed back later creates a new one
+        with self._lock:
+            for key in list(self._sessions):
+                if not finished_only or not self.queue.unfinished(*key):
+                    _, scan = self._sessions.pop(key)
+                    stop(scan)
+
+    def run_one(self, row):
+        try:
+            session, scan = self._scan_context(row['run_id'], row['account_id'])
+            unit = Unit(row['service'], row['check_id'], row['region'])
+            findings = orchestrator.run_unit(unit, session, scan)
+        except Exception as e:
+            # e.g. the role could not be assumed: record it against the unit
+            findings = orchestrator.check_failed(row['service'], row['check_id'], e)
+        self.queue.complete(row['id'], self.name, findings)
+        return row
+
+    def run(self, exit_when_empty=True, interval=5, on_unit=None):
+        """
+        Process units until the queue is empty (or forever, polling every
+        interval seconds), keeping `threads` units in flight: a unit is
+        claimed as soon as another one finishes.
+        """
+        running = set()
+        try:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                while True:
+                    if len(running) < self.threads:
+                        rows = self.queue.claim(self.name, limit=self.threads - len(running))
+                        running.update(executor.submit(self.run_one, row) for row in rows)
+                    if not running:
+                        if exit_when_empty:
+                            return
+                        time.sleep(interval)
+                        continue
+                    # The timeout lets units pushed meanwhile fill idle threads
+                    done, running = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        row = future.result()
+                        if on_unit is not None:
+                            on_unit(row)
+                    if done:
+                        self._release()
+        finally:
+            # After the pool has waited for the units still running
+            self._release(finished_only=False)
@@ -0,0 +1,69 @@
+# benchmarks/startup.py
+"""
+Cold-start guard for the awscan CLI.
+
+Imports Cli.main in fresh interpreters and fails (exit code 1) when the
+median import time exceeds the budget, or when a module that should only
+load once a scan runs (boto3, tabulate, the orchestrator...) is imported
+up front.
+
+    python benchmarks/startup.py [--runs 10] [--budget-ms 100]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules `awscan --help` must not pay for
+LAZY_MODULES = [
+    'boto3', 'botocore', 'tabulate', 'pyfiglet',
+    'Core.orchestrator', 'Core.events', 'Core.stats', 'Core.trace', 'Core.profiling', 'Core.warmup', 'Core.aio',
+    'Core.org'
+]
+
+PROBE = (
+    "import sys, time; start = time.perf_counter(); import Cli.main; "
+    "elapsed = time.perf_counter() - start; "
+    "print(elapsed); print(','.join(m for m in {lazy!r} if m in sys.modules))"
+)
+
+
+def measure(runs):
+    timings, loaded = [], set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE.format(lazy=LAZY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        elapsed, modules = (result.stdout.splitlines() + [''])[:2]
+        timings.append(float(elapsed) * 1000)
+        loaded.update(m for m in modules.split(',') if m)
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to start.')
+    parser.add_argument('--budget-ms', type=float, default=100.0, help='Maximum median import time of Cli.main.')
+    args = parser.parse_args()
+
+    timings, loaded = measure(args.runs)
+    median = statistics.median(timings)
+    print(f"import Cli.main: median {median:.1f} ms, min {min(timings):.1f} ms, "
+          f"max {max(timings):.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(sorted(loaded))}")
+        failed = True
+    if median > args.budget_ms:
+        print("FAIL: median import time over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,10 @@ setup(
         "click",
         "boto3"
     ],
+    extras_require={
+        "asyncio": ["aiobotocore"],  # --engine asyncio
+        "test": ["pytest", "moto", "flask", "flask-cors"],
+    },
     entry_points={
         "console_scripts": [
             "awscan=Cli.main:main",  # This installs a CLI command named `cis-audit`
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend imports its modules by name (python app.py from webinterface/backend)
+for path in (ROOT, os.path.join(ROOT, 'webinterface', 'backend')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,37 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.credentials import Credentials, DeferredRefreshableCredentials
+
+pytest.importorskip('aiobotocore')
+
+from Core.aio import async_credentials  # noqa: E402
+
+
+def test_static_credentials_are_copied():
+    frozen = asyncio.run(async_credentials(Credentials('AK', 'SK', 'TK')).get_frozen_credentials())
+    assert (frozen.access_key, frozen.secret_key, frozen.token) == ('AK', 'SK', 'TK')
+
+
+def test_refreshable_credentials_refresh_through_the_session():
+    fetched = []
+
+    def fetch():
+        fetched.append(None)
+        # Already inside the refresh window: every use fetches again
+        expiry = datetime.now(timezone.utc) + timedelta(minutes=5)
+        return {'access_key': f"AK{len(fetched)}", 'secret_key': 'SK', 'token': 'TK',
+                'expiry_time': expiry.isoformat()}
+
+    credentials = async_credentials(DeferredRefreshableCredentials(refresh_using=fetch, method='assume-role'))
+
+    async def keys():
+        return [(await credentials.get_frozen_credentials()).access_key for _ in range(2)]
+
+    first, second = asyncio.run(keys())
+    assert first != second
+    assert credentials.method == 'assume-role'
+    # aiobotocore reads these when building clients
+    assert credentials.get_deferred_property('method')() == 'assume-role'
+    assert credentials.get_account_id() is None
@@ -0,0 +1,102 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from Core import budget
+from Core.budget import FairScheduler, RequestBudget
+
+
+def test_requests_within_the_burst_do_not_wait():
+    scheduler = FairScheduler(account_rate=10, service_rate=10, service_rates={})
+    started = time.monotonic()
+    for _ in range(10):
+        scheduler.acquire('scan', 'acct', 'iam')
+    assert time.monotonic() - started < 0.1
+    assert scheduler.waited('scan') < 0.1
+
+
+def test_service_rate_limits_sustained_requests():
+    scheduler = FairScheduler(account_rate=100, service_rate=20, service_rates={})
+    started = time.monotonic()
+    for _ in range(30):
+        scheduler.acquire('scan', 'acct', 'iam')
+    # 20 from the burst, 10 more at 20/s
+    assert time.monotonic() - started == pytest.approx(0.5, abs=0.15)
+
+
+def test_account_rate_is_shared_by_its_services():
+    scheduler = FairScheduler(account_rate=10, service_rate=100, service_rates={})
+    started = time.monotonic()
+    for service in ['iam', 's3'] * 8:
+        scheduler.acquire('scan', 'acct', service)
+    assert time.monotonic() - started == pytest.approx(0.6, abs=0.15)
+
+
+def test_accounts_have_separate_budgets():
+    scheduler = FairScheduler(account_rate=5, service_rate=5, service_rates={})
+    for account in ('a', 'b'):
+        for _ in range(5):
+            scheduler.acquire('scan', account, 'iam')
+    assert scheduler.waited('scan') < 0.1
+
+
+def test_small_scan_is_not_starved_by_a_large_one():
+    scheduler = FairScheduler(account_rate=50, service_rate=50, service_rates={})
+    finished = {}
+
+    def scan(flow, requests):
+        for _ in range(requests):
+            scheduler.acquire(flow, 'acct', 'ec2')
+        finished[flow] = time.monotonic()
+
+    big = threading.Thread(target=scan, args=('big', 150))
+    big.start()
+    time.sleep(0.2)  # the big scan has used the burst and queues
+    small = threading.Thread(target=scan, args=('small', 10))
+    small.start()
+    small.join()
+    big.join()
+    # Served alternately with the big scan: about 20 requests at 50/s, not the big scan's backlog
+    assert finished['small'] < finished['big'] - 1
+    assert scheduler.waited('small') < 0.8
+
+
+def test_forget_drops_the_flow_state():
+    scheduler = FairScheduler()
+    scheduler.acquire('scan', 'acct', 'iam')
+    scheduler.forget('scan')
+    assert scheduler.waited('scan') == 0
+    assert not any(key[0] == 'scan' for key in scheduler._finish)
+
+
+def test_budget_is_off_by_default():
+    assert not budget.enabled()
+    scheduler = FairScheduler()
+    started = time.monotonic()
+    assert all(scheduler.acquire('scan', 'acct', 'iam', count=50) == 50 for _ in range(20))
+    assert time.monotonic() - started < 0.1
+
+
+def test_batches_are_capped_by_the_rates():
+    scheduler = FairScheduler(account_rate=100, service_rate=3, service_rates={})
+    assert scheduler.acquire('scan', 'acct', 'iam', count=5) == 3
+
+
+class CountingScheduler:
+    def __init__(self):
+        self.calls = 0
+
+    def acquire(self, flow, account, service, weight=1, count=1):
+        self.calls += 1
+        return count
+
+
+def test_request_budget_spends_batches_locally():
+    scheduler = CountingScheduler()
+    request_budget = RequestBudget(scheduler, 'scan', 'acct', batch=5)
+    for service in ['iam'] * 10 + ['s3']:
+        request_budget._before_call(SimpleNamespace(service_model=SimpleNamespace(service_name=service)))
+    # Two batches of IAM tokens, one of S3
+    assert scheduler.calls == 3
@@ -0,0 +1,107 @@
+import boto3
+import pytest
+
+from Core.Checks.ec2_audit import check_cis_2_13
+from Core.events import in_scope, merge_into_scan, plan_targets
+
+
+def finding(check_id, resource, status='FAIL', service='rds'):
+    return {'check_id': check_id, 'status': status, 'service': service, 'resource': resource}
+
+
+def report(service, findings):
+    return {'services': [service], 'raw_results': [findings]}
+
+
+def test_merge_drops_deleted_resources_in_target_region():
+    stored = report('rds', [
+        finding('CIS-2.2.1', 'db-1 (us-east-1)'),
+        finding('CIS-2.2.1', 'db-2 (eu-west-1)'),
+        finding('CIS-2.2.2', 'db-1 (us-east-1)'),
+    ])
+    # db-1 was deleted: the re-run in us-east-1 finds nothing
+    merge_into_scan(stored, {('rds', 'CIS-2.2.1'): {'regions': ['us-east-1']}}, {})
+    assert stored['raw_results'][0] == [
+        finding('CIS-2.2.1', 'db-2 (eu-west-1)'),
+        finding('CIS-2.2.2', 'db-1 (us-east-1)'),
+    ]
+
+
+def test_merge_replaces_findings_under_a_new_resource_name():
+    stored = report('logging', [
+        finding('CIS-3.1', 'us-east-1', service='logging'),
+        finding('CIS-3.1', 'us-west-2', service='logging'),
+    ])
+    rerun = [finding('CIS-3.1', 'main (us-east-1)', status='PASS', service='logging')]
+    merge_into_scan(stored, {('logging', 'CIS-3.1'): {'regions': ['us-east-1']}}, {'logging': rerun})
+    assert stored['raw_results'][0] == [finding('CIS-3.1', 'us-west-2', service='logging')] + rerun
+
+
+def test_merge_whole_check_rerun_replaces_every_finding():
+    stored = report('efs', [finding('CIS-2.3.1', 'fs-1 (us-east-1)'), finding('CIS-2.3.1', 'fs-2 (eu-west-1)')])
+    merge_into_scan(stored, {('efs', 'CIS-2.3.1'): {}}, {'efs': []})
+    assert stored['raw_results'][0] == []
+
+
+def test_merge_adds_new_services():
+    stored = report('iam', [])
+    merge_into_scan(stored, {('s3', 'CIS-2.1.1'): {}}, {'s3': [finding('CIS-2.1.1', 'b', service='s3')]})
+    assert stored['services'] == ['iam', 's3']
+    # A re-run without findings does not add an empty service
+    merge_into_scan(stored, {('efs', 'CIS-2.3.1'): {}}, {})
+    assert stored['services'] == ['iam', 's3']
+
+
+@pytest.mark.parametrize('resource, target, expected', [
+    ('alice', {'users': ['alice']}, True),
+    ('alice (AccessKey AKIA1)', {'users': ['alice']}, True),
+    ('alicia', {'users': ['alice']}, False),
+    ('my-bucket', {'buckets': [{'Name': 'my-bucket'}]}, True),
+    ('CloudTrail (Region: eu-west-1)', {'regions': ['eu-west-1']}, True),
+    ('S3 Buckets in eu-west-1', {'regions': ['eu-west-1']}, True),
+    ('CloudTrail (Region: eu-west-1)', {'regions': ['us-east-1']}, False),
+    ('i-1', {'instance_ids': {'eu-west-1': ['i-1']}}, True),
+    ('No EC2 Instances', {'instance_ids': {'eu-west-1': ['i-1']}}, False),
+    (None, {'users': ['alice']}, True),
+])
+def test_in_scope(resource, target, expected):
+    assert in_scope(finding('X', resource), target) is expected
+
+
+def test_plan_targets_keeps_the_event_region_of_instances():
+    records = [
+        {'eventName': 'RunInstances', 'awsRegion': 'eu-west-1',
+         'responseElements': {'instancesSet': {'items': [{'instanceId': 'i-2'}, {'instanceId': 'i-1'}]}}},
+        {'eventName': 'ModifyInstanceAttribute', 'awsRegion': 'us-east-1',
+         'requestParameters': {'instanceId': 'i-3'}},
+    ]
+    targets = plan_targets(records, ['ec2'])
+    assert targets[('ec2', 'CIS-2.13')] == {'instance_ids': {'eu-west-1': ['i-1', 'i-2'], 'us-east-1': ['i-3']}}
+    assert targets[('ec2', 'CIS-2.7')] == {}
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    moto = pytest.importorskip('moto')
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+    with moto.mock_aws():
+        yield boto3.session.Session(region_name='us-east-1')
+
+
+def run_instance(session, region):
+    ec2 = session.client('ec2', region_name=region)
+    image = ec2.describe_images()['Images'][0]['ImageId']
+    return ec2.run_instances(ImageId=image, MinCount=1, MaxCount=1)['Instances'][0]['InstanceId']
+
+
+def test_targeted_instances_are_looked_up_in_their_region(aws):
+    instance_id = run_instance(aws, 'eu-west-1')
+    findings = check_cis_2_13(aws, instance_ids={'eu-west-1': [instance_id]})
+    assert [(f['resource'], f['status']) for f in findings] == [(instance_id, 'PASS')]
+
+
+def test_terminated_targeted_instance_reports_nothing(aws):
+    instance_id = run_instance(aws, 'eu-west-1')
+    aws.client('ec2', region_name='eu-west-1').terminate_instances(InstanceIds=[instance_id])
+    assert check_cis_2_13(aws, instance_ids={'eu-west-1': [instance_id, 'i-0123456789abcdef0']}) == []
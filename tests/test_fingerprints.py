@@ -0,0 +1,32 @@
+import time
+
+from Core.fingerprints import FingerprintStore, fingerprint
+
+
+def store_with_entry(tmp_path):
+    store = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+    store.record('CIS-1.10', 'alice', fingerprint('row'), [{'check_id': 'CIS-1.10', 'status': 'PASS'}])
+    store.save()
+    return FingerprintStore(str(tmp_path / 'fingerprints.json'))
+
+
+def test_unchanged_fingerprint_is_carried_forward(tmp_path):
+    findings = store_with_entry(tmp_path).lookup('CIS-1.10', 'alice', fingerprint('row'))
+    assert findings == [{'check_id': 'CIS-1.10', 'status': 'PASS', 'evaluation': 'carried_forward'}]
+
+
+def test_changed_fingerprint_is_re_evaluated(tmp_path):
+    assert store_with_entry(tmp_path).lookup('CIS-1.10', 'alice', fingerprint('other row')) is None
+
+
+def test_snapshot_older_than_the_evaluation_is_not_trusted(tmp_path):
+    store = store_with_entry(tmp_path)
+    # A credential report generated before the previous evaluation may miss changes made since
+    assert store.lookup('CIS-1.10', 'alice', fingerprint('row'), as_of=time.time() - 3600) is None
+    assert store.lookup('CIS-1.10', 'alice', fingerprint('row'), as_of=time.time() + 1) is not None
+
+
+def test_expired_entries_are_re_evaluated(tmp_path):
+    store = store_with_entry(tmp_path)
+    store.max_age = -1
+    assert store.lookup('CIS-1.10', 'alice', fingerprint('row')) is None
@@ -0,0 +1,64 @@
+import pytest
+
+from index import ScanIndex, decode_cursor, encode_cursor
+
+
+def finding(i, service='s3', status='PASS'):
+    return {'check_id': f"CIS-{i % 3}", 'status': status, 'service': service, 'resource': f"bucket-{i:03d}"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    report = {
+        'timestamp': '2026-01-01 00:00:00 UTC',
+        'services': ['s3', 'iam'],
+        'raw_results': [
+            [finding(i, status='FAIL' if i % 2 else 'PASS') for i in range(25)],
+            [finding(i, service='iam') for i in range(25, 30)],
+        ]
+    }
+    (tmp_path / 'scan_20260101000000.json').write_text('{}')
+    index = ScanIndex(str(tmp_path / 'state' / 'index.db'))
+    index.add(str(tmp_path), 'scan_20260101000000.json', report)
+    return index
+
+
+def pages(index, **filters):
+    cursor, result = None, []
+    while True:
+        findings, cursor = index.findings('scan_20260101000000', cursor=cursor, **filters)
+        result.append(findings)
+        if cursor is None:
+            return result
+
+
+def test_cursor_pages_cover_every_finding_once_in_order(index):
+    result = pages(index, limit=7)
+    assert [len(page) for page in result] == [7, 7, 7, 7, 2]
+    resources = [f['resource'] for page in result for f in page]
+    assert resources == [f"bucket-{i:03d}" for i in range(30)]
+
+
+def test_last_full_page_has_no_next_cursor(index):
+    findings, cursor = index.findings('scan_20260101000000', limit=30)
+    assert len(findings) == 30 and cursor is None
+
+
+def test_filters_apply_across_pages(index):
+    result = pages(index, service='s3', status='FAIL', limit=5)
+    findings = [f for page in result for f in page]
+    assert len(findings) == 12
+    assert all(f['status'] == 'FAIL' and f['service'] == 's3' for f in findings)
+
+
+def test_comma_separated_values_and_resource_prefix(index):
+    findings, _ = index.findings('scan_20260101000000', check_id='CIS-0,CIS-1', resource='bucket-00', limit=100)
+    assert [f['resource'] for f in findings] == ['bucket-000', 'bucket-001', 'bucket-003', 'bucket-004',
+                                                 'bucket-006', 'bucket-007', 'bucket-009']
+
+
+def test_cursor_round_trip_and_invalid_cursors(index):
+    assert decode_cursor(encode_cursor(42)) == 42
+    for cursor in ('garbage', encode_cursor(1)[:-2] + '!!', 'b2Zmc2V0OjE'):  # last: "offset:1"
+        with pytest.raises(ValueError):
+            index.findings('scan_20260101000000', cursor=cursor)
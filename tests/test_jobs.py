@@ -0,0 +1,67 @@
+import pytest
+
+flask = pytest.importorskip('flask')
+
+BODY = {'access_key': 'AK', 'secret_key': 'SK', 'region': 'eu-west-1'}
+
+
+class FakeJobs:
+    def __init__(self):
+        self.submitted = []
+        self.store = self
+
+    def submit(self, credentials, params, max_age=None):
+        self.submitted.append(params)
+        return 'job1', 'new'
+
+    def get(self, job_id):
+        return {'job_id': job_id, 'state': 'queued', 'done': 0, 'total': None}
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    import scans
+    jobs = FakeJobs()
+    monkeypatch.setattr(scans, 'job_manager', lambda: jobs)
+    return jobs
+
+
+@pytest.fixture
+def client(jobs):
+    import scans
+    app = flask.Flask(__name__)
+    app.register_blueprint(scans.bp, url_prefix='/scans')
+    return app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/scans/jobs', '/scans/run'])
+def test_submit_returns_the_job_at_once(client, jobs, path):
+    response = client.post(path, json=BODY)
+    assert response.status_code == 202
+    assert response.headers['Location'] == '/scans/jobs/job1'
+    job = response.get_json()
+    assert (job['state'], job['origin']) == ('queued', 'new')
+    assert job['events'] == '/scans/jobs/job1/events'
+    assert jobs.submitted == [{'region': 'eu-west-1', 'incremental': False, 'timeout': 600.0}]
+
+
+def test_invalid_requests_are_refused(client, jobs):
+    response = client.post('/scans/jobs', json={'access_key': 'AK'})
+    assert response.status_code == 400
+    assert jobs.submitted == []
+
+
+def test_events_of_unknown_jobs(client):
+    assert client.get('/scans/jobs/nope/events').status_code == 404
+
+
+def test_scan_key_covers_every_scan_param(monkeypatch):
+    moto = pytest.importorskip('moto')
+    from jobs import scan_key
+    credentials = {'access_key': 'testing', 'secret_key': 'testing'}
+    params = {'region': 'us-east-1', 'incremental': False, 'timeout': 600.0}
+    with moto.mock_aws():
+        account_id, key = scan_key(credentials, params)
+        assert scan_key(credentials, dict(params)) == (account_id, key)
+        for changed in ({'region': 'eu-west-1'}, {'incremental': True}, {'timeout': 60.0}):
+            assert scan_key(credentials, dict(params, **changed))[1] != key
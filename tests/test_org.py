@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from Core import org
+
+
+class RotatingSession:
+    """Session whose temporary credentials change every time they are read."""
+
+    def __init__(self):
+        self.reads = 0
+
+    def get_credentials(self):
+        return self
+
+    def get_frozen_credentials(self):
+        self.reads += 1
+        return SimpleNamespace(access_key=f"AK{self.reads}", secret_key='SK', token='TK')
+
+
+def test_each_account_gets_fresh_credentials(monkeypatch):
+    handed_out = {}
+
+    def scan_account(account, credentials, *args, **options):
+        handed_out[account['id']] = credentials[0]
+        return {'account_id': account['id'], 'name': '', 'status': 'OK', 'error': None, 'services': {}}
+
+    monkeypatch.setattr(org, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(org, 'scan_account', scan_account)
+    accounts = [{'id': str(i), 'name': ''} for i in range(5)]
+
+    report = org.scan_organization(accounts, RotatingSession(), 'us-east-1', processes=2)
+
+    assert report['accounts_scanned'] == 5
+    assert sorted(handed_out.values()) == [f"AK{i}" for i in range(1, 6)]
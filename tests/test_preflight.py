@@ -0,0 +1,38 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from Core.context import ScanContext
+from Core.preflight import Preflight
+from Core.stats import ApiStats
+
+
+@pytest.fixture
+def session(monkeypatch):
+    moto = pytest.importorskip('moto')
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+    with moto.mock_aws():
+        yield boto3.session.Session(region_name='us-east-1')
+
+
+def deny_simulation(self, actions):
+    raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'denied'}}, 'SimulatePrincipalPolicy')
+
+
+def test_probes_are_accounted_to_the_preflight(session, monkeypatch):
+    monkeypatch.setattr(Preflight, 'simulate', deny_simulation)
+    stats = ApiStats().install(session)
+    preflight = Preflight(session, ScanContext(stats=stats)).run(['s3', 'ec2'])
+    assert preflight.method == 'probe'
+    rows = stats.rows()
+    assert rows and {row['check_id'] for row in rows} == {'preflight'}
+
+
+def test_unexpected_simulation_errors_are_not_swallowed(session, monkeypatch):
+    def broken(self, actions):
+        raise KeyError('EvaluationResults')
+
+    monkeypatch.setattr(Preflight, 'simulate', broken)
+    with pytest.raises(KeyError):
+        Preflight(session).run(['s3'])
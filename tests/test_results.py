@@ -0,0 +1,92 @@
+import gzip
+import json
+
+import pytest
+
+flask = pytest.importorskip('flask')
+
+from Core.storage import write_report  # noqa: E402
+
+REPORT = {'timestamp': '2026-01-01 00:00:00 UTC', 'services': ['s3'],
+          'raw_results': [[{'check_id': 'CIS-2.1.1', 'status': 'PASS', 'resource': f"b{i}"} for i in range(50)]]}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import scans
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scans, '_index', None)
+    (tmp_path / 'scans').mkdir()
+    write_report(str(tmp_path / 'scans' / 'scan_20260101000000.json.gz'), REPORT)
+    write_report(str(tmp_path / 'scans' / 'scan_20250101000000.json'), REPORT)
+    app = flask.Flask(__name__)
+    app.register_blueprint(scans.bp, url_prefix='/scans')
+    return app.test_client()
+
+
+GZ = '/scans/results/scan_20260101000000.json.gz'
+
+
+def test_gzip_clients_get_the_stored_file(client, tmp_path):
+    response = client.get(GZ, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.data == (tmp_path / 'scans' / 'scan_20260101000000.json.gz').read_bytes()
+    assert json.loads(gzip.decompress(response.data)) == REPORT
+
+
+def test_other_clients_get_it_decompressed(client):
+    response = client.get(GZ)
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == REPORT
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'identity'])
+def test_if_none_match_returns_304(client, encoding):
+    first = client.get(GZ, headers={'Accept-Encoding': encoding})
+    etag = first.headers['ETag']
+    second = client.get(GZ, headers={'Accept-Encoding': encoding, 'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_etags_differ_per_encoding(client):
+    gzipped = client.get(GZ, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    plain = client.get(GZ).headers['ETag']
+    assert gzipped != plain
+    # A representation's ETag does not validate the other one
+    assert client.get(GZ, headers={'If-None-Match': gzipped}).status_code == 200
+
+
+def test_range_of_the_decompressed_report(client):
+    body = client.get(GZ).data
+    response = client.get(GZ, headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f"bytes 10-19/{len(body)}"
+    assert response.data == body[10:20]
+
+
+def test_json_name_finds_the_compressed_report(client):
+    assert client.get('/scans/results/scan_20260101000000.json').get_json() == REPORT
+
+
+def test_plain_reports_keep_conditional_requests(client):
+    url = '/scans/results/scan_20250101000000.json'
+    first = client.get(url)
+    assert first.get_json() == REPORT
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_unknown_and_escaping_names_are_404(client):
+    assert client.get('/scans/results/scan_19990101000000.json').status_code == 404
+    assert client.get('/scans/results/../secret.json').status_code == 404
+
+
+@pytest.mark.parametrize('name', ['state/jobs.db', 'state/index.db', 'state/old.json.gz'])
+def test_backend_state_is_not_served(client, tmp_path, name):
+    (tmp_path / 'scans' / 'state').mkdir()
+    (tmp_path / 'scans' / name).write_bytes(b'private')
+    assert client.get(f"/scans/results/{name}").status_code == 404
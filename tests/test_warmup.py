@@ -0,0 +1,62 @@
+import os
+
+import boto3
+import pytest
+
+from Core.context import ScanContext
+from Core.warmup import Warmup, stop
+
+
+def test_stop_ends_the_thread_after_the_queued_models():
+    session = boto3.session.Session(region_name='us-east-1')
+    warmup = Warmup(session).start()
+    warmup.preload(['sts', 'iam'])
+    warmup.stop()
+    assert not warmup._thread.is_alive()
+    assert warmup.loader.load_service_model('sts', 'service-2')
+    # Nothing left to wait for once stopped
+    warmup.preload(['ec2'])
+    warmup.wait()
+
+
+def test_stop_helper_is_a_noop_without_warmup():
+    stop(ScanContext())
+    stop(None)
+
+
+def test_stop_before_start():
+    Warmup(boto3.session.Session(region_name='us-east-1')).stop()
+
+
+def test_model_cache_is_private_and_reused(tmp_path):
+    from botocore.loaders import Loader
+    from Core.warmup import PickledModelLoader
+    loader = PickledModelLoader(str(tmp_path / 'models'))
+    assert loader.trusted
+    assert oct(os.stat(loader.cache_dir).st_mode & 0o777) == '0o700'
+    path = os.path.join(Loader.BUILTIN_DATA_PATH, 'sts', '2011-06-15', 'service-2')
+    model = loader.load_file(path)
+    pickles = os.listdir(loader.cache_dir)
+    assert len(pickles) == 1
+    assert oct(os.stat(os.path.join(loader.cache_dir, pickles[0])).st_mode & 0o777) == '0o600'
+    assert PickledModelLoader(str(tmp_path / 'models')).load_file(path) == model
+
+
+def test_pickles_others_can_write_are_not_loaded(tmp_path, monkeypatch):
+    import pickle
+    from botocore.loaders import Loader
+    from Core.warmup import PickledModelLoader
+    loader = PickledModelLoader(str(tmp_path / 'models'))
+    path = os.path.join(Loader.BUILTIN_DATA_PATH, 'sts', '2011-06-15', 'service-2')
+    loader.load_file(path)
+    cache_path = os.path.join(loader.cache_dir, os.listdir(loader.cache_dir)[0])
+    os.chmod(cache_path, 0o666)
+    monkeypatch.setattr(pickle, 'load', lambda f: pytest.fail('unpickled a world-writable file'))
+    assert loader.load_file(path)['metadata']['serviceId'] == 'STS'
+
+
+def test_shared_cache_directory_is_not_used(tmp_path):
+    from Core.warmup import PickledModelLoader
+    os.makedirs(tmp_path / 'models')
+    os.chmod(tmp_path / 'models', 0o777)
+    assert not PickledModelLoader(str(tmp_path / 'models')).trusted
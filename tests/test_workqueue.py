@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from Core.context import Unit
+from Core.workqueue import MAX_ATTEMPTS, WorkQueue, Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / 'queue.db'))
+
+
+def push(queue, count, account_id='111111111111'):
+    run_id = queue.create_run([{'id': account_id, 'name': ''}], 'us-east-1')
+    queue.push(run_id, account_id, [Unit('s3', f"CIS-{i}", None) for i in range(count)])
+    return run_id
+
+
+def expire(queue, attempts):
+    # Leases taken long ago by a worker that disappeared
+    queue._connect().execute(
+        "UPDATE units SET state = 'claimed', worker = 'gone', claimed_at = ?, attempts = ? WHERE id IN "
+        "(SELECT id FROM units ORDER BY id LIMIT 2)",
+        (time.time() - 2 * queue.lease, attempts)
+    )
+
+
+def test_claim_leases_up_to_limit_in_order(queue):
+    push(queue, 5)
+    first = queue.claim('a', limit=2)
+    second = queue.claim('b', limit=10)
+    assert [r['check_id'] for r in first] == ['CIS-0', 'CIS-1']
+    assert [r['check_id'] for r in second] == ['CIS-2', 'CIS-3', 'CIS-4']
+    assert queue.claim('c', limit=10) == []
+
+
+def test_claim_takes_over_expired_leases(queue):
+    run_id = push(queue, 3)
+    expire(queue, attempts=1)
+    rows = queue.claim('a', limit=3)
+    assert [r['check_id'] for r in rows] == ['CIS-0', 'CIS-1', 'CIS-2']
+    assert queue.progress(run_id) == {'claimed': 3}
+
+
+def test_claim_looks_past_exhausted_units(queue):
+    run_id = push(queue, 3)
+    expire(queue, attempts=MAX_ATTEMPTS)
+    # The first two rows of the window are failed, not leased: the third still is
+    rows = queue.claim('a', limit=2)
+    assert [r['check_id'] for r in rows] == ['CIS-2']
+    assert queue.progress(run_id) == {'failed': 2, 'claimed': 1}
+
+
+def test_completion_of_a_lost_lease_is_ignored(queue):
+    push(queue, 1)
+    row, = queue.claim('a')
+    queue._connect().execute("UPDATE units SET worker = 'b' WHERE id = ?", (row['id'],))
+    queue.complete(row['id'], 'a', [])
+    assert queue.progress(row['run_id']) == {'claimed': 1}
+
+
+def test_worker_releases_finished_accounts(queue):
+    run_id = push(queue, 2)
+    worker = Worker(queue, threads=2)
+    session, scan = worker._scan_context(run_id, '111111111111')
+    first, second = queue.claim(worker.name, limit=2)
+    queue.complete(first['id'], worker.name, [])
+    worker._release()
+    assert (run_id, '111111111111') in worker._sessions
+    queue.complete(second['id'], worker.name, [])
+    worker._release()
+    assert worker._sessions == {}
+    assert not scan.warmup._thread.is_alive()
+
+
+def test_worker_claims_as_units_finish(queue, monkeypatch):
+    push(queue, 3)
+    worker = Worker(queue, threads=2)
+    third_started = threading.Event()
+
+    def run_one(row):
+        if row['check_id'] == 'CIS-2':
+            third_started.set()
+        elif row['check_id'] == 'CIS-0':
+            # A slow unit must not hold back the thread CIS-1 frees
+            assert third_started.wait(timeout=5)
+        queue.complete(row['id'], worker.name, [])
+        return row
+
+    monkeypatch.setattr(worker, 'run_one', run_one)
+    finished = []
+    worker.run(interval=0.1, on_unit=lambda row: finished.append(row['check_id']))
+    assert finished[0] == 'CIS-1'
+    assert sorted(finished) == ['CIS-0', 'CIS-1', 'CIS-2']
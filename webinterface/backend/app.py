@@ -2,7 +2,8 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from scans import bp
 app = Flask(__name__)
-CORS(app) 
+# Paging headers of GET /scans/ must be readable by the frontend
+CORS(app, expose_headers=['X-Total-Count', 'Link'])
 app.register_blueprint(bp, url_prefix='/scans')
 @app.route('/api/run-audit', methods=['POST'])
 def run_audit():
@@ -0,0 +1,257 @@
+# backend/index.py
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from Core.storage import is_report, read_report, report_id
+
+# Scans listed per page when the request does not say, and at most
+DEFAULT_PAGE = 100
+MAX_PAGE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    pdf TEXT,
+    mtime REAL NOT NULL,
+    timestamp TEXT,
+    account_id TEXT,
+    region TEXT,
+    services TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    statuses TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_timestamp ON scans (timestamp);
+CREATE INDEX IF NOT EXISTS scans_account ON scans (account_id, timestamp);
+CREATE TABLE IF NOT EXISTS scan_services (
+    scan_id TEXT NOT NULL,
+    service TEXT NOT NULL,
+    PRIMARY KEY (service, scan_id)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    scan_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    service TEXT,
+    status TEXT,
+    check_id TEXT,
+    resource TEXT,
+    finding TEXT NOT NULL,
+    PRIMARY KEY (scan_id, seq)
+);
+CREATE INDEX IF NOT EXISTS findings_status ON findings (scan_id, status, seq);
+CREATE INDEX IF NOT EXISTS findings_service ON findings (scan_id, service, seq);
+CREATE INDEX IF NOT EXISTS findings_check ON findings (scan_id, check_id, seq);
+CREATE INDEX IF NOT EXISTS findings_resource ON findings (scan_id, resource);
+"""
+
+# Bumped when the index gains data older rows lack: sync() then re-reads every report
+SCHEMA_VERSION = 1
+
+# Findings returned per page when the request does not say, and at most
+DEFAULT_FINDINGS_PAGE = 100
+MAX_FINDINGS_PAGE = 1000
+
+# Account in the "validate" message of reports written before they had account_id
+_ACCOUNT_RE = re.compile(r"account: (\d{12})")
+
+
+def scan_id(filename):
+    return report_id(filename)
+
+
+def summarize(report):
+    """Index row fields of a report (the JSON saved by run_scan_and_save_pdf)."""
+    statuses = {}
+    for group in report.get('raw_results', []):
+        for finding in group:
+            status = finding.get('status', 'UNKNOWN')
+            statuses[status] = statuses.get(status, 0) + 1
+    account_id = report.get('account_id')
+    if account_id is None:
+        match = _ACCOUNT_RE.search(str(report.get('validate', '')))
+        account_id = match.group(1) if match else None
+    return {
+        'timestamp': report.get('timestamp'),
+        'account_id': account_id,
+        'region': report.get('region'),
+        'services': report.get('services', []),
+        'passed': statuses.get('PASS', 0),
+        'failed': statuses.get('FAIL', 0),
+        'errors': statuses.get('ERROR', 0),
+        'statuses': statuses,
+        'status': 'failed' if statuses.get('FAIL') else 'success'
+    }
+
+
+class ScanIndex:
+    """
+    SQLite index of the scans stored in a folder and of their findings, so
+    that listing scans or querying findings does not read the reports.
+    Scans are added when they are saved;
+    sync() picks up reports written, changed or deleted by other means (the
+    CLI's --events updates, older scans).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        db = self._connect()
+        db.executescript(SCHEMA)
+        if db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            db.execute("UPDATE scans SET mtime = 0")
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def add(self, folder, filename, report, pdf=None):
+        row = summarize(report)
+        db = self._connect()
+        sid = scan_id(filename)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO scans (scan_id, filename, pdf, mtime, timestamp, account_id, region, "
+                "services, passed, failed, errors, statuses, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sid, filename, pdf, os.path.getmtime(os.path.join(folder, filename)), row['timestamp'],
+                 row['account_id'], row['region'], json.dumps(row['services']), row['passed'], row['failed'],
+                 row['errors'], json.dumps(row['statuses']), row['status'])
+            )
+            db.execute("DELETE FROM scan_services WHERE scan_id = ?", (sid,))
+            db.executemany("INSERT INTO scan_services (scan_id, service) VALUES (?, ?)",
+                           [(sid, service) for service in row['services']])
+            db.execute("DELETE FROM findings WHERE scan_id = ?", (sid,))
+            db.executemany(
+                "INSERT INTO findings (scan_id, seq, service, status, check_id, resource, finding) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(sid, seq, f.get('service'), f.get('status'), f.get('check_id'),
+                  None if f.get('resource') is None else str(f['resource']), json.dumps(f, default=str))
+                 for seq, f in enumerate(f for group in report.get('raw_results', []) for f in group)]
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def sync(self, folder):
+        """Index the folder's reports missing or changed since indexed, forget deleted ones."""
+        indexed = {row['filename']: row['mtime'] for row in self._connect().execute("SELECT filename, mtime FROM scans")}
+        present = set()
+        for filename in os.listdir(folder):
+            if not is_report(filename):
+                continue
+            present.add(filename)
+            if indexed.get(filename) == os.path.getmtime(os.path.join(folder, filename)):
+                continue
+            try:
+                report = read_report(os.path.join(folder, filename))
+            except (OSError, ValueError, EOFError):
+                continue
+            if isinstance(report, dict):
+                pdf = scan_id(filename) + '.pdf'
+                self.add(folder, filename, report, pdf if os.path.exists(os.path.join(folder, pdf)) else None)
+        for filename in set(indexed) - present:
+            self.remove(scan_id(filename))
+
+    def remove(self, sid):
+        db = self._connect()
+        db.execute("DELETE FROM scans WHERE scan_id = ?", (sid,))
+        db.execute("DELETE FROM scan_services WHERE scan_id = ?", (sid,))
+        db.execute("DELETE FROM findings WHERE scan_id = ?", (sid,))
+
+    def has(self, sid):
+        return self._connect().execute("SELECT 1 FROM scans WHERE scan_id = ?", (sid,)).fetchone() is not None
+
+    def findings(self, sid, service=None, status=None, check_id=None, resource=None,
+                 limit=DEFAULT_FINDINGS_PAGE, cursor=None):
+        """
+        (findings, next_cursor): one page of a scan's findings in report
+        order. service, status and check_id take comma-separated values;
+        resource is a prefix. next_cursor is None on the last page; raises
+        ValueError for a cursor this index did not hand out.
+        """
+        clauses, args = ["scan_id = ?"], [sid]
+        for column, value in (('service', service), ('status', status), ('check_id', check_id)):
+            if value:
+                values = value.split(',')
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                args.extend(values)
+        if resource:
+            # Prefix as a range, which the resource index serves (LIKE would not)
+            clauses.append("resource >= ? AND resource < ?")
+            args.extend([resource, resource + '\U0010ffff'])
+        if cursor:
+            clauses.append("seq > ?")
+            args.append(decode_cursor(cursor))
+        limit = min(limit, MAX_FINDINGS_PAGE)
+        rows = self._connect().execute(
+            f"SELECT seq, finding FROM findings WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+            (*args, limit + 1)
+        ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1]['seq']) if len(rows) > limit else None
+        return [json.loads(row['finding']) for row in rows[:limit]], next_cursor
+
+    def query(self, account_id=None, region=None, status=None, service=None, since=None, until=None,
+              limit=DEFAULT_PAGE, offset=0):
+        """(scans, total): one page of the matching scans, newest first, and their total count."""
+        clauses, args = [], []
+        for column, value in (('account_id', account_id), ('region', region), ('status', status)):
+            if value:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if service:
+            clauses.append("scan_id IN (SELECT scan_id FROM scan_services WHERE service = ?)")
+            args.append(service)
+        if since:
+            clauses.append("timestamp >= ?")
+            args.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            args.append(until)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        db = self._connect()
+        total = db.execute(f"SELECT COUNT(*) FROM scans{where}", args).fetchone()[0]
+        rows = db.execute(
+            f"SELECT * FROM scans{where} ORDER BY timestamp DESC, scan_id DESC LIMIT ? OFFSET ?",
+            (*args, min(limit, MAX_PAGE), offset)
+        ).fetchall()
+        return [_scan(row) for row in rows], total
+
+
+def _scan(row):
+    scan = dict(row)
+    del scan['mtime']
+    scan['services'] = json.loads(scan['services'])
+    scan['statuses'] = json.loads(scan['statuses'])
+    return scan
+
+
+def encode_cursor(seq):
+    return base64.urlsafe_b64encode(f"seq:{seq}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        kind, seq = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+        if kind == 'seq':
+            return int(seq)
+    except (ValueError, UnicodeDecodeError):
+        pass
+    raise ValueError(f"Invalid cursor {cursor}")
+
+
+def open_index(folder):
+    return ScanIndex(os.path.join(folder, 'state', 'index.db'))
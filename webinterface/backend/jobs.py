@@ -0,0 +1,269 @@
+# backend/jobs.py
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from Core.budget import enabled as budget_enabled
+from Core.cancellation import ScanCancelled
+from streams import streams
+from workers import run_in_worker, scheduler, warm, worker_context
+
+# Scans running at once; further jobs wait in the queue
+MAX_JOBS = 2
+
+# States a job does not leave; 'interrupted' jobs were queued or running
+# when the backend stopped
+FINAL_STATES = ('done', 'failed', 'cancelled', 'interrupted')
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S UTC'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'queued',
+    account_id TEXT,
+    scan_key TEXT,
+    created TEXT NOT NULL,
+    started TEXT,
+    finished TEXT,
+    params TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    pdf TEXT,
+    results TEXT,
+    statuses TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+# Columns added since the table was first created, with their type
+ADDED_COLUMNS = {'account_id': 'TEXT', 'scan_key': 'TEXT'}
+
+
+def _now():
+    return datetime.utcnow().strftime(TIME_FORMAT)
+
+
+def scan_key(credentials, params):
+    """
+    (account_id, key) of a scan request: scans of the same account and
+    params (region, incremental, timeout: everything that changes the
+    report) and check set produce the same report. The backend always runs
+    every check, so the check set is 'all'. Raises ValueError for
+    credentials STS does not accept.
+    """
+    session = boto3.session.Session(
+        aws_access_key_id=credentials['access_key'],
+        aws_secret_access_key=credentials['secret_key'],
+        aws_session_token=credentials.get('session_token'),
+        region_name=params.get('region')
+    )
+    try:
+        account_id = session.client('sts').get_caller_identity()['Account']
+    except (BotoCoreError, ClientError) as e:
+        raise ValueError(f"Credential validation failed: {e}")
+    options = json.dumps(dict(params, region=session.region_name or 'default'), sort_keys=True)
+    return account_id, f"{account_id}/all/{options}"
+
+
+class JobStore:
+    """
+    SQLite record of the scan jobs, kept across backend restarts. Only the
+    scan parameters are stored: credentials stay in memory for the job's run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        db = self._connect()
+        db.executescript(SCHEMA)
+        columns = {row['name'] for row in db.execute("PRAGMA table_info(jobs)")}
+        for name, kind in ADDED_COLUMNS.items():
+            if name not in columns:
+                db.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_scan_key ON jobs (scan_key, state)")
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def create(self, params, account_id=None, key=None):
+        job_id = uuid.uuid4().hex[:12]
+        self._connect().execute(
+            "INSERT INTO jobs (job_id, account_id, scan_key, created, params) VALUES (?, ?, ?, ?, ?)",
+            (job_id, account_id, key, _now(), json.dumps(params))
+        )
+        return job_id
+
+    def update(self, job_id, **fields):
+        if 'statuses' in fields:
+            fields['statuses'] = json.dumps(fields['statuses'])
+        self._connect().execute(
+            f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE job_id = ?",
+            (*fields.values(), job_id)
+        )
+
+    def advance(self, job_id):
+        self._connect().execute("UPDATE jobs SET done = done + 1 WHERE job_id = ?", (job_id,))
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def latest_done(self, key):
+        row = self._connect().execute(
+            "SELECT * FROM jobs WHERE scan_key = ? AND state = 'done' ORDER BY rowid DESC LIMIT 1", (key,)
+        ).fetchone()
+        return _job(row) if row is not None else None
+
+    def list(self, state=None, limit=50):
+        """Most recent jobs first."""
+        query, args = "SELECT * FROM jobs", ()
+        if state:
+            query, args = query + " WHERE state = ?", (state,)
+        rows = self._connect().execute(query + " ORDER BY rowid DESC LIMIT ?", (*args, limit)).fetchall()
+        return [_job(row) for row in rows]
+
+    def recover(self):
+        """Mark the jobs a previous backend process left unfinished; returns their count."""
+        return self._connect().execute(
+            "UPDATE jobs SET state = 'interrupted', finished = ?, "
+            "error = 'Backend stopped before the scan finished: submit it again' "
+            "WHERE state IN ('queued', 'running')",
+            (_now(),)
+        ).rowcount
+
+
+def _job(row):
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['statuses'] = json.loads(job['statuses']) if job['statuses'] else None
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    return job
+
+
+def _age(job):
+    """Seconds since a job finished."""
+    return (datetime.utcnow() - datetime.strptime(job['finished'], TIME_FORMAT)).total_seconds()
+
+
+class JobManager:
+    """
+    Runs scan jobs on a bounded thread pool, each thread driving one worker
+    process (workers.run_in_worker). If Core.budget sets caps, the workers
+    share a per-account request budget (Core.budget.FairScheduler). Each job's progress goes to its store
+    row and to a ScanStream of the same ID for Server-Sent Events.
+    """
+
+    def __init__(self, store, folder='scans', workers=MAX_JOBS):
+        self.store = store
+        self.folder = folder
+        self.interrupted = store.recover()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='awscan-job')
+        self._active = {}  # job_id -> (future, cancel event)
+        self._inflight = {}  # scan key -> job_id of its queued or running scan
+        self._lock = threading.Lock()
+        warm()
+        self.scheduler = scheduler() if budget_enabled() else None
+
+    def submit(self, credentials, params, max_age=None):
+        """
+        Queue a scan, unless one of the same scan key is already queued or
+        running (its job is returned instead), or, with max_age (seconds),
+        one finished less than max_age ago. credentials: access_key,
+        secret_key, session_token; params: region, incremental, timeout.
+        Returns (job_id, origin), origin being 'new', 'attached' or 'recent'.
+        """
+        account_id, key = scan_key(credentials, params)
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id is not None:
+                return job_id, 'attached'
+            job = self.store.latest_done(key) if max_age else None
+            # A report deleted from the scan store is scanned again
+            if job is not None and _age(job) <= max_age and os.path.isfile(os.path.join(self.folder, job['results'])):
+                return job['job_id'], 'recent'
+            job_id = self.store.create(params, account_id, key)
+            cancel_event = worker_context().Event()
+            stream = streams.create(job_id)
+            future = self._executor.submit(self._run, job_id, account_id, credentials, params, cancel_event, stream)
+            self._active[job_id] = (future, cancel_event)
+            self._inflight[key] = job_id
+        return job_id, 'new'
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job (None if unknown)."""
+        with self._lock:
+            future, cancel_event = self._active.get(job_id, (None, None))
+        if future is None:
+            return self.store.get(job_id)
+        cancel_event.set()
+        self._release(job_id)
+        if future.cancel():
+            # Never started
+            self._finish(job_id, streams.get(job_id), 'cancelled')
+        else:
+            # Its next API call is refused and the scan stops without saving a report
+            self.store.update(job_id, cancel_requested=1)
+        return self.store.get(job_id)
+
+    def _run(self, job_id, account_id, credentials, params, cancel_event, stream):
+        self.store.update(job_id, state='running', started=_now())
+
+        def on_plan(units):
+            stream.on_plan(units)
+            self.store.update(job_id, total=len(units))
+
+        def on_findings(unit, findings):
+            stream.on_findings(unit, findings)
+            self.store.advance(job_id)
+
+        try:
+            result = run_in_worker(job_id, credentials, params, self.folder, cancel_event, on_plan, on_findings,
+                                   budget=(self.scheduler, account_id) if self.scheduler is not None else None)
+        except ScanCancelled:
+            self._finish(job_id, stream, 'cancelled')
+            return
+        except Exception as e:
+            self._finish(job_id, stream, 'failed', error=str(e))
+            raise
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.forget(job_id)
+        # The worker saved the report in the scan store
+        self._finish(job_id, stream, 'done', **result)
+
+    def _release(self, job_id):
+        # Later requests of the same key start a new scan
+        with self._lock:
+            for key, inflight in list(self._inflight.items()):
+                if inflight == job_id:
+                    del self._inflight[key]
+
+    def _finish(self, job_id, stream, state, **fields):
+        self.store.update(job_id, state=state, finished=_now(), **fields)
+        self._release(job_id)
+        with self._lock:
+            self._active.pop(job_id, None)
+        if stream is None:
+            return
+        if state == 'done':
+            stream.publish('done', fields)
+        elif state == 'cancelled':
+            stream.publish('cancelled', {})
+        else:
+            stream.publish('error', {'error': fields['error']})
@@ -1,89 +1,252 @@
 # backend/scans.py
 
-from flask import Blueprint, jsonify, request, send_from_directory
-from utils import list_json_results, run_scan_and_save_pdf
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
+from werkzeug.security import safe_join
+from streams import streams
+from jobs import FINAL_STATES, JobManager, JobStore
+from index import DEFAULT_FINDINGS_PAGE, DEFAULT_PAGE, open_index
+from Core.remediation import REMEDIATIONS
+from Core.storage import is_report
+import gzip
+import io
 import os
-import json
+import threading
+from urllib.parse import urlencode
 
 bp = Blueprint('scans', __name__)
 
+# Seconds a scan started from the web UI may run before unfinished checks are reported as TIMEOUT
+SCAN_TIMEOUT = 600
+
+# Seconds a finished scan is returned instead of running a new one of the same
+# account and params, unless the request sets its own max_age (0: always scan)
+FRESHNESS_WINDOW = 0
+
+_jobs = None
+_jobs_lock = threading.Lock()
+_index = None
+
+def job_manager():
+    """
+    The scan jobs, recorded next to the other scan state so they outlive the
+    process. Created on first use: worker processes import this module too,
+    and must neither recover the jobs nor start workers of their own.
+    """
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = JobManager(JobStore(os.path.join('scans', 'state', 'jobs.db')), folder='scans')
+        return _jobs
+
+def scan_index():
+    """Index of the scans stored in 'scans/' (see index.ScanIndex)."""
+    global _index
+    with _jobs_lock:
+        if _index is None:
+            _index = open_index('scans')
+        return _index
+
 @bp.route('/', methods=['GET'])
 def list_scans():
     """
-    List available raw JSON scan outputs in 'scans/'.
-    Also returns status (success/failed/unknown) for each scan.
-    """
-    scan_files = list_json_results('scans')
-    scan_list = []
-    for filename in scan_files:
-        status = "unknown"
-        # Try to read the JSON and look for a "status" field, or infer from content
-        try:
-            with open(os.path.join('scans', filename), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # You can adjust this logic based on your report structure
-                if "status" in data:
-                    status = data["status"]
-                elif "failed" in filename.lower():
-                    status = "failed"
-                elif "success" in filename.lower():
-                    status = "success"
-                else:
-                    # Try to infer from data (example: if there are failed checks)
-                    if "summary" in data and "failed" in data["summary"]:
-                        if data["summary"]["failed"] > 0:
-                            status = "failed"
-                        else:
-                            status = "success"
-        except Exception:
-            # If file can't be read, keep status unknown
-            pass
-        scan_list.append({"filename": filename, "status": status})
-    return jsonify(scan_list), 200
+    One page of the stored scans, newest first, read from the scan index:
+    filename, status (failed if any check failed, else success), timestamp,
+    account, region, services and counts per status. Filters: ?account=,
+    ?region=, ?status=, ?service=, ?since= and ?until= (timestamps such as
+    2026-01-31). ?limit= (default 100, at most 1000) and ?offset= page the
+    results; the number of matches is in X-Total-Count.
+    """
+    limit, offset = request.args.get('limit', str(DEFAULT_PAGE)), request.args.get('offset', '0')
+    if not limit.isdigit() or not offset.isdigit():
+        return jsonify({'error': 'limit and offset must be non-negative integers'}), 400
+    index = scan_index()
+    index.sync('scans')
+    scan_list, total = index.query(
+        account_id=request.args.get('account'),
+        region=request.args.get('region'),
+        status=request.args.get('status'),
+        service=request.args.get('service'),
+        since=request.args.get('since'),
+        until=request.args.get('until'),
+        limit=int(limit),
+        offset=int(offset)
+    )
+    headers = {'X-Total-Count': str(total)}
+    if int(offset) + len(scan_list) < total:
+        args = dict(request.args, offset=int(offset) + len(scan_list))
+        headers['Link'] = f"<{request.base_url}?{urlencode(args)}>; rel=\"next\""
+    return jsonify(scan_list), 200, headers
 
+def _scan_request(data):
+    """Split a scan request body into (credentials, params, max_age); raises ValueError if invalid."""
+    if not data.get('access_key') or not data.get('secret_key'):
+        raise ValueError('access_key and secret_key are required')
+    credentials = {
+        'access_key': data['access_key'],
+        'secret_key': data['secret_key'],
+        'session_token': data.get('session_token')
+    }
+    try:
+        timeout = float(data.get('timeout', SCAN_TIMEOUT))
+    except (TypeError, ValueError):
+        raise ValueError('timeout must be a number of seconds')
+    params = {
+        'region': data.get('region'),
+        'incremental': bool(data.get('incremental', False)),
+        'timeout': timeout
+    }
+    try:
+        max_age = float(data.get('max_age', FRESHNESS_WINDOW))
+    except (TypeError, ValueError):
+        raise ValueError('max_age must be a number of seconds')
+    return credentials, params, max_age
+
+def _job_links(job):
+    return dict(job, status=f"/scans/jobs/{job['job_id']}", events=f"/scans/jobs/{job['job_id']}/events")
+
+@bp.route('/jobs', methods=['POST'])
 @bp.route('/run', methods=['POST'])
-def run_scan():
-    """
-    Trigger a new CIS audit via:
-      1) validate_creds
-      2) discover_enabled_services
-      3) thread_audits
-      4) organize_results
-      5) save both PDF and JSON
-    Returns the JSON report immediately.
-    """
-    data = request.get_json() or {}
-    ak = data.get('access_key')
-    sk = data.get('secret_key')
-    token = data.get('session_token')
-    region = data.get('region')
-    if not ak or not sk:
-        return jsonify({'error': 'access_key and secret_key are required'}), 400
+def submit_job():
+    """
+    Queue a scan (credentials, region, incremental, timeout) and return its
+    job at once, with the links to its status and events. At most
+    MAX_JOBS scans run together; the others wait in the queue. A scan of the
+    same account and params already queued or running is joined instead
+    (origin 'attached'), and with max_age (seconds) one finished since is
+    returned (origin 'recent', status 200).
+    """
+    try:
+        credentials, params, max_age = _scan_request(request.get_json() or {})
+        job_id, origin = job_manager().submit(credentials, params, max_age)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = dict(_job_links(job_manager().store.get(job_id)), origin=origin)
+    return jsonify(job), 200 if origin == 'recent' else 202, {'Location': f"/scans/jobs/{job_id}"}
+
+@bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Most recent jobs first, optionally filtered by ?state= (at most ?limit=, default 50)."""
+    limit = request.args.get('limit', '50')
+    if not limit.isdigit():
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    return jsonify([_job_links(job) for job in job_manager().store.list(request.args.get('state'), int(limit))]), 200
 
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    A job's state (queued, running, done, failed, cancelled, interrupted),
+    progress (done of total units), and its report filenames and counts per
+    status once done.
+    """
+    job = job_manager().store.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown job {job_id}"}), 404
+    return jsonify(_job_links(job)), 200
+
+@bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a job: a queued job never runs, a running one stops at its next
+    API call without saving a report (202 until it has).
+    """
+    job = job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown job {job_id}"}), 404
+    if job['state'] in FINAL_STATES and job['state'] != 'cancelled':
+        return jsonify(dict(_job_links(job), error=f"Job already {job['state']}")), 409
+    return jsonify(_job_links(job)), 200 if job['state'] == 'cancelled' else 202
+
+@bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-Sent Events of a scan job: 'plan' (units to run), one 'unit' per
+    finished check and region (findings, done, total), then 'done' (report
+    filenames, counts per status), 'cancelled' or 'error'. Events are kept
+    in memory: after a backend restart, GET /jobs/<job_id> has the outcome.
+    """
+    stream = streams.get(job_id)
+    if stream is None:
+        return jsonify({'error': f"Unknown job {job_id}"}), 404
+    last_event_id = request.headers.get('Last-Event-ID')
+    return Response(
+        stream_with_context(stream.sse(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/<scan_id>/findings', methods=['GET'])
+def scan_findings(scan_id):
+    """
+    One page of a stored scan's findings (scan_id: its JSON filename without
+    .json), in report order. Filters: ?service=, ?status= and ?check_id=
+    (comma-separated values, e.g. status=FAIL,ERROR) and ?resource= (a
+    prefix). ?limit= (default 100, at most 1000); pass the returned
+    next_cursor as ?cursor= for the next page (null on the last one).
+    """
+    limit = request.args.get('limit', str(DEFAULT_FINDINGS_PAGE))
+    if not limit.isdigit() or int(limit) == 0:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    index = scan_index()
+    if not index.has(scan_id):
+        index.sync('scans')
+        if not index.has(scan_id):
+            return jsonify({'error': f"Unknown scan {scan_id}"}), 404
     try:
-        # We still save both, but only return the JSON here
-        _, report_json = run_scan_and_save_pdf(
-            access_key=ak,
-            secret_key=sk,
-            session_token=token,
-            region=region,
-            folder='scans'
+        findings, next_cursor = index.findings(
+            scan_id,
+            service=request.args.get('service'),
+            status=request.args.get('status'),
+            check_id=request.args.get('check_id'),
+            resource=request.args.get('resource'),
+            limit=int(limit),
+            cursor=request.args.get('cursor')
         )
-        # Optionally, add a status field to the returned JSON
-        if "summary" in report_json and "failed" in report_json["summary"]:
-            report_json["status"] = "failed" if report_json["summary"]["failed"] > 0 else "success"
-        return jsonify(report_json), 200
-    except Exception as e:
-        return jsonify({'error': str(e), 'status': 'failed'}), 500
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'scan_id': scan_id, 'findings': findings, 'next_cursor': next_cursor}), 200
 
 @bp.route('/results/<path:filename>', methods=['GET'])
 def get_json(filename):
     """
-    Retrieve a specific raw JSON report by filename.
+    Retrieve a specific raw JSON report by filename (a .json name also finds
+    the compressed .json.gz). Compressed reports go out as stored, with
+    Content-Encoding: gzip, to clients accepting gzip, and decompressed to
+    the others. ETag / If-None-Match and Range requests are supported.
     """
-    return send_from_directory(
-        'scans',
-        filename,
-        mimetype='application/json',
-        as_attachment=False
-    )
+    # Only reports: the folder also holds the backend's state (jobs, index, models)
+    if '/' in filename or not is_report(filename):
+        return jsonify({'error': f"Unknown report {filename}"}), 404
+    path = safe_join('scans', filename)
+    if path is not None and not os.path.isfile(path) and os.path.isfile(path + '.gz'):
+        path += '.gz'
+    if path is None or not os.path.isfile(path):
+        return jsonify({'error': f"Unknown report {filename}"}), 404
+    # Reports are written relative to the working directory, like every scan file
+    path = os.path.abspath(path)
+    if not path.endswith('.gz'):
+        return send_file(path, mimetype='application/json', conditional=True)
+
+    stat = os.stat(path)
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    if request.accept_encodings['gzip']:
+        response = send_file(path, mimetype='application/json', conditional=True, etag=f"{etag}-gzip")
+        response.headers['Content-Encoding'] = 'gzip'
+    elif request.if_none_match.contains(etag):
+        # Unchanged: no need to decompress it
+        response = Response(status=304)
+        response.set_etag(etag)
+    else:
+        with gzip.open(path, 'rb') as f:
+            body = io.BytesIO(f.read())
+        response = send_file(body, mimetype='application/json', conditional=True, etag=etag,
+                             last_modified=stat.st_mtime)
+    response.vary.add('Accept-Encoding')
+    return response
+
+@bp.route('/remediations', methods=['GET'])
+def get_remediations():
+    """
+    Return the remediation catalog so clients can render the
+    {'id', 'args'} references stored on each finding.
+    """
+    return jsonify(REMEDIATIONS), 200
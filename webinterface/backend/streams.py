@@ -0,0 +1,93 @@
+# backend/streams.py
+import json
+import threading
+import time
+import uuid
+
+# Finished streams kept for clients that connect late
+MAX_FINISHED_STREAMS = 50
+
+# Seconds between keep-alive comments while no event is published
+KEEPALIVE = 15
+
+
+class ScanStream:
+    """
+    Events of one scan started from the web UI. Every event is kept, so a
+    client connecting (or reconnecting with Last-Event-ID) at any time
+    receives the whole history before the live events.
+    """
+
+    def __init__(self, scan_id=None):
+        self.scan_id = scan_id or uuid.uuid4().hex[:12]
+        self.events = []
+        self.done = 0
+        self.total = None
+        self.finished = False
+        self.finished_at = None
+        self._condition = threading.Condition()  # reentrant: publish() is called with it held
+
+    def publish(self, kind, data):
+        with self._condition:
+            self.events.append((len(self.events), kind, data))
+            if kind in ('done', 'error', 'cancelled'):
+                self.finished = True
+                self.finished_at = time.time()
+            self._condition.notify_all()
+
+    def on_plan(self, units):
+        self.total = len(units)
+        self.publish('plan', {'total': self.total})
+
+    def on_findings(self, unit, findings):
+        # Called from the scan's worker threads
+        with self._condition:
+            self.done += 1
+            self.publish('unit', {
+                'service': unit.service,
+                'check_id': unit.check_id,
+                'region': unit.region,
+                'findings': findings,
+                'done': self.done,
+                'total': self.total
+            })
+
+    def sse(self, last_event_id=None):
+        """Server-Sent Events from last_event_id + 1 until the scan ends."""
+        position = last_event_id + 1 if last_event_id is not None else 0
+        while True:
+            with self._condition:
+                if position >= len(self.events) and not self.finished:
+                    self._condition.wait(KEEPALIVE)
+                pending = self.events[position:]
+                finished = self.finished
+            if not pending:
+                if finished:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            for event_id, kind, data in pending:
+                yield f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+            position += len(pending)
+
+
+class StreamRegistry:
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def create(self, scan_id=None):
+        stream = ScanStream(scan_id)
+        with self._lock:
+            finished = sorted((s for s in self._streams.values() if s.finished), key=lambda s: s.finished_at)
+            for old in finished[:max(len(finished) - MAX_FINISHED_STREAMS + 1, 0)]:
+                del self._streams[old.scan_id]
+            self._streams[stream.scan_id] = stream
+        return stream
+
+    def get(self, scan_id):
+        with self._lock:
+            return self._streams.get(scan_id)
+
+
+streams = StreamRegistry()
@@ -1,10 +1,21 @@
-import json
 from datetime import datetime
 from Core.orchestrator import (
     validate_creds,
     discover_enabled_services,
     thread_audits
 )
+from Core.context import ScanContext
+from Core.cancellation import raise_if_cancelled
+from Core.fingerprints import open_store
+from Core.remediation import render_remediation
+from Core.deadlines import Deadlines
+from Core.negative_cache import NegativeCache
+from Core.planner import Planner
+from Core.preflight import Preflight
+from Core.stats import ApiStats
+from Core.storage import REPORT_SUFFIX, is_report, write_report
+from Core.warmup import DEFAULT_MODEL_CACHE, Warmup, stop
+from index import open_index
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
     PageBreak, Image, KeepTogether
@@ -16,21 +27,33 @@ from reportlab.lib import colors
 import os
 def list_json_results(folder: str):
     """
-    Return a sorted list of JSON filenames in the given folder.
+    Return a sorted list of JSON report filenames (compressed or not) in the given folder.
     """
-    return sorted(f for f in os.listdir(folder) if f.lower().endswith('.json'))
+    return sorted(f for f in os.listdir(folder) if is_report(f))
 
 def run_scan_and_save_pdf(access_key: str,
                           secret_key: str,
                           session_token: str = None,
                           region: str = None,
-                          folder: str = 'scans'):
+                          folder: str = 'scans',
+                          incremental: bool = False,
+                          scan_timeout: float = None,
+                          on_plan=None,
+                          on_findings=None,
+                          cancellation=None,
+                          scan_id: str = None,
+                          budget=None):
     """
     1) validate_creds
     2) discover_enabled_services
-    3) thread_audits
+    3) thread_audits (incremental: carry forward findings of unchanged resources;
+       scan_timeout: seconds after which unfinished checks are reported as TIMEOUT)
     4) generate & save PDF from raw results
-    5) save JSON
+    5) save JSON (gzip-compressed) and add it to the scan index
+    A Cancellation set while it runs stops the scan with ScanCancelled
+    before anything is saved. scan_id is appended to the file names, which
+    keeps scans finishing in the same second apart. A RequestBudget makes
+    every API call wait for its share of the account's request budget.
     Returns (pdf_filename, report_json)
     """
     valid, message, session = validate_creds(
@@ -39,18 +62,48 @@ def run_scan_and_save_pdf(access_key: str,
     if not valid:
         raise RuntimeError(f"Credential validation failed: {message}")
 
+    fingerprints = open_store(session, os.path.join(folder, 'state')) if incremental else None
+    scan = ScanContext(
+        fingerprints=fingerprints,
+        stats=ApiStats().install(session),
+        negative_cache=NegativeCache().install(session),
+        planner=Planner(session),
+        on_plan=on_plan,
+        on_findings=on_findings,
+        cancellation=cancellation.install(session) if cancellation is not None else None,
+        deadlines=Deadlines(scan=scan_timeout).install(session) if scan_timeout else None,
+        warmup=Warmup(session, DEFAULT_MODEL_CACHE).start()
+    )
+    if budget is not None:
+        budget.install(session)
+    account_id = session.client('sts').get_caller_identity()['Account']
+
     # Discover services and collect raw audit results (list of lists)
-    enabled_services = discover_enabled_services(session)
-    print(enabled_services)
-    raw_results = thread_audits(enabled_services, session)
+    try:
+        enabled_services = discover_enabled_services(session, scan)
+        print(enabled_services)
+        raise_if_cancelled(scan, 'discovery')
+        scan.preflight = Preflight(session, scan).run(enabled_services)
+        raw_results = thread_audits(enabled_services, session, scan)
+    finally:
+        stop(scan)
+    raise_if_cancelled(scan, 'audits')
+    if fingerprints is not None:
+        fingerprints.save()
 
     # Build report data
     timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
     report_json = {
         "timestamp": timestamp,
         "validate": message,
+        "account_id": account_id,
+        "region": session.region_name,
         "services": enabled_services,
-        "raw_results": raw_results
+        "raw_results": raw_results,
+        "api_stats": scan.stats.rows(),
+        "denied_operations": scan.negative_cache.rows(),
+        "preflight": scan.preflight.coverage(),
+        "budget": budget.summary() if budget is not None else None
     }
 
     # Ensure output folder exists
@@ -58,14 +111,14 @@ def run_scan_and_save_pdf(access_key: str,
 
     # Save PDF
     ts_fname = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-    base_name = f"scan_{ts_fname}"
+    base_name = f"scan_{ts_fname}_{scan_id}" if scan_id else f"scan_{ts_fname}"
     pdf_path = os.path.join(folder, f"{base_name}.pdf")
     _build_pdf(pdf_path, report_json)
 
     # Save JSON
-    json_path = os.path.join(folder, f"{base_name}.json")
-    with open(json_path, 'w') as jf:
-        json.dump(report_json, jf, indent=2)
+    json_path = os.path.join(folder, base_name + REPORT_SUFFIX)
+    write_report(json_path, report_json)
+    open_index(folder).add(folder, base_name + REPORT_SUFFIX, report_json, f"{base_name}.pdf")
 
     return f"{base_name}.pdf", report_json
 
@@ -151,7 +204,7 @@ def _build_pdf(path: str, report: dict):
             # Wrap evidence and remediation in Paragraphs
             res=Paragraph(f.get('resource',''), styles['CellWrap'])
             ev = Paragraph(f.get('evidence',''), styles['CellWrap'])
-            rem = Paragraph(f.get('remediation',''), styles['CellWrap'])
+            rem = Paragraph(render_remediation(f.get('remediation')) or '', styles['CellWrap'])
             detail_data.append([
                 f.get('service',''),
                 f.get('check_id',''),
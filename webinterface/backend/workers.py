@@ -0,0 +1,175 @@
+# backend/workers.py
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+try:
+    import resource
+except ImportError:  # Windows: workers run without a memory limit
+    resource = None
+
+from Core.budget import FairScheduler
+from Core.cancellation import ScanCancelled
+from Core.storage import REPORT_SUFFIX
+
+# Address space limit of a scan worker process, in MB (None: unlimited)
+WORKER_MEMORY_MB = 4096
+
+# Seconds a worker may run past the scan timeout (discovery, PDF) before it is killed
+WORKER_GRACE = 120
+
+# Seconds a cancelled worker has to stop by itself before it is killed
+CANCEL_GRACE = 30
+
+# Modules the fork server imports once: every worker is forked with them loaded
+PRELOAD = ['boto3', 'botocore.session', 'reportlab.platypus', 'utils']
+
+_context = None
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class BudgetManager(BaseManager):
+    pass
+
+
+BudgetManager.register('FairScheduler', FairScheduler)
+
+
+def worker_context():
+    """
+    multiprocessing context of the scan workers: a fork server with the scan
+    modules preloaded where available, plain spawned processes elsewhere.
+    """
+    global _context
+    if _context is None:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            _context = multiprocessing.get_context('forkserver')
+            _context.set_forkserver_preload(PRELOAD)
+        else:
+            _context = multiprocessing.get_context('spawn')
+    return _context
+
+
+def warm():
+    """Start the fork server now rather than with the first scan."""
+    if worker_context().get_start_method() == 'forkserver':
+        from multiprocessing import forkserver
+        forkserver.ensure_running()
+
+
+def scheduler():
+    """
+    The FairScheduler shared by every worker: it lives in a manager process,
+    started on first use, and workers reach it through a proxy.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            manager = BudgetManager(ctx=worker_context())
+            manager.start()
+            _scheduler = manager.FairScheduler()
+        return _scheduler
+
+
+def _worker(job_id, credentials, params, folder, cancel_event, events, memory_mb, budget):
+    # Runs in the worker process; everything it reports goes through events
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    from Core.budget import RequestBudget
+    from Core.cancellation import Cancellation
+    from utils import run_scan_and_save_pdf
+    try:
+        pdf_filename, report_json = run_scan_and_save_pdf(
+            access_key=credentials['access_key'],
+            secret_key=credentials['secret_key'],
+            session_token=credentials.get('session_token'),
+            region=params.get('region'),
+            folder=folder,
+            incremental=params.get('incremental', False),
+            scan_timeout=params.get('timeout'),
+            on_plan=lambda units: events.put(('plan', list(units))),
+            on_findings=lambda unit, findings: events.put(('unit', unit, findings)),
+            cancellation=Cancellation(cancel_event),
+            scan_id=job_id,
+            budget=RequestBudget(budget[0], job_id, budget[1]) if budget is not None else None
+        )
+    except ScanCancelled:
+        events.put(('cancelled',))
+        return
+    except MemoryError:
+        events.put(('error', f"Scan worker ran out of memory ({memory_mb} MB limit)"))
+        return
+    except Exception as e:
+        events.put(('error', str(e)))
+        return
+    statuses = {}
+    for group in report_json['raw_results']:
+        for finding in group:
+            statuses[finding['status']] = statuses.get(finding['status'], 0) + 1
+    # The report stays in the scan store: only its file names go back
+    events.put(('done', {'pdf': pdf_filename, 'results': pdf_filename[:-len('.pdf')] + REPORT_SUFFIX,
+                         'statuses': statuses}))
+
+
+def run_in_worker(job_id, credentials, params, folder, cancel_event, on_plan=None, on_findings=None,
+                  memory_mb=WORKER_MEMORY_MB, budget=None):
+    """
+    Run a scan (run_scan_and_save_pdf) in a worker process and relay its
+    progress to on_plan(units) and on_findings(unit, findings). The worker
+    is killed WORKER_GRACE seconds after the scan timeout, or CANCEL_GRACE
+    seconds after cancel_event is set if it has not stopped by then.
+    budget: (scheduler proxy, account_id) sharing the account's request
+    budget with the other workers.
+    Returns {'pdf', 'results', 'statuses'}; raises ScanCancelled if
+    cancelled, RuntimeError if the scan failed or the worker died.
+    """
+    ctx = worker_context()
+    events = ctx.Queue()
+    process = ctx.Process(
+        target=_worker, name=f"awscan-job-{job_id}", daemon=True,
+        args=(job_id, credentials, params, folder, cancel_event, events, memory_mb, budget)
+    )
+    process.start()
+    timeout = params.get('timeout')
+    deadline = time.monotonic() + timeout + WORKER_GRACE if timeout else None
+    cancelled_at = None
+    try:
+        while True:
+            alive = process.is_alive()
+            try:
+                event = events.get(timeout=1)
+            except queue.Empty:
+                now = time.monotonic()
+                if not alive:
+                    # Checked before waiting: whatever it sent before exiting was read first
+                    raise RuntimeError(f"Scan worker exited with code {process.exitcode}")
+                if cancel_event.is_set():
+                    cancelled_at = cancelled_at or now
+                    if now - cancelled_at > CANCEL_GRACE:
+                        raise ScanCancelled('scan')
+                if deadline is not None and now > deadline:
+                    raise RuntimeError(f"Scan worker killed after {timeout + WORKER_GRACE:.0f}s")
+                continue
+            kind = event[0]
+            if kind == 'plan':
+                if on_plan is not None:
+                    on_plan(event[1])
+            elif kind == 'unit':
+                if on_findings is not None:
+                    on_findings(event[1], event[2])
+            elif kind == 'done':
+                return event[1]
+            elif kind == 'cancelled':
+                raise ScanCancelled('scan')
+            else:
+                raise RuntimeError(event[1])
+    finally:
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        events.close()
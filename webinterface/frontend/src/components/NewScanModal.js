@@ -1,6 +1,8 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Box, TextField, Button, CircularProgress, Typography } from '@mui/material';
 
+const API = 'http://localhost:5000';
+
 function NewScanModal({ onClose }) {
     const [awsCreds, setAwsCreds] = useState({
         accessKey: '',
@@ -11,15 +13,65 @@ function NewScanModal({ onClose }) {
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState('');
     const [success, setSuccess] = useState('');
+    const [progress, setProgress] = useState(null);
+    const events = useRef(null);
+
+    // Stop following the scan when the modal goes away; the job keeps running
+    useEffect(() => () => events.current && events.current.close(), []);
+
+    const finish = (message) => {
+        if (events.current) {
+            events.current.close();
+            events.current = null;
+        }
+        setSuccess(message);
+        setTimeout(() => {
+            setLoading(false);
+            onClose();
+        }, 1500);
+    };
+
+    const fail = (message) => {
+        if (events.current) {
+            events.current.close();
+            events.current = null;
+        }
+        setError(message);
+        setLoading(false);
+    };
+
+    const follow = (job) => {
+        // Progress of the job, from its plan to its outcome
+        const source = new EventSource(`${API}${job.events}`);
+        events.current = source;
+        source.addEventListener('plan', (e) => {
+            setProgress({ done: 0, total: JSON.parse(e.data).total });
+        });
+        source.addEventListener('unit', (e) => {
+            const { done, total } = JSON.parse(e.data);
+            setProgress({ done, total });
+        });
+        source.addEventListener('done', () => finish('Scan complete!'));
+        source.addEventListener('cancelled', () => fail('Scan cancelled'));
+        source.addEventListener('error', (e) => {
+            if (e.data) {
+                fail(JSON.parse(e.data).error || 'Scan failed');
+            } else if (source.readyState === EventSource.CLOSED) {
+                fail('Lost the connection to the scan');
+            }
+            // Otherwise the browser reconnects and resumes from the last event
+        });
+    };
 
     const handleSubmit = async (e) => {
         e.preventDefault();
         setLoading(true);
         setError('');
         setSuccess('');
+        setProgress(null);
 
         try {
-            const response = await fetch('http://localhost:5000/scans/run', {
+            const response = await fetch(`${API}/scans/jobs`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -32,18 +84,21 @@ function NewScanModal({ onClose }) {
                 }),
             });
 
+            const job = await response.json();
             if (!response.ok) {
-                throw new Error('Failed to start scan');
+                throw new Error(job.error || 'Failed to start scan');
             }
 
-            setSuccess('Scan started successfully!');
-            setTimeout(() => {
-                setLoading(false);
-                onClose();
-            }, 1500);
+            if (job.state === 'done') {
+                // A recent scan of the account was returned instead of a new one
+                finish('Scan complete!');
+            } else if (job.state === 'queued' || job.state === 'running') {
+                follow(job);
+            } else {
+                fail(`Scan ${job.state}`);
+            }
         } catch (err) {
-            setError(err.message);
-            setLoading(false);
+            fail(err.message);
         }
     };
 
@@ -120,12 +175,17 @@ function NewScanModal({ onClose }) {
                         disabled={loading}
                         sx={{ width: '48%' }}
                     >
-                        {loading ? 'Starting...' : 'Start Scan'}
+                        {loading ? (progress ? 'Scanning...' : 'Starting...') : 'Start Scan'}
                     </Button>
                 </Box>
                 {loading && (
-                    <Box sx={{ display: 'flex', justifyContent: 'center', marginTop: '20px' }}>
+                    <Box sx={{ display: 'flex', flexDirection: 'column', alignItems: 'center', marginTop: '20px' }}>
                         <CircularProgress />
+                        {progress && (
+                            <Typography sx={{ mt: 1 }}>
+                                {progress.done} of {progress.total} checks done
+                            </Typography>
+                        )}
                     </Box>
                 )}
                 {error && (
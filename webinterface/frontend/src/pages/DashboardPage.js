@@ -21,8 +21,23 @@ function extractTimestamp(filename) {
     return new Date(`${year}-${month}-${day}T${hour}:${min}:${sec}Z`);
 }
 
+function fetchScans() {
+    // The list is paged (newest first): X-Total-Count has the number of stored scans
+    return fetch('http://localhost:5000/scans/')
+        .then(res => res.json().then(data => ({
+            total: Number(res.headers.get('X-Total-Count') ?? data.length),
+            scans: data.map((scan, idx) => ({
+                id: idx,
+                name: scan.filename,
+                timestamp: extractTimestamp(scan.filename),
+                status: scan.status || 'unknown',
+            })),
+        })));
+}
+
 function DashboardPage() {
     const [scans, setScans] = useState([]);
+    const [totalScans, setTotalScans] = useState(0);
     const [loadingScans, setLoadingScans] = useState(false);
     const [showScanReportsModal, setShowScanReportsModal] = useState(false);
     const [showNewScanModal, setShowNewScanModal] = useState(false);
@@ -34,31 +49,20 @@ function DashboardPage() {
 
     // Fetch scans for scan history (on mount)
     useEffect(() => {
-        fetch('http://localhost:5000/scans/')
-            .then(res => res.json())
-            .then(data => {
-                setScans(data.map((scan, idx) => ({
-                    id: idx,
-                    name: scan.filename,
-                    timestamp: extractTimestamp(scan.filename),
-                    status: scan.status || 'unknown',
-                })));
-            });
+        fetchScans().then(({ scans, total }) => {
+            setScans(scans);
+            setTotalScans(total);
+        });
     }, []);
 
     // Fetch scans from backend when modal opens (for reports)
     useEffect(() => {
         if (showScanReportsModal) {
             setLoadingScans(true);
-            fetch('http://localhost:5000/scans/')
-                .then(res => res.json())
-                .then(data => {
-                    setScans(data.map((scan, idx) => ({
-                        id: idx,
-                        name: scan.filename,
-                        timestamp: extractTimestamp(scan.filename),
-                        status: scan.status || 'unknown',
-                    })));
+            fetchScans()
+                .then(({ scans, total }) => {
+                    setScans(scans);
+                    setTotalScans(total);
                     setLoadingScans(false);
                 })
                 .catch(() => setLoadingScans(false));
@@ -71,9 +75,6 @@ function DashboardPage() {
         .sort((a, b) => b.timestamp - a.timestamp)
         .slice(0, 5);
 
-    // Metrics calculation
-    const totalScans = scans.length;
-
     // --- Scan Report Chart Modal Logic ---
     // Flatten raw_results if present
     let allChecks = [];